@@ -1,21 +1,31 @@
 #!/usr/bin/env python3
 
+import time
+
+# Taken before any other import so the startup report covers import time
+STARTUP_STARTED = time.perf_counter()
+
 import os
-import gi
 
-# Set GTK theme to dark
+# Set GTK theme to dark (picked up by the GTK platform theme, no need to import gi)
 os.environ['GTK_THEME'] = 'Orchis:dark'
 
-# Now, you can use GTK for your GUI
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
-
 import sys
-import os
+import re
 import json
+import html
+import bisect
+import sqlite3
+import threading
+import argparse
+import functools
+import itertools
+import traceback
+import importlib.util
 import requests
-from urllib.parse import urljoin, urlparse, unquote
-from bs4 import BeautifulSoup
+from array import array
+from collections import deque, OrderedDict
+from urllib.parse import urljoin, urlparse, unquote, quote
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QListWidget, QListWidgetItem, QLabel, 
                              QLineEdit, QProgressBar, QFileDialog, QMessageBox,
@@ -23,277 +33,5415 @@ from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QTableWidget, QTableWidgetItem, QHeaderView, QMenuBar,
                              QMenu, QToolBar, QStatusBar, QMainWindow, QComboBox,
                              QDialog, QSpinBox, QCheckBox, QGridLayout, QFontDialog,
-                             QScrollArea)
-from PyQt6.QtGui import QIcon, QFont, QPalette, QColor, QAction, QFontDatabase, QPixmap
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QUrl
-
-# Try to import WebEngine, fall back to simple text view if not available
-try:
-    from PyQt6.QtWebEngineWidgets import QWebEngineView
-    WEBENGINE_AVAILABLE = True
-except ImportError:
-    WEBENGINE_AVAILABLE = False
+                             QScrollArea, QTableView, QListView, QAbstractItemView,
+                             QAbstractScrollArea)
+from PyQt6.QtGui import (QIcon, QFont, QPalette, QColor, QAction, QActionGroup, QFontDatabase,
+                         QPixmap, QPainter, QFontMetricsF, QKeySequence)
+from PyQt6.QtCore import (Qt, QObject, QThread, pyqtSignal, QTimer, QSize, QUrl,
+                          QAbstractTableModel, QAbstractProxyModel, QModelIndex,
+                          QItemSelectionModel, QItemSelection, QPointF, QRectF)
+
+# WebEngine is only imported when surf mode is first entered, so just
+# check that it is installed; fall back to simple text view if not
+WEBENGINE_AVAILABLE = importlib.util.find_spec('PyQt6.QtWebEngineWidgets') is not None
+if not WEBENGINE_AVAILABLE:
     print("PyQt6-WebEngine not available. Surf mode will use simple text rendering.")
 
-class SettingsDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.parent_window = parent
-        self.setWindowTitle('WebCrawler Settings')
-        self.setModal(True)
-        self.setMinimumSize(400, 300)
-        self.initUI()
-        
-    def initUI(self):
-        layout = QVBoxLayout()
-        
-        # Font settings
-        font_group = QFrame()
-        font_layout = QGridLayout()
-        
-        font_layout.addWidget(QLabel('Font Family:'), 0, 0)
-        self.font_combo = QComboBox()
-        font_layout.addWidget(self.font_combo, 0, 1)
-        
-        font_layout.addWidget(QLabel('Font Size:'), 1, 0)
-        self.font_size_spin = QSpinBox()
-        self.font_size_spin.setRange(8, 72)
-        self.font_size_spin.setValue(12)
-        font_layout.addWidget(self.font_size_spin, 1, 1)
-        
-        self.font_dialog_button = QPushButton('Choose Font...')
-        self.font_dialog_button.clicked.connect(self.open_font_dialog)
-        font_layout.addWidget(self.font_dialog_button, 2, 0, 1, 2)
-        
-        # Now populate fonts AFTER widgets are created
-        self.populate_fonts()
-        
-        font_group.setLayout(font_layout)
-        layout.addWidget(QLabel('Font Settings'))
-        layout.addWidget(font_group)
-        
-        # View settings
-        view_group = QFrame()
-        view_layout = QVBoxLayout()
-        
-        self.show_tree_check = QCheckBox('Show Directory Tree')
-        self.show_tree_check.setChecked(True)
-        view_layout.addWidget(self.show_tree_check)
-        
-        self.show_info_check = QCheckBox('Show File Information Panel')
-        self.show_info_check.setChecked(True)
-        view_layout.addWidget(self.show_info_check)
-        
-        self.show_toolbar_check = QCheckBox('Show Toolbar')
-        self.show_toolbar_check.setChecked(True)
-        view_layout.addWidget(self.show_toolbar_check)
-        
-        self.show_statusbar_check = QCheckBox('Show Status Bar')
-        self.show_statusbar_check.setChecked(True)
-        view_layout.addWidget(self.show_statusbar_check)
-        
-        view_group.setLayout(view_layout)
-        layout.addWidget(QLabel('View Settings'))
-        layout.addWidget(view_group)
-        
-        # Preview settings
-        preview_group = QFrame()
-        preview_layout = QVBoxLayout()
-        
-        self.show_image_preview_check = QCheckBox('Enable Image Preview')
-        self.show_image_preview_check.setChecked(False)
-        preview_layout.addWidget(self.show_image_preview_check)
-        
-        self.show_text_preview_check = QCheckBox('Enable Text File Preview')
-        self.show_text_preview_check.setChecked(False)
-        preview_layout.addWidget(self.show_text_preview_check)
-        
-        preview_group.setLayout(preview_layout)
-        layout.addWidget(QLabel('Preview Settings'))
-        layout.addWidget(preview_group)
-        
-        # Download settings
-        download_group = QFrame()
-        download_layout = QGridLayout()
-        
-        download_layout.addWidget(QLabel('Default Download Path:'), 0, 0)
-        self.download_path_edit = QLineEdit()
-        self.download_path_edit.setText(os.path.join(os.path.expanduser('~'), 'Downloads'))
-        download_layout.addWidget(self.download_path_edit, 0, 1)
-        
-        self.browse_download_path_button = QPushButton('Browse...')
-        self.browse_download_path_button.clicked.connect(self.browse_download_path)
-        download_layout.addWidget(self.browse_download_path_button, 0, 2)
-        
-        download_group.setLayout(download_layout)
-        layout.addWidget(QLabel('Download Settings'))
-        layout.addWidget(download_group)
-        
-        # Buttons
-        button_layout = QHBoxLayout()
-        
-        self.apply_button = QPushButton('Apply')
-        self.apply_button.clicked.connect(self.apply_settings)
-        button_layout.addWidget(self.apply_button)
-        
-        self.ok_button = QPushButton('OK')
-        self.ok_button.clicked.connect(self.accept_settings)
-        button_layout.addWidget(self.ok_button)
-        
-        self.cancel_button = QPushButton('Cancel')
-        self.cancel_button.clicked.connect(self.reject)
-        button_layout.addWidget(self.cancel_button)
-        
-        layout.addLayout(button_layout)
-        self.setLayout(layout)
-        
-    def populate_fonts(self):
-        font_db = QFontDatabase
-        families = font_db.families()
-        self.font_combo.addItems(families)
-        
-        # Try to set current font
-        if self.parent_window:
-            current_font = self.parent_window.custom_font
-            index = self.font_combo.findText(current_font.family())
-            if index >= 0:
-                self.font_combo.setCurrentIndex(index)
-            self.font_size_spin.setValue(current_font.pointSize())
-            
-    def open_font_dialog(self):
-        current_font = QFont(self.font_combo.currentText(), self.font_size_spin.value())
-        font, ok = QFontDialog.getFont(current_font, self)
-        if ok:
-            self.font_combo.setCurrentText(font.family())
-            self.font_size_spin.setValue(font.pointSize())
-            
-    def load_settings(self, settings):
-        if 'font_family' in settings:
-            index = self.font_combo.findText(settings['font_family'])
-            if index >= 0:
-                self.font_combo.setCurrentIndex(index)
-        if 'font_size' in settings:
-            self.font_size_spin.setValue(settings['font_size'])
-        if 'show_tree' in settings:
-            self.show_tree_check.setChecked(settings['show_tree'])
-        if 'show_info' in settings:
-            self.show_info_check.setChecked(settings['show_info'])
-        if 'show_toolbar' in settings:
-            self.show_toolbar_check.setChecked(settings['show_toolbar'])
-        if 'show_statusbar' in settings:
-            self.show_statusbar_check.setChecked(settings['show_statusbar'])
-        if 'show_image_preview' in settings:
-            self.show_image_preview_check.setChecked(settings['show_image_preview'])
-        if 'show_text_preview' in settings:
-            self.show_text_preview_check.setChecked(settings['show_text_preview'])
-        if 'default_download_path' in settings:
-            self.download_path_edit.setText(settings['default_download_path'])
-    
-    def browse_download_path(self):
-        """Browse for download directory"""
-        directory = QFileDialog.getExistingDirectory(
-            self, 
-            'Select Download Directory',
-            self.download_path_edit.text()
-        )
-        if directory:
-            self.download_path_edit.setText(directory)
-            
-    def get_settings(self):
+# The optional asyncio HTTP engine needs httpx; HTTP/2 additionally needs h2
+HTTPX_AVAILABLE = importlib.util.find_spec('httpx') is not None
+HTTP2_AVAILABLE = HTTPX_AVAILABLE and importlib.util.find_spec('h2') is not None
+
+# Parquet catalog export needs pyarrow
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Debian packages built with zstd (Ubuntu's since 21.10) need zstandard to be read
+ZSTD_AVAILABLE = importlib.util.find_spec('zstandard') is not None
+
+# Browser-like headers to avoid being flagged as a bot
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+WEB_EXTENSIONS = {'.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.cgi'}
+
+TEXT_EXTENSIONS = {'.txt', '.py', '.js', '.html', '.htm', '.css', '.json', '.xml', '.yaml', '.yml',
+                   '.md', '.rst', '.log', '.cfg', '.conf', '.ini', '.sh', '.bash', '.bat', '.ps1',
+                   '.c', '.cpp', '.h', '.hpp', '.java', '.php', '.rb', '.go', '.rs', '.swift',
+                   '.sql', '.csv', '.tsv', '.rtf'}
+
+# Server root and column sort links found in Apache autoindex pages
+SKIPPED_LISTING_HREFS = {'/', '?C=N;O=D', '?C=M;O=A', '?C=S;O=A', '?C=D;O=A'}
+
+def create_session(retries=0):
+    """Create a requests session sending the browser-like headers
+
+    With retries, transient connection errors and 429/5xx responses are
+    retried with exponential backoff.
+    """
+    session = requests.Session()
+    session.headers.update(BROWSER_HEADERS)
+    if retries:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=['GET', 'HEAD'])
+        adapter = HTTPAdapter(max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return session
+
+def parse_directory_listing(content, base_url):
+    """Parse an Apache/nginx index page into directory entry dicts"""
+    with perf_recorder.span('listing.parse', url=base_url, bytes=len(content)) as span:
+        # Imported on first use to keep it off the startup path
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+        items = []
+
+        # Find all links in the directory listing
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            text = link.get_text().strip()
+
+            # Skip parent directory link, sorting links, and empty links
+            if href in SKIPPED_LISTING_HREFS or not text:
+                continue
+
+            # Get additional info from the table row
+            row = link.find_parent('tr')
+            size = ""
+            modified = ""
+            if row:
+                cells = row.find_all('td')
+                if len(cells) >= 4:
+                    modified = cells[2].get_text().strip()
+                    size = cells[3].get_text().strip()
+
+            # Determine if it's a directory or web-navigable file
+            is_directory = href.endswith('/') or '[DIR]' in str(row)
+            is_web_file = not is_directory and os.path.splitext(text.lower())[1] in WEB_EXTENSIONS
+
+            is_file = not (is_directory or is_web_file)
+            items.append({
+                'type': 'file' if is_file else 'directory',
+                'href': href,
+                'url': urljoin(base_url, href),
+                'name': text,
+                'size': size if is_file else '',
+                'modified': modified,
+                'is_web_file': is_web_file,
+                # Numeric forms for sorting and rules; listing sizes are rounded
+                'size_bytes': int(parse_size(size)) if is_file and size else None,
+                'mtime': parse_modified(modified),
+            })
+
+        span.set(items=len(items))
+        return items
+
+def parse_size(size_str):
+    """Parse listing sizes like "1.2M", "345K" or "2.1G" into bytes"""
+    if not size_str or size_str == '-':
+        return 0
+
+    size_str = size_str.strip()
+    if size_str[-1].upper() in 'KMGT':
+        multipliers = {'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+        try:
+            return float(size_str[:-1]) * multipliers[size_str[-1].upper()]
+        except:
+            return 0
+    try:
+        return float(size_str)
+    except:
+        return 0
+
+def format_size(size_bytes):
+    """Bytes as a listing-style size like "1.2M", the reverse of parse_size"""
+    if size_bytes < 1024:
+        return str(int(size_bytes))
+    for unit in 'KMGT':
+        size_bytes /= 1024
+        if size_bytes < 1024 or unit == 'T':
+            return f'{size_bytes:.1f}{unit}'
+
+# Apache's numeric dates are split by a regex, the rest go through strptime
+ISO_LISTING_DATE = re.compile(r'(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d)(?::(\d\d))?$')
+LISTING_DATE_FORMATS = ('%d-%b-%Y %H:%M', '%Y-%b-%d %H:%M:%S', '%d-%b-%Y %H:%M:%S')
+
+@functools.lru_cache(maxsize=65536)
+def parse_modified(modified_str):
+    """Parse a listing date into a Unix timestamp, or None
+
+    Index pages carry no time zone, so the date is taken as UTC. Cached,
+    as many entries of a listing usually share a date.
+    """
+    if not modified_str:
+        return None
+    # Imported on first use to keep it off the startup path
+    import calendar
+    match = ISO_LISTING_DATE.match(modified_str)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        return calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second or 0)))
+    for date_format in LISTING_DATE_FORMATS:
+        try:
+            return calendar.timegm(time.strptime(modified_str, date_format))
+        except ValueError:
+            continue
+    return None
+
+def is_text_filename(filename):
+    """Check if a file name has a text file extension"""
+    _, ext = os.path.splitext(filename.lower())
+    return ext in TEXT_EXTENSIONS
+
+# Bytes (decompressed, for compressed files) shown in the text preview;
+# LargeTextView only lays out what is on screen, so this can be large
+TEXT_PREVIEW_LIMIT = 32 * 1024 * 1024
+# Images must be read whole to be shown, so larger ones are not previewed
+IMAGE_PREVIEW_LIMIT = 32 * 1024 * 1024
+
+COMPRESSED_TEXT_SUFFIXES = {'.gz': 'gz', '.xz': 'xz', '.lzma': 'xz', '.bz2': 'bz2'}
+# Compressed text without a text extension inside, as found on package mirrors
+COMPRESSED_TEXT_PREFIXES = ('Packages', 'Sources', 'Contents-', 'Translation-', 'Release',
+                            'changelog', 'ChangeLog', 'NEWS', 'README')
+
+def compressed_text_kind(filename):
+    """Compression ('gz', 'xz' or 'bz2') of a compressed text file such as x.log.gz, else None"""
+    stem, ext = os.path.splitext(filename)
+    compression = COMPRESSED_TEXT_SUFFIXES.get(ext.lower())
+    if compression and (is_text_filename(stem) or os.path.basename(stem).startswith(COMPRESSED_TEXT_PREFIXES)):
+        return compression
+    return None
+
+def new_decompressor(compression):
+    # Imported on first use to keep it off the startup path
+    if compression == 'gz':
+        import zlib
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if compression == 'xz':
+        import lzma
+        return lzma.LZMADecompressor()
+    import bz2
+    return bz2.BZ2Decompressor()
+
+def decompress_prefix(chunks, compression, limit):
+    """First limit decompressed bytes of a compressed stream given as chunks, and whether there was more
+
+    Output is capped per call, so a small chunk that expands enormously
+    costs no more than the limit, and no chunk is read past the one that
+    fills it. Concatenated streams (e.g. multi-member gzip) are followed.
+    """
+    output = bytearray()
+    decompressor = new_decompressor(compression)
+    for chunk in chunks:
+        while chunk:
+            output += decompressor.decompress(chunk, limit - len(output))
+            if len(output) >= limit:
+                return bytes(output), True
+            if not decompressor.eof:
+                # Below the cap, so all of the chunk was consumed
+                break
+            chunk = decompressor.unused_data
+            if chunk.strip(b'\0'):
+                decompressor = new_decompressor(compression)
+            else:
+                # Trailing padding after the last stream
+                return bytes(output), False
+    return bytes(output), False
+
+# Only this much of a body is searched for a <meta charset> or XML declaration
+CHARSET_DECLARATION_WINDOW = 4096
+# Only this much of a body is sampled when the charset has to be guessed
+CHARSET_SAMPLE_SIZE = 64 * 1024
+
+CHARSET_BOMS = ((b'\xef\xbb\xbf', 'utf-8-sig'), (b'\xff\xfe', 'utf-16'), (b'\xfe\xff', 'utf-16'))
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+DECLARED_CHARSET = re.compile(rb'<\?xml[^>]*\sencoding\s*=\s*["\']([\w.:-]+)'
+                              rb'|<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+def lookup_charset(name):
+    """Codec name for a declared charset, or None if Python does not know it"""
+    import codecs
+    try:
+        charset = codecs.lookup(name).name
+    except LookupError:
+        return None
+    # Pages labelled latin-1 or ascii are really windows-1252, as browsers assume
+    return 'cp1252' if charset in ('iso8859-1', 'ascii') else charset
+
+def guess_charset(sample):
+    """Charset of undeclared text from a bounded sample: UTF-8 if it decodes, else a detector's guess"""
+    import codecs
+    try:
+        # final=False tolerates a character cut in half at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return 'cp1252'
+    best = from_bytes(sample).best()
+    return best.encoding if best is not None else 'cp1252'
+
+def detect_charset(content, content_type=None):
+    """Charset of a text body: its BOM, the Content-Type header, a <meta> or XML declaration, then a guess
+
+    Only a bounded prefix is ever looked at, so a multi-MB page without
+    a declared charset costs no more to detect than a small one.
+    """
+    for bom, charset in CHARSET_BOMS:
+        if content.startswith(bom):
+            return charset
+    match = HEADER_CHARSET.search(content_type or '')
+    charset = match and lookup_charset(match.group(1))
+    if charset:
+        return charset
+    match = DECLARED_CHARSET.search(content[:CHARSET_DECLARATION_WINDOW])
+    charset = match and lookup_charset((match.group(1) or match.group(2)).decode('ascii'))
+    # A page that declares UTF-16 in ASCII bytes cannot really be UTF-16
+    if charset and not charset.startswith('utf-16'):
+        return charset
+    return guess_charset(content[:CHARSET_SAMPLE_SIZE])
+
+def decode_text(content, charset):
+    """Decode content as charset, replacing bytes that are not valid in it"""
+    return str(content, charset, 'replace')
+
+class TextDecoder:
+    """Decodes a body fed in chunks, as they arrive
+
+    The charset is detected once the first CHARSET_SAMPLE_SIZE bytes are
+    in (or at the end of a shorter body); from then on every chunk is
+    decoded by an incremental decoder, so decoding keeps pace with the
+    transfer instead of starting on the whole body once it is complete.
+    """
+
+    def __init__(self, content_type=None):
+        self.content_type = content_type
+        self.charset = None
+        self.decoder = None
+        self.head = bytearray()
+        self.parts = []
+        self.size = 0
+
+    def feed(self, data):
+        self.size += len(data)
+        if self.decoder is None:
+            self.head += data
+            if len(self.head) >= CHARSET_SAMPLE_SIZE:
+                self.start()
+        elif data:
+            self.parts.append(self.decoder.decode(data))
+
+    def start(self):
+        import codecs
+        head, self.head = bytes(self.head), None
+        self.charset = detect_charset(head, self.content_type)
+        self.decoder = codecs.getincrementaldecoder(self.charset)('replace')
+        self.parts.append(self.decoder.decode(head))
+
+    def finish(self):
+        """All of the text; a character cut short at the end is replaced"""
+        if self.decoder is None:
+            self.start()
+        self.parts.append(self.decoder.decode(b'', True))
+        text = ''.join(self.parts)
+        self.parts = [text]
+        return text
+
+def response_text(response):
+    """Text of a requests (or engine) response, decoded with detect_charset"""
+    content = response.content
+    return decode_text(content, detect_charset(content, response.headers.get('Content-Type')))
+
+class RateLimiter:
+    """Thread-safe token bucket limiting throughput in bytes per second"""
+
+    def __init__(self, bytes_per_second=0):
+        self.rate = bytes_per_second
+        self.allowance = bytes_per_second
+        self.last_check = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """Block until amount bytes may be transferred (no-op when unlimited)"""
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    def reserve(self, amount):
+        """Take amount from the bucket; returns the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last_check) * self.rate)
+            self.last_check = now
+            self.allowance -= amount
+            return -self.allowance / self.rate if self.allowance < 0 else 0
+
+class PerfSpan:
+    """Times one phase and hands the result to the recorder on exit"""
+    __slots__ = ('recorder', 'name', 'args', 'start')
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **args):
+        """Attach details only known once the phase has run (e.g. sizes)"""
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.recorder.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+class NullSpan:
+    """Shared do-nothing span returned while recording is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def set(self, **args):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class PerfHistogram:
+    """Duration histogram with fixed millisecond buckets and recent samples"""
+    BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.recent = deque(maxlen=1000)
+
+    def add(self, duration_ms):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total += duration_ms
+        self.min = duration_ms if self.min is None else min(self.min, duration_ms)
+        self.max = max(self.max, duration_ms)
+        self.recent.append(duration_ms)
+
+    def percentile(self, fraction):
+        """Percentile over the most recent samples"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
         return {
-            'font_family': self.font_combo.currentText(),
-            'font_size': self.font_size_spin.value(),
-            'show_tree': self.show_tree_check.isChecked(),
-            'show_info': self.show_info_check.isChecked(),
-            'show_toolbar': self.show_toolbar_check.isChecked(),
-            'show_statusbar': self.show_statusbar_check.isChecked(),
-            'show_image_preview': self.show_image_preview_check.isChecked(),
-            'show_text_preview': self.show_text_preview_check.isChecked(),
-            'default_download_path': self.download_path_edit.text()
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'min_ms': round(self.min or 0.0, 3),
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'max_ms': round(self.max, 3),
+            'buckets': {f"<={bound}ms": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+                       | {f">{self.BUCKETS_MS[-1]}ms": self.counts[-1]},
         }
-        
-    def apply_settings(self):
-        if self.parent_window:
-            self.parent_window.apply_settings(self.get_settings())
-            
-    def accept_settings(self):
+
+class PerfRecorder:
+    """Thread-safe timing spans aggregated into per-name histograms
+
+    Spans are cheap no-ops while disabled:
+
+        with perf_recorder.span('listing.parse', url=url):
+            ...
+
+    Recent spans are kept as events for the Chrome trace export.
+    """
+
+    def __init__(self, max_events=20000):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return PerfSpan(self, name, args)
+
+    def record(self, name, start, duration, args=None):
+        """Record a finished span; start is a perf_counter() value in seconds"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = PerfHistogram()
+            histogram.add(duration * 1000)
+            self.events.append((name, start, duration, thread.ident, args or {}))
+            self.thread_names[thread.ident] = thread.name
+
+    def response_hook(self, response, *args, **kwargs):
+        """requests response hook: time from sending the request to parsed headers
+
+        requests does not expose DNS, connect and TLS separately, so this
+        span covers all of them plus the server's time to first byte.
+        """
+        if self.enabled:
+            elapsed = response.elapsed.total_seconds()
+            self.record('http.headers', time.perf_counter() - elapsed, elapsed,
+                        {'url': response.url, 'status': response.status_code})
+        return response
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.events.clear()
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def to_json(self):
+        with self.lock:
+            events = list(self.events)
+        return {
+            'spans': self.summary(),
+            'events': [{'name': name, 'start': round(start - STARTUP_STARTED, 6),
+                        'duration_ms': round(duration * 1000, 3), 'thread': thread_id, 'args': args}
+                       for name, start, duration, thread_id, args in events],
+        }
+
+    def to_chrome_trace(self):
+        """Events in the Chrome trace format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                         'args': {'name': thread_name}}
+                        for thread_id, thread_name in thread_names.items()]
+        for name, start, duration, thread_id, args in events:
+            trace_events.append({
+                'name': name,
+                'cat': name.split('.')[0],
+                'ph': 'X',
+                'ts': round((start - STARTUP_STARTED) * 1e6, 1),
+                'dur': round(duration * 1e6, 1),
+                'pid': pid,
+                'tid': thread_id,
+                'args': {key: str(value) for key, value in args.items()},
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+# Shared by the window and the worker threads
+perf_recorder = PerfRecorder()
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread"""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self.stop_event = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler = threading.Thread(target=self.run, name='SamplingProfiler', daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.sampler.join()
+        self.finished = time.perf_counter()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self.frame_index.get(key)
+                if index is None:
+                    index = self.frame_index[key] = len(self.frames)
+                    self.frames.append({'name': code.co_name, 'file': code.co_filename,
+                                        'line': code.co_firstlineno})
+                stack.append(index)
+                frame = frame.f_back
+            stack.reverse()
+            # Weigh by the real gap, which grows while the sampled thread holds the GIL
+            self.samples.append(stack)
+            self.weights.append((now - last) * 1000)
+            last = now
+
+    def to_speedscope(self, name):
+        """Samples in the speedscope file format (https://www.speedscope.app)"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': (self.finished - self.started) * 1000,
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': 'WebCrawler',
+        }
+
+class RuntimeProfiler:
+    """Profiles the GUI thread for a window of activity
+
+    In 'cprofile' mode a .pstats file is written, in 'sampling' mode a
+    .speedscope.json file. arm(name) profiles the next call of a method
+    decorated with @profiled(name) only.
+    """
+    MODES = ['cprofile', 'sampling']
+
+    def __init__(self, output_dir, mode='cprofile'):
+        self.output_dir = output_dir
+        self.mode = mode
+        self.armed = None
+        self.label = None
+        self.profiler = None
+
+    @property
+    def running(self):
+        return self.profiler is not None
+
+    def arm(self, name):
+        self.armed = name
+
+    def start(self, label='session'):
+        if self.running:
+            return False
+        self.label = label
+        if self.mode == 'sampling':
+            self.profiler = SamplingProfiler(threading.main_thread().ident)
+            self.profiler.start()
+        else:
+            # Imported on first use to keep it off the startup path
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return True
+
+    def stop(self):
+        """Stop profiling and return the path of the written file
+
+        Profiling always stops; an OSError from writing the file is raised afterwards.
+        """
+        if not self.running:
+            return None
+        profiler, self.profiler = self.profiler, None
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+        else:
+            profiler.disable()
+        os.makedirs(self.output_dir, exist_ok=True)
+        basename = os.path.join(self.output_dir, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}")
+        if isinstance(profiler, SamplingProfiler):
+            filepath = basename + '.speedscope.json'
+            with open(filepath, 'w') as f:
+                json.dump(profiler.to_speedscope(self.label), f)
+        else:
+            filepath = basename + '.pstats'
+            profiler.dump_stats(filepath)
+        return filepath
+
+def profiled(name):
+    """Profile one call of a WebCrawler method when the profiler is armed for it"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if profiler.armed != name or profiler.running:
+                return method(self, *args, **kwargs)
+            profiler.armed = None
+            profiler.start(name)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                # Never lets a failed write replace the call's own result or exception
+                self.finish_profile()
+        return wrapper
+    return decorate
+
+class StallDetector:
+    """Logs the GUI thread's stack whenever the event loop is blocked too long
+
+    A QTimer on the GUI thread records heartbeats; a watchdog thread
+    notices when they stop and dumps the GUI thread's current stack.
+    """
+
+    def __init__(self, threshold_ms=200, log_path=None):
+        self.threshold = threshold_ms / 1000
+        self.log_path = log_path
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stall_reported = False
+        self.stalls = 0
+        self.stop_event = threading.Event()
+
+        self.heartbeat = QTimer()
+        self.heartbeat.timeout.connect(self.beat)
+        self.watchdog = threading.Thread(target=self.watch, name='StallDetector', daemon=True)
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.heartbeat.start(max(10, int(self.threshold * 250)))
+        self.watchdog.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self.stop_event.set()
+        self.watchdog.join()
+
+    def beat(self):
+        now = time.monotonic()
+        if self.stall_reported:
+            self.log(f"GUI thread resumed after {(now - self.last_beat) * 1000:.0f} ms")
+            self.stall_reported = False
+        self.last_beat = now
+
+    def watch(self):
+        # Check often enough to catch the stack while the stall is still going
+        while not self.stop_event.wait(self.threshold / 4):
+            blocked = time.monotonic() - self.last_beat
+            if blocked < self.threshold or self.stall_reported:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            self.stall_reported = True
+            self.stalls += 1
+            stack = ''.join(traceback.format_stack(frame))
+            self.log(f"GUI thread blocked for {blocked * 1000:.0f} ms at:\n{stack}")
+
+    def log(self, message):
+        message = f"[{time.strftime('%H:%M:%S')}] {message}"
+        print(message, file=sys.stderr)
+        if self.log_path:
+            try:
+                with open(self.log_path, 'a') as f:
+                    f.write(message + '\n')
+            except OSError as e:
+                print(f"Error writing stall log: {e}")
+
+class MetricFamily:
+    """One named metric with a value per label combination"""
+
+    def __init__(self, registry, kind, name, help_text, labels=()):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        # Unlabelled counters and gauges start at zero so they are always exported
+        self.values = {} if self.labels or kind == 'histogram' else {(): 0}
+
+    def key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+class Counter(MetricFamily):
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(MetricFamily):
+    def set(self, value, **labels):
+        with self.registry.lock:
+            self.values[self.key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(MetricFamily):
+    BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * len(self.BUCKETS), 'count': 0, 'sum': 0.0}
+            index = bisect.bisect_left(self.BUCKETS, value)
+            if index < len(self.BUCKETS):
+                state['buckets'][index] += 1
+            state['count'] += 1
+            state['sum'] += value
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_metric_number(value):
+    """A number as the exposition format writes it: 1.0, 0.005, +Inf, NaN; integers unchanged"""
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    # repr is the shortest form that reads back exactly, always with a '.' or exponent
+    return repr(float(value))
+
+class MetricsRegistry:
+    """Counters, gauges and histograms exposed as OpenMetrics text or JSON"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = OrderedDict()
+        self.started = time.time()
+
+    def register(self, family):
+        self.families[family.name] = family
+        return family
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(self, 'counter', name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(self, 'gauge', name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=()):
+        return self.register(Histogram(self, 'histogram', name, help_text, labels))
+
+    def snapshot(self):
+        """Consistent copy of every family's values"""
+        with self.lock:
+            snapshot = []
+            for family in self.families.values():
+                if family.kind == 'histogram':
+                    values = {key: dict(state, buckets=list(state['buckets'])) for key, state in family.values.items()}
+                else:
+                    values = dict(family.values)
+                snapshot.append((family, values))
+            return snapshot
+
+    @staticmethod
+    def format_labels(names, values, extra=None):
+        pairs = list(zip(names, values)) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + '}'
+
+    def render_openmetrics(self):
+        """Text exposition format understood by Prometheus"""
+        lines = []
+        for family, values in self.snapshot():
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.append(f"# HELP {family.name} {family.help}")
+            for key, value in sorted(values.items()):
+                if family.kind == 'counter':
+                    lines.append(f"{family.name}_total{self.format_labels(family.labels, key)} "
+                                 f"{format_metric_number(value)}")
+                elif family.kind == 'gauge':
+                    lines.append(f"{family.name}{self.format_labels(family.labels, key)} "
+                                 f"{format_metric_number(value)}")
+                else:
+                    cumulative = 0
+                    for bound, count in zip(Histogram.BUCKETS, value['buckets']):
+                        cumulative += count
+                        labels = self.format_labels(family.labels, key, ('le', format_metric_number(float(bound))))
+                        lines.append(f"{family.name}_bucket{labels} {cumulative}")
+                    labels = self.format_labels(family.labels, key, ('le', format_metric_number(float('inf'))))
+                    lines.append(f"{family.name}_bucket{labels} {value['count']}")
+                    lines.append(f"{family.name}_count{self.format_labels(family.labels, key)} {value['count']}")
+                    lines.append(f"{family.name}_sum{self.format_labels(family.labels, key)} "
+                                 f"{format_metric_number(value['sum'])}")
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        metrics = {}
+        for family, values in self.snapshot():
+            metrics[family.name] = {
+                'type': family.kind,
+                'help': family.help,
+                'values': [dict(zip(family.labels, key), value=value) for key, value in sorted(values.items())],
+            }
+        return {'timestamp': time.time(), 'uptime': time.time() - self.started, 'metrics': metrics}
+
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.counter('webcrawler_http_requests', 'HTTP responses received', ['kind', 'status'])
+HTTP_ERRORS = metrics.counter('webcrawler_http_errors', 'Failed requests by exception type', ['kind', 'error'])
+HTTP_RETRIES = metrics.counter('webcrawler_http_retries', 'Requests retried by the HTTP client', ['kind'])
+HTTP_LATENCY = metrics.histogram('webcrawler_http_latency_seconds', 'Time from sending a request to its response headers', ['kind'])
+HTTP_BYTES = metrics.counter('webcrawler_http_bytes', 'Response body bytes received', ['kind'])
+LISTING_CACHE_LOOKUPS = metrics.counter('webcrawler_listing_cache_lookups', 'Listing cache lookups', ['result'])
+LISTING_CACHE_ENTRIES = metrics.gauge('webcrawler_listing_cache_entries', 'Listings held in the cache')
+PAGE_CACHE_LOOKUPS = metrics.counter('webcrawler_page_cache_lookups', 'Back/forward page cache lookups', ['result'])
+PAGE_CACHE_BYTES = metrics.gauge('webcrawler_page_cache_bytes', 'Estimated size of the back/forward page cache')
+CRAWL_DIRECTORIES = metrics.counter('webcrawler_crawl_directories', 'Directory listings crawled')
+CRAWL_QUEUE = metrics.gauge('webcrawler_crawl_queue_depth', 'Directories waiting to be crawled')
+DOWNLOADS = metrics.counter('webcrawler_downloads', 'Finished downloads', ['result'])
+DOWNLOAD_QUEUE = metrics.gauge('webcrawler_download_queue_depth', 'Files waiting to be downloaded')
+WATCH_POLLS = metrics.counter('webcrawler_watch_polls', 'Watched directory polls', ['result'])
+DOWNLOADS_ACTIVE = metrics.gauge('webcrawler_downloads_active', 'Downloads in progress')
+
+def metrics_response_hook(kind):
+    """requests response hook counting responses, latency, retries and bytes"""
+    def hook(response, *args, **kwargs):
+        HTTP_REQUESTS.inc(kind=kind, status=response.status_code)
+        HTTP_LATENCY.observe(response.elapsed.total_seconds(), kind=kind)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            HTTP_RETRIES.inc(len(retries.history), kind=kind)
+        # Streamed bodies (downloads) are counted as they are read. Others are
+        # read here, which requests would do next anyway, and counted as
+        # received on the wire: chunked bodies have no Content-Length, and
+        # compressed ones are longer once decoded
+        if not kwargs.get('stream'):
+            content = response.content
+            HTTP_BYTES.inc(response.raw.tell() or len(content), kind=kind)
+        return response
+    return hook
+
+METRICS_HOOKS = {kind: metrics_response_hook(kind)
+                 for kind in ['listing', 'tree', 'crawl', 'preview', 'index', 'download', 'watch', 'head', 'range']}
+
+def request_hooks(kind):
+    """Response hooks for a request of the given kind: metrics, plus timings when recording"""
+    hooks = [METRICS_HOOKS[kind]]
+    if perf_recorder.enabled:
+        # Before the metrics hook, which reads the body
+        hooks.insert(0, perf_recorder.response_hook)
+    return {'response': hooks}
+
+class MetricsServer:
+    """Serves /metrics (OpenMetrics) and /metrics.json on a local port"""
+
+    def __init__(self, registry, port, host='127.0.0.1'):
+        # Imported on first use to keep it off the startup path
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                path = handler.path.split('?')[0]
+                if path == '/metrics':
+                    body = registry.render_openmetrics().encode('utf-8')
+                    content_type = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(registry.to_json()).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header('Content-Type', content_type)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='MetricsServer', daemon=True)
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class MetricsDumper:
+    """Periodically writes the registry as JSON, replacing the file atomically"""
+
+    def __init__(self, registry, filepath, interval=10):
+        self.registry = registry
+        self.filepath = filepath
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='MetricsDumper', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        temp_path = self.filepath + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(self.registry.to_json(), f, indent=2)
+            os.replace(temp_path, self.filepath)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def stop(self):
+        """Stop and write a final dump"""
+        self.stop_event.set()
+        self.thread.join()
+        self.dump()
+
+class EngineResponse:
+    """The parts of requests.Response used by the fetch paths, for an httpx response"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = requests.structures.CaseInsensitiveDict(response.headers)
+        self.content = response.content
+        self.url = str(response.url)
+        self.elapsed = response.elapsed
+        self.encoding = response.encoding
+        self.http_version = response.http_version
+
+    @property
+    def text(self):
+        return response_text(self)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+class EngineStream:
+    """A response of the asyncio engine whose body a worker thread reads chunk by chunk
+
+    Each chunk is awaited on the engine's loop, so the transfer shares the
+    engine's pooled connections while the thread does the CPU work.
+    Closing before the end drops the connection, as with requests.
+    """
+
+    def __init__(self, engine, url, headers=None, kind='preview'):
+        self.engine = engine
+        self.response = engine.submit(engine.open_stream(url, headers, kind)).result()
+        self.status_code = self.response.status_code
+        self.headers = requests.structures.CaseInsensitiveDict(self.response.headers)
+        self.url = str(self.response.url)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def iter_raw(self, chunk_size):
+        """The body as sent, with any Content-Encoding left in place"""
+        import httpx
+        chunks = self.response.aiter_raw(chunk_size)
+
+        async def next_chunk():
+            try:
+                return await chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+            except httpx.HTTPError as e:
+                raise self.engine.translate_error(e) from e
+        while True:
+            chunk = self.engine.submit(next_chunk()).result()
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        self.engine.submit(self.response.aclose()).result()
+
+class AsyncHttpEngine:
+    """One asyncio event loop thread running every request through a shared httpx client
+
+    Coroutines are scheduled with submit(), which returns a
+    concurrent.futures.Future. It serves the window's listings and
+    previews, crawls, downloads, tree and watch fetches and HEAD
+    enrichment, never a blocking call on the GUI thread. Connections are
+    pooled (and multiplexed over HTTP/2 when h2 is installed and the
+    server offers it). httpx errors are raised as the matching requests
+    exceptions, so callers keep one set of except clauses.
+    """
+
+    def __init__(self, max_connections=32, http2=True):
+        # Over HTTP/1.1 a larger pool costs more client CPU per request than
+        # it gains in parallelism; extra requests queue for a free connection
+        self.max_connections = max_connections
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.loop = None
+        self.client = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='AsyncHttpEngine', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def run(self):
+        # Imported on first use to keep them off the startup path
+        import asyncio
+        import httpx
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        self.client = httpx.AsyncClient(http2=self.http2, headers=BROWSER_HEADERS, limits=limits,
+                                        timeout=10, follow_redirects=True)
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+    def stop(self):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the engine's loop from any thread"""
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def translate_error(self, error):
+        import httpx
+        if isinstance(error, httpx.TimeoutException):
+            return requests.Timeout(str(error))
+        return requests.ConnectionError(str(error))
+
+    async def fetch(self, url, headers=None, kind='listing'):
+        import httpx
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            raise self.translate_error(e) from e
+        HTTP_REQUESTS.inc(kind=kind, status=response.status_code)
+        HTTP_LATENCY.observe(response.elapsed.total_seconds(), kind=kind)
+        HTTP_BYTES.inc(response.num_bytes_downloaded, kind=kind)
+        return EngineResponse(response)
+
+    async def open_stream(self, url, headers=None, kind='preview'):
+        """Send a GET and return the httpx response with its body not read yet; see EngineStream"""
+        import httpx
+        started = time.perf_counter()
+        try:
+            response = await self.client.send(self.client.build_request('GET', url, headers=headers), stream=True)
+        except httpx.HTTPError as e:
+            raise self.translate_error(e) from e
+        HTTP_REQUESTS.inc(kind=kind, status=response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - started, kind=kind)
+        return response
+
+    async def head(self, url, headers=None, kind='head'):
+        import httpx
+        try:
+            response = await self.client.head(url, headers=headers)
+        except httpx.HTTPError as e:
+            raise self.translate_error(e) from e
+        HTTP_REQUESTS.inc(kind=kind, status=response.status_code)
+        HTTP_LATENCY.observe(response.elapsed.total_seconds(), kind=kind)
+        return EngineResponse(response)
+
+    async def fetch_listing(self, url, headers=None, kind='crawl'):
+        """Fetch and parse a listing; items is None when the server answered 304"""
+        import asyncio
+        response = await self.fetch(url, headers, kind)
+        if response.status_code == 304:
+            return None, response.headers
+        response.raise_for_status()
+        # Parsing is CPU bound, so keep it off the loop that drives the transfers
+        items = await asyncio.get_running_loop().run_in_executor(
+            None, parse_directory_listing, response.content, url)
+        return items, response.headers
+
+    async def download(self, url, filepath, progress_callback=None, chunk_size=65536, fsync_policy='never'):
+        """Stream url into filepath, calling progress_callback(downloaded, total)
+
+        The file is opened, written, synced and closed in executor threads,
+        so a slow disk holds up this download only, not every request on
+        the loop. One write is in flight while the next chunk is received.
+        """
+        import asyncio
+        import httpx
+        DOWNLOADS_ACTIVE.inc()
+        try:
+            started = time.perf_counter()
+            async with self.client.stream('GET', url) as response:
+                # response.elapsed is only known once the body has been read
+                HTTP_REQUESTS.inc(kind='download', status=response.status_code)
+                HTTP_LATENCY.observe(time.perf_counter() - started, kind='download')
+                if response.status_code >= 400:
+                    raise requests.HTTPError(f"{response.status_code} Error for url: {url}")
+                encoded = response.headers.get('content-encoding', 'identity').lower() not in ('', 'identity')
+                # Content-Length of an encoded body counts the bytes before decoding
+                total_size = 0 if encoded else int(response.headers.get('content-length', 0))
+                loop = asyncio.get_running_loop()
+                output = await loop.run_in_executor(None, DownloadFile, filepath, total_size, fsync_policy)
+                writing = None
+                received = 0
+                try:
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        if writing is not None:
+                            await writing
+                        writing = loop.run_in_executor(None, output.write, chunk)
+                        received += len(chunk)
+                        HTTP_BYTES.inc(len(chunk), kind='download')
+                        if progress_callback and total_size > 0:
+                            progress_callback(received, total_size)
+                    if writing is not None:
+                        await writing
+                finally:
+                    # The file must not be closed under a write still running
+                    if writing is not None:
+                        await asyncio.wait([writing])
+                    await loop.run_in_executor(None, output.close)
+            return output.written
+        except httpx.HTTPError as e:
+            raise self.translate_error(e) from e
+        finally:
+            DOWNLOADS_ACTIVE.dec()
+
+def url_digest(url):
+    """64-bit hash of a URL, for visited sets that don't keep the URL itself"""
+    # Imported on first use to keep it off the startup path
+    import hashlib
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class HashedUrlSet:
+    """Visited set keeping 64-bit URL hashes instead of the URLs
+
+    Collisions are possible but negligible below billions of URLs.
+    """
+
+    def __init__(self):
+        self.hashes = set()
+
+    def add(self, url):
+        self.hashes.add(url_digest(url))
+
+    def __contains__(self, url):
+        return url_digest(url) in self.hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+class BloomFilter:
+    """Fixed-size visited set; false positives make a crawl skip a few directories"""
+
+    def __init__(self, capacity=10000000, error_rate=0.001):
+        # Imported on first use to keep it off the startup path
+        import math
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, url):
+        import hashlib
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing gives hash_count independent enough positions
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, url):
+        for position in self.positions(url):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, url):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(url))
+
+    def __len__(self):
+        return self.count
+
+VISITED_SET_TYPES = {'exact': set, 'hashed': HashedUrlSet, 'bloom': BloomFilter}
+
+class CrawlCheckpoint:
+    """Append-only log of a crawl's frontier, finished directories and validators
+
+    Each line is a JSON record:
+        {"op": "start", ...}                     a new crawl of start_url
+        ["q", url, depth]                        directory queued
+        ["d", url, depth, etag, last_modified, [subdirectory urls]]
+        ["v", url, depth, etag, last_modified, [subdirectory urls]]
+                                                 validators from an earlier crawl
+    Replaying the log restores the state exactly. Queued directories that
+    were never finished are the frontier of an interrupted crawl. The log
+    is rewritten when it grows well past the live state.
+    """
+
+    def __init__(self, filepath, flush_interval=5.0, compact_ratio=4, revalidate=True):
+        self.filepath = filepath
+        self.flush_interval = flush_interval
+        self.compact_ratio = compact_ratio
+        # Send the previous crawl's validators so unchanged directories answer 304
+        self.revalidate = revalidate
+        self.header = None
+        self.pending = OrderedDict()  # url -> depth, queued but not finished
+        self.finished = {}  # url -> (depth, etag, last_modified, children) of this crawl
+        self.previous = {}  # the same for directories only seen by earlier crawls
+        self.records = 0
+        self.file = None
+        # Records reach the file only in flush(), after the sinks saved their data
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.filepath):
+            return
+        with open(self.filepath, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; everything before it is intact
+                    break
+                self.apply(record)
+                self.records += 1
+
+    def apply(self, record):
+        if isinstance(record, dict):
+            self.header = record
+            # The last crawl completed; revalidate against what it learned
+            if self.finished:
+                self.previous = self.finished
+            self.finished = {}
+            self.pending.clear()
+        elif record[0] == 'q':
+            self.pending[record[1]] = record[2]
+        elif record[0] == 'd':
+            self.pending.pop(record[1], None)
+            self.finished[record[1]] = tuple(record[2:])
+        elif record[0] == 'v':
+            self.previous[record[1]] = tuple(record[2:])
+
+    @property
+    def resumable(self):
+        return bool(self.pending)
+
+    def begin(self, start_url, max_depth, resume=True):
+        """Return the frontier: the interrupted crawl's queue, or start_url for a new crawl"""
+        if self.header and self.header.get('url') != start_url:
+            raise ValueError(f"Checkpoint {self.filepath} belongs to a crawl of {self.header.get('url')}")
+        self.file = open(self.filepath, 'a', encoding='utf-8')
+        if self.pending and resume:
+            return list(self.pending.items())
+        self.write({'op': 'start', 'url': start_url, 'max_depth': max_depth, 'started': time.time()})
+        self.queued(start_url, 0)
+        self.flush()
+        return [(start_url, 0)]
+
+    def write(self, record):
+        self.apply(record)
+        self.buffer.append(json.dumps(record) + '\n')
+        self.records += 1
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= self.flush_interval
+
+    def queued(self, url, depth):
+        self.write(['q', url, depth])
+
+    def done(self, url, depth, etag, last_modified, children):
+        self.write(['d', url, depth, etag, last_modified, children])
+
+    def visited_urls(self):
+        """Directories this crawl has already queued or finished"""
+        return list(self.finished) + list(self.pending)
+
+    def validators(self, url):
+        """Conditional request headers from the last crawl that finished url"""
+        entry = self.previous.get(url) if self.revalidate else None
+        headers = {}
+        if entry:
+            if entry[1]:
+                headers['If-None-Match'] = entry[1]
+            if entry[2]:
+                headers['If-Modified-Since'] = entry[2]
+        return headers
+
+    def flush(self):
+        if self.file is None:
+            return
+        self.file.write(''.join(self.buffer))
+        self.buffer = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+        live = 1 + len(self.previous) + len(self.finished) + len(self.pending)
+        if self.records > 10000 and self.records > live * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log as just the live state, atomically"""
+        records = [self.header]
+        records.extend(['v', url, *entry] for url, entry in self.previous.items())
+        records.extend(['d', url, *entry] for url, entry in self.finished.items())
+        records.extend(['q', url, depth] for url, depth in self.pending.items())
+        temp_path = self.filepath + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.file.close()
+        os.replace(temp_path, self.filepath)
+        self.file = open(self.filepath, 'a', encoding='utf-8')
+        self.records = len(records)
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+class DirectoryCrawler:
+    """Breadth-first walk of the index pages below a start URL
+
+    Every listing is handed to the registered sinks: objects with an
+    on_directory(url, items) method and optional flush() and close()
+    methods.
+    With an AsyncHttpEngine, up to `concurrency` listings are fetched at
+    once; sinks are still called one at a time on the crawling thread.
+    With a CrawlCheckpoint an interrupted crawl continues where it
+    stopped, and directories that answer 304 to the last crawl's
+    validators are not passed to the sinks again.
+    """
+
+    def __init__(self, start_url, session=None, max_depth=None, engine=None, concurrency=16,
+                 checkpoint=None, visited=None, resume=True):
+        self.start_url = start_url
+        self.session = session or create_session()
+        self.max_depth = max_depth
+        self.engine = engine
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.resume = resume
+        # Anything with add() and `in`: a set, HashedUrlSet or BloomFilter
+        self.visited = visited if visited is not None else set()
+        self.sinks = []
+        self.stop_requested = False
+        self.directories_crawled = 0
+        self.unchanged = 0
+        self.errors = []
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def stop(self):
+        self.stop_requested = True
+
+    def fetch_listing(self, url, headers=None):
+        """Return (items, headers); items is None when the server answered 304"""
+        with perf_recorder.span('crawl.fetch', url=url):
+            response = self.session.get(url, headers=headers, timeout=10, hooks=request_hooks('crawl'))
+        if response.status_code == 304:
+            return None, response.headers
+        response.raise_for_status()
+        return parse_directory_listing(response.content, url), response.headers
+
+    def request_headers(self, url):
+        return self.checkpoint.validators(url) if self.checkpoint else None
+
+    def crawl(self, progress_callback=None):
+        """Walk the tree, calling progress_callback(directories, queued, url) per listing"""
+        try:
+            if self.checkpoint:
+                frontier = deque(self.checkpoint.begin(self.start_url, self.max_depth, self.resume))
+                for url in self.checkpoint.visited_urls():
+                    self.visited.add(url)
+            else:
+                frontier = deque([(self.start_url, 0)])
+                self.visited.add(self.start_url)
+
+            if self.engine is not None:
+                self.crawl_concurrently(frontier, progress_callback)
+                return
+            while frontier and not self.stop_requested:
+                url, depth = frontier.popleft()
+                try:
+                    items, headers = self.fetch_listing(url, self.request_headers(url))
+                except requests.RequestException as e:
+                    self.errors.append((url, str(e)))
+                    HTTP_ERRORS.inc(kind='crawl', error=type(e).__name__)
+                    continue
+
+                self.process_listing(url, depth, items, headers, frontier)
+                CRAWL_QUEUE.set(len(frontier))
+                if progress_callback:
+                    progress_callback(self.directories_crawled, len(frontier), url)
+        finally:
+            CRAWL_QUEUE.set(0)
+            for sink in self.sinks:
+                if hasattr(sink, 'close'):
+                    sink.close()
+            if self.checkpoint:
+                self.checkpoint.close()
+
+    def crawl_concurrently(self, frontier, progress_callback):
+        """Keep up to `concurrency` listing fetches in flight on the engine"""
+        # Imported on first use to keep it off the startup path
+        from concurrent.futures import wait, FIRST_COMPLETED
+        pending = {}
+        try:
+            while (frontier or pending) and not self.stop_requested:
+                while frontier and len(pending) < self.concurrency:
+                    url, depth = frontier.popleft()
+                    future = self.engine.submit(
+                        self.engine.fetch_listing(url, self.request_headers(url), kind='crawl'))
+                    pending[future] = (url, depth)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    try:
+                        items, headers = future.result()
+                    except requests.RequestException as e:
+                        self.errors.append((url, str(e)))
+                        HTTP_ERRORS.inc(kind='crawl', error=type(e).__name__)
+                        continue
+
+                    self.process_listing(url, depth, items, headers, frontier)
+                    CRAWL_QUEUE.set(len(frontier) + len(pending))
+                    if progress_callback:
+                        progress_callback(self.directories_crawled, len(frontier) + len(pending), url)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def process_listing(self, url, depth, items, headers, frontier):
+        """Hand a listing to the sinks and queue its subdirectories"""
+        if items is None:
+            # Unchanged since the last crawl: skip the sinks, but still walk its subdirectories
+            _, etag, last_modified, children = self.checkpoint.previous[url]
+            self.unchanged += 1
+        else:
+            for sink in self.sinks:
+                sink.on_directory(url, items)
+            # Stay below the start URL, which also skips the parent link
+            children = [item['url'] for item in items
+                        if item['type'] == 'directory' and not item['is_web_file']
+                        and item['url'].startswith(self.start_url)]
+            etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        self.directories_crawled += 1
+        CRAWL_DIRECTORIES.inc()
+
+        if self.max_depth is None or depth < self.max_depth:
+            for child_url in children:
+                if child_url not in self.visited:
+                    self.visited.add(child_url)
+                    frontier.append((child_url, depth + 1))
+                    if self.checkpoint:
+                        self.checkpoint.queued(child_url, depth + 1)
+        # Logged after the subdirectories, so a resumed crawl never loses them
+        if self.checkpoint:
+            self.checkpoint.done(url, depth, etag, last_modified, children)
+            if self.checkpoint.flush_due():
+                # Sinks save first, so no finished directory is missing from their output
+                for sink in self.sinks:
+                    if hasattr(sink, 'flush'):
+                        sink.flush()
+                self.checkpoint.flush()
+
+class CrawlThread(QThread):
+    progress = pyqtSignal(int, int, str)  # directories_crawled, queued, current_url
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, crawler):
+        super().__init__()
+        self.crawler = crawler
+
+    def run(self):
+        try:
+            self.crawler.crawl(self.progress.emit)
+            message = f"Crawled {self.crawler.directories_crawled} directories"
+            if self.crawler.unchanged:
+                message += f", {self.crawler.unchanged} unchanged"
+            if self.crawler.errors:
+                message += f" ({len(self.crawler.errors)} failed)"
+            if self.crawler.stop_requested:
+                message += " - stopped, can be resumed" if self.crawler.checkpoint else " - stopped"
+            self.finished.emit(True, message)
+        except Exception as e:
+            self.finished.emit(False, f"Crawl failed: {str(e)}")
+
+class ListingCache:
+    """Bounded LRU cache of parsed directory listings and their validators"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        """Return the cached entry dict for url, or None"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                self.misses += 1
+                LISTING_CACHE_LOOKUPS.inc(result='miss')
+                return None
+            self.entries.move_to_end(url)
+            self.hits += 1
+            LISTING_CACHE_LOOKUPS.inc(result='hit')
+            return entry
+
+    def put(self, url, items, headers=None):
+        headers = headers or {}
+        entry = {
+            'items': items,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time()
+        }
+        with self.lock:
+            self.entries[url] = entry
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            LISTING_CACHE_ENTRIES.set(len(self.entries))
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            LISTING_CACHE_ENTRIES.set(0)
+
+def estimate_items_size(items, sample=32):
+    """Rough memory use of a list of entry dicts, from a sample of them"""
+    if not items:
+        return 0
+    step = max(1, len(items) // sample)
+    sampled = items[::step]
+    total = sum(sys.getsizeof(item) + sum(sys.getsizeof(value) for value in item.values()) for item in sampled)
+    return sys.getsizeof(items) + total * len(items) // len(sampled)
+
+class PageCache:
+    """Page states for back/forward navigation, keyed by history position
+
+    Each state holds the parsed entries with their validators, the sort,
+    the scroll offsets and the selection, so going back restores a page
+    without fetching or parsing it. The least recently used states are
+    dropped once their estimated size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_pages=32):
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.states = OrderedDict()
+        self.total_bytes = 0
+
+    def put(self, position, state):
+        self.discard(position)
+        state['bytes'] = estimate_items_size(state['items'])
+        if state['bytes'] > self.max_bytes:
+            return
+        self.states[position] = state
+        self.total_bytes += state['bytes']
+        while self.total_bytes > self.max_bytes or len(self.states) > self.max_pages:
+            _, evicted = self.states.popitem(last=False)
+            self.total_bytes -= evicted['bytes']
+        PAGE_CACHE_BYTES.set(self.total_bytes)
+
+    def get(self, position, url):
+        """Return the state saved at position if it is still for url, or None"""
+        state = self.states.get(position)
+        if state is None or state['url'] != url:
+            PAGE_CACHE_LOOKUPS.inc(result='miss')
+            return None
+        self.states.move_to_end(position)
+        PAGE_CACHE_LOOKUPS.inc(result='hit')
+        return state
+
+    def discard(self, position):
+        state = self.states.pop(position, None)
+        if state is not None:
+            self.total_bytes -= state['bytes']
+            PAGE_CACHE_BYTES.set(self.total_bytes)
+
+    def discard_after(self, position):
+        """Forget the states of history entries past position"""
+        for stale in [key for key in self.states if key > position]:
+            self.discard(stale)
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        while self.states and self.total_bytes > self.max_bytes:
+            _, evicted = self.states.popitem(last=False)
+            self.total_bytes -= evicted['bytes']
+        PAGE_CACHE_BYTES.set(self.total_bytes)
+
+    def usage(self):
+        return f"{len(self.states)} pages, {self.total_bytes / 1024 / 1024:.1f} MB of {self.max_bytes // 1024 // 1024} MB"
+
+def head_metadata(headers):
+    """Exact size, content type and validators from a HEAD response's headers"""
+    length = headers.get('Content-Length')
+    return {
+        'size_bytes': int(length) if length and length.isdigit() else None,
+        'content_type': headers.get('Content-Type'),
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+    }
+
+def apply_head_metadata(item, metadata):
+    """Fill HEAD metadata into an entry record"""
+    if metadata['size_bytes'] is not None:
+        item['size_bytes'] = metadata['size_bytes']
+        item['exact_size'] = True
+    item['content_type'] = metadata['content_type']
+    item['etag'] = metadata['etag']
+    item['last_modified'] = metadata['last_modified']
+
+class HeadMetadataCache:
+    """Bounded LRU of HEAD metadata per URL
+
+    Entries remember the Modified column of the listing they were fetched
+    for, so a file that changed on the mirror is asked about again.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, url, modified):
+        entry = self.entries.get(url)
+        if entry is None or entry[0] != modified:
+            return None
+        self.entries.move_to_end(url)
+        return entry[1]
+
+    def put(self, url, modified, metadata):
+        self.entries[url] = (modified, metadata)
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+class HeadEnrichThread(QThread):
+    """Concurrent, rate limited HEAD requests for directory entries
+
+    Results arrive in batches of (url, modified, metadata) tuples so the
+    views can be updated a few times a second rather than per response.
+    """
+    batch_ready = pyqtSignal(list)
+    finished = pyqtSignal(bool, str)
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, entries, engine=None, concurrency=8, requests_per_second=10):
+        super().__init__()
+        self.entries = entries  # (url, modified) pairs
+        self.engine = engine
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.stop_requested = False
+        self.local = threading.local()
+        self.executor = None
+
+    def stop(self):
+        self.stop_requested = True
+
+    def head(self, url):
+        # One session per worker thread, since sessions are not thread-safe
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = create_session()
+        response = session.head(url, timeout=10, headers=BROWSER_HEADERS, allow_redirects=True,
+                                hooks=request_hooks('head'))
+        response.raise_for_status()
+        return head_metadata(response.headers)
+
+    def submit(self, url):
+        if self.engine is not None:
+            async def head_async():
+                response = await self.engine.head(url)
+                response.raise_for_status()
+                return head_metadata(response.headers)
+            return self.engine.submit(head_async())
+        return self.executor.submit(self.head, url)
+
+    def run(self):
+        # Imported on first use to keep them off the startup path
+        import contextlib
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        remaining = iter(self.entries)
+        pending = {}
+        batch = []
+        failed = 0
+        last_emit = time.monotonic()
+        # The engine runs the requests itself, worker threads are only needed without it
+        if self.engine is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        with self.executor or contextlib.nullcontext():
+            while True:
+                # Keep up to `concurrency` requests in flight, within the rate limit
+                while len(pending) < self.concurrency and not self.stop_requested:
+                    entry = next(remaining, None)
+                    if entry is None:
+                        break
+                    self.rate_limiter.consume(1)
+                    pending[self.submit(entry[0])] = entry
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=self.BATCH_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, modified = pending.pop(future)
+                    try:
+                        batch.append((url, modified, future.result()))
+                    except requests.RequestException as e:
+                        HTTP_ERRORS.inc(kind='head', error=type(e).__name__)
+                        failed += 1
+                if batch and (time.monotonic() - last_emit >= self.BATCH_INTERVAL or not pending):
+                    self.batch_ready.emit(batch)
+                    batch = []
+                    last_emit = time.monotonic()
+        if batch:
+            self.batch_ready.emit(batch)
+        self.finished.emit(failed == 0, f"{failed} HEAD requests failed" if failed else "")
+
+class ListingFetchThread(QThread):
+    listing_ready = pyqtSignal(str, object, object)  # url, items (None if not modified), headers
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, url, etag=None, last_modified=None, kind='tree'):
+        super().__init__()
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.kind = kind
+
+    def run(self):
+        try:
+            # Revalidate when the listing was fetched before
+            headers = dict(BROWSER_HEADERS)
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+
+            with perf_recorder.span(f'{self.kind}.fetch', url=self.url) as span:
+                response = requests.get(self.url, timeout=10, headers=headers,
+                                        hooks=request_hooks(self.kind))
+                span.set(status=response.status_code, bytes=len(response.content))
+            if response.status_code == 304:
+                self.listing_ready.emit(self.url, None, dict(response.headers))
+                return
+            response.raise_for_status()
+            items = parse_directory_listing(response.content, self.url)
+            self.listing_ready.emit(self.url, items, dict(response.headers))
+        except Exception as e:
+            HTTP_ERRORS.inc(kind=self.kind, error=type(e).__name__)
+            self.failed.emit(self.url, str(e))
+
+class AsyncListingFetch(QObject):
+    """ListingFetchThread's interface on top of the shared AsyncHttpEngine
+
+    The future completes on the engine thread; the signals are queued to
+    the receivers' thread like the QThread's.
+    """
+    listing_ready = pyqtSignal(str, object, object)  # url, items (None if not modified), headers
+    failed = pyqtSignal(str, str)
+    finished = pyqtSignal()
+
+    def __init__(self, engine, url, etag=None, last_modified=None, kind='tree'):
+        super().__init__()
+        self.engine = engine
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.kind = kind
+        self.future = None
+
+    def start(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        self.future = self.engine.submit(self.engine.fetch_listing(self.url, headers, kind=self.kind))
+        self.future.add_done_callback(self.fetch_done)
+
+    def fetch_done(self, future):
+        try:
+            items, headers = future.result()
+            # httpx lowercases header names, so a plain dict would miss headers.get('ETag')
+            self.listing_ready.emit(self.url, items, requests.structures.CaseInsensitiveDict(headers))
+        except Exception as e:
+            HTTP_ERRORS.inc(kind=self.kind, error=type(e).__name__)
+            self.failed.emit(self.url, str(e))
+        self.finished.emit()
+
+    def wait(self, msecs=None):
+        """Block until the fetch is done, like QThread.wait()"""
+        from concurrent.futures import wait
+        if self.future is not None:
+            wait([self.future], timeout=msecs / 1000 if msecs else None)
+
+class ContentIndex:
+    """Local SQLite full-text index of text files found on the mirror"""
+    HIGHLIGHT_START = '\ue000'  # Private use characters never found in text
+    HIGHLIGHT_END = '\ue001'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        # Every thread's connection, so close() can close them all
+        self.connections = []
+        self.connections_lock = threading.Lock()
+        self.fts_available = True
+        self.setup()
+
+    def connection(self):
+        """Get this thread's connection, sqlite connections are per thread"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Only used by its own thread, but close() may run on another one
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+            with self.connections_lock:
+                self.connections.append(conn)
+        return conn
+
+    def setup(self):
+        conn = self.connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS documents ('
+                     'url TEXT PRIMARY KEY, name TEXT, etag TEXT, '
+                     'last_modified TEXT, size INTEGER, indexed_at REAL)')
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5("
+                         "url UNINDEXED, name, body, tokenize='unicode61')")
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5, fall back to substring search
+            self.fts_available = False
+            conn.execute('CREATE TABLE IF NOT EXISTS content_plain '
+                         '(url TEXT PRIMARY KEY, name TEXT, body TEXT)')
+        conn.commit()
+
+    def get_validators(self, url):
+        """Return the (etag, last_modified) stored for a URL"""
+        row = self.connection().execute(
+            'SELECT etag, last_modified FROM documents WHERE url = ?', (url,)).fetchone()
+        return row if row else (None, None)
+
+    def store(self, url, name, text, etag=None, last_modified=None):
+        conn = self.connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)',
+                         (url, name, etag, last_modified, len(text), time.time()))
+            if self.fts_available:
+                conn.execute('DELETE FROM content_fts WHERE url = ?', (url,))
+                conn.execute('INSERT INTO content_fts (url, name, body) VALUES (?, ?, ?)',
+                             (url, name, text))
+            else:
+                conn.execute('INSERT OR REPLACE INTO content_plain VALUES (?, ?, ?)', (url, name, text))
+
+    def remove_missing(self, directory_url, urls):
+        """Delete the documents directly inside directory_url that are not in urls"""
+        # A range on the primary key, so only this directory's rows are read
+        rows = self.connection().execute('SELECT url FROM documents WHERE url >= ? AND url < ?',
+                                         (directory_url, directory_url + '\U0010ffff')).fetchall()
+        # Files in subdirectories are handled when their own listing is indexed
+        stale = [url for url, in rows
+                 if '/' not in url[len(directory_url):] and url not in urls]
+        self.remove(stale)
+        return len(stale)
+
+    def remove(self, urls):
+        """Delete the documents for urls and their text"""
+        if not urls:
+            return
+        conn = self.connection()
+        table = 'content_fts' if self.fts_available else 'content_plain'
+        rows = [(url,) for url in urls]
+        with conn:
+            conn.executemany('DELETE FROM documents WHERE url = ?', rows)
+            conn.executemany(f'DELETE FROM {table} WHERE url = ?', rows)
+
+    def document_count(self):
+        return self.connection().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def search(self, query, limit=200):
+        """Return (url, name, snippet) hits with matches wrapped in HIGHLIGHT_START/END"""
+        conn = self.connection()
+        if self.fts_available:
+            # Quote every term so user input is never parsed as FTS query syntax
+            terms = ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+            if not terms:
+                return []
+            return conn.execute(
+                "SELECT url, name, snippet(content_fts, 2, ?, ?, '...', 16) "
+                "FROM content_fts WHERE content_fts MATCH ? ORDER BY rank LIMIT ?",
+                (self.HIGHLIGHT_START, self.HIGHLIGHT_END, terms, limit)).fetchall()
+
+        hits = []
+        needle = query.lower()
+        for url, name, body in conn.execute(
+                'SELECT url, name, body FROM content_plain WHERE instr(lower(body), ?) > 0 LIMIT ?',
+                (needle, limit)):
+            position = body.lower().find(needle)
+            end = position + len(needle)
+            snippet = (body[max(0, position - 60):position] + self.HIGHLIGHT_START
+                       + body[position:end] + self.HIGHLIGHT_END + body[end:end + 60])
+            hits.append((url, name, snippet))
+        return hits
+
+    def close(self):
+        with self.connections_lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local = threading.local()
+
+class ContentIndexer:
+    """Crawler sink fetching text files into a ContentIndex"""
+
+    def __init__(self, index, session, max_file_size=1024 * 1024, bandwidth_limit=0):
+        self.index = index
+        self.session = session
+        self.max_file_size = max_file_size
+        self.rate_limiter = RateLimiter(bandwidth_limit)
+        self.indexed = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def on_directory(self, url, items):
+        # Files gone from the listing since the last crawl drop out of the index
+        self.removed += self.index.remove_missing(url, {item['url'] for item in items})
+        for item in items:
+            if item['type'] != 'file' or not is_text_filename(item['name']):
+                continue
+            # Listing sizes are rounded, so allow some slack before skipping
+            if (item['size_bytes'] or 0) > self.max_file_size * 1.1:
+                self.skip(item['url'])
+                continue
+            try:
+                self.index_file(item['url'], item['name'])
+            except requests.RequestException as e:
+                HTTP_ERRORS.inc(kind='index', error=type(e).__name__)
+                print(f"Error indexing {item['url']}: {e}")
+
+    def index_file(self, url, name):
+        # Revalidate files indexed by an earlier crawl instead of refetching them
+        headers = {}
+        etag, last_modified = self.index.get_validators(url)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        response = self.session.get(url, headers=headers, timeout=10, stream=True,
+                                    hooks=request_hooks('index'))
+        try:
+            if response.status_code == 304:
+                self.unchanged += 1
+                return
+            response.raise_for_status()
+
+            decoder = TextDecoder(response.headers.get('Content-Type'))
+            for chunk in response.iter_content(chunk_size=16384):
+                self.rate_limiter.consume(len(chunk))
+                HTTP_BYTES.inc(len(chunk), kind='index')
+                decoder.feed(chunk)
+                if decoder.size > self.max_file_size:
+                    self.skip(url)
+                    return
+        finally:
+            response.close()
+
+        text = decoder.finish()
+        self.index.store(url, name, text, response.headers.get('ETag'),
+                         response.headers.get('Last-Modified'))
+        self.indexed += 1
+
+    def skip(self, url):
+        # A file that has grown past the limit must not stay searchable with old text
+        self.index.remove([url])
+        self.skipped += 1
+
+    def close(self):
+        self.index.close()
+
+class SelectionRule:
+    """Entries to select, written as space separated terms
+
+        *.deb *.udeb newer:2024-01-01 size<50M
+        re:^linux-image-.*amd64 older:30d type:file
+
+    Name terms are globs (any may match) or re:REGEX, searched anywhere
+    in the name as in the Regex search mode. size<N, size<=N,
+    size>N and size>=N take K/M/G/T suffixes; newer:/older: take a date
+    (YYYY-MM-DD or "YYYY-MM-DD HH:MM", UTC) or an age like 7d or 12h;
+    type: is file or dir. Bounds compare the parsed size_bytes and mtime
+    fields, and entries without them never match a bound.
+    """
+    SIZE_TERM = re.compile(r'size(<=|>=|<|>)(\S+)$')
+
+    def __init__(self, text=''):
+        # Imported on first use to keep them off the startup path
+        import fnmatch
+        import shlex
+        self.text = text
+        patterns = []
+        self.min_size = self.max_size = None
+        self.newer_than = self.older_than = None
+        self.item_type = None
+        for term in shlex.split(text):
+            size_match = self.SIZE_TERM.match(term)
+            if size_match:
+                operator, value = size_match.groups()
+                size = self.parse_size_value(value)
+                if operator == '<':
+                    self.max_size = size - 1
+                elif operator == '<=':
+                    self.max_size = size
+                elif operator == '>':
+                    self.min_size = size + 1
+                else:
+                    self.min_size = size
+            elif term.startswith('newer:'):
+                self.newer_than = self.parse_time_value(term[6:])
+            elif term.startswith('older:'):
+                self.older_than = self.parse_time_value(term[6:])
+            elif term.startswith('type:'):
+                if term[5:] not in ('file', 'dir'):
+                    raise ValueError(f"type: must be file or dir, not {term[5:]!r}")
+                self.item_type = 'file' if term[5:] == 'file' else 'directory'
+            elif term.startswith('re:'):
+                patterns.append(term[3:])
+            else:
+                patterns.append(r'\A' + fnmatch.translate(term))
+        # All name terms in one regex, so each entry is tested once
+        try:
+            self.name_regex = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)) if patterns else None
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from e
+
+    @staticmethod
+    def parse_size_value(value):
+        if not re.match(r'\d+(\.\d+)?[KMGTkmgt]?$', value):
+            raise ValueError(f"Invalid size {value!r}")
+        return int(parse_size(value))
+
+    @staticmethod
+    def parse_time_value(value):
+        age = re.match(r'(\d+)([dhm])$', value)
+        if age:
+            seconds = {'d': 86400, 'h': 3600, 'm': 60}[age.group(2)]
+            return time.time() - int(age.group(1)) * seconds
+        timestamp = parse_modified(value) or parse_modified(value + ' 00:00')
+        if timestamp is None:
+            raise ValueError(f"Invalid date {value!r}, use YYYY-MM-DD or an age like 7d")
+        return timestamp
+
+    def matches(self, item):
+        if self.item_type and item['type'] != self.item_type:
+            return False
+        if self.name_regex and not self.name_regex.search(item['name'].rstrip('/')):
+            return False
+        if self.min_size is not None or self.max_size is not None:
+            size = item['size_bytes']
+            if size is None or (self.min_size is not None and size < self.min_size) \
+                    or (self.max_size is not None and size > self.max_size):
+                return False
+        if self.newer_than is not None or self.older_than is not None:
+            mtime = item['mtime']
+            if mtime is None or (self.newer_than is not None and mtime < self.newer_than) \
+                    or (self.older_than is not None and mtime > self.older_than):
+                return False
+        return True
+
+    def select(self, items):
+        """Return the indexes of the matching items"""
+        matches = self.matches
+        return [index for index, item in enumerate(items) if matches(item)]
+
+class DownloadCollector:
+    """Crawler sink collecting the files to mirror below the start URL"""
+
+    def __init__(self, start_url, patterns=None, rule=None):
+        self.start_url = start_url
+        self.patterns = patterns or []
+        self.rule = rule
+        self.items = []  # (url, relative path) tuples for MultiDownloadManager
+        self.total_size = 0
+
+    def on_directory(self, url, items):
+        # Imported on first use to keep it off the startup path
+        import fnmatch
+        for item in items:
+            if item['type'] != 'file' or not item['url'].startswith(self.start_url):
+                continue
+            if self.patterns and not any(fnmatch.fnmatch(item['name'], pattern) for pattern in self.patterns):
+                continue
+            if self.rule and not self.rule.matches(item):
+                continue
+            path = unquote(item['url'][len(self.start_url):])
+            # Never write outside the download directory
+            if path.startswith('/') or '..' in path.split('/'):
+                continue
+            self.items.append((item['url'], path))
+            self.total_size += item['size_bytes'] or 0
+
+def listing_records(start_url, url, items):
+    """Yield (url, path, name, type, size_bytes, mtime, parent_url) for a listing's entries"""
+    for item in items:
+        item_url = item['url']
+        # Skip the parent directory link and links leaving the listing
+        if not item_url.startswith(url) or item_url == url:
+            continue
+        yield (
+            item_url,
+            unquote(item_url[len(start_url):]),
+            item['name'].rstrip('/'),
+            'web' if item['is_web_file'] else item['type'],
+            item['size_bytes'],
+            item['mtime'],
+            url,
+        )
+
+class CatalogWriter:
+    """Crawler sink streaming every listed entry into a catalog file
+
+    Rows are buffered and written batch_size at a time, one transaction or
+    row group per batch. The format follows the file extension unless
+    given: .db/.sqlite (SQLite), .jsonl or .parquet (needs pyarrow).
+    SQLite catalogs always keep existing rows; append=True does the same
+    for JSON Lines, for resuming an interrupted crawl.
+    """
+    FORMATS = {'.db': 'sqlite', '.sqlite': 'sqlite', '.sqlite3': 'sqlite',
+               '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+    COLUMNS = ['url', 'path', 'name', 'type', 'size_bytes', 'mtime', 'parent_url']
+
+    def __init__(self, filepath, start_url, file_format=None, batch_size=10000, append=False):
+        self.filepath = filepath
+        self.start_url = start_url
+        self.file_format = file_format or self.format_for_path(filepath)
+        if self.file_format is None:
+            raise ValueError(f"Unknown catalog format for {filepath} (use .db, .jsonl or .parquet)")
+        if self.file_format == 'parquet' and not PYARROW_AVAILABLE:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+        if self.file_format == 'parquet' and append:
+            raise ValueError("Parquet catalogs cannot be appended to")
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+        if self.file_format == 'jsonl':
+            self.backend = JSONLCatalog(filepath, append)
+        else:
+            self.backend = {'sqlite': SQLiteCatalog, 'parquet': ParquetCatalog}[self.file_format](filepath)
+
+    @classmethod
+    def format_for_path(cls, filepath):
+        return cls.FORMATS.get(os.path.splitext(filepath.lower())[1])
+
+    def on_directory(self, url, items):
+        self.rows.extend(listing_records(self.start_url, url, items))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            with perf_recorder.span('catalog.write', rows=len(self.rows), format=self.file_format):
+                self.backend.write(self.rows)
+            self.written += len(self.rows)
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+class SQLiteCatalog:
+    def __init__(self, filepath):
+        # The GUI opens it, so a bad path is reported at once, then only the
+        # crawling thread uses it; never by two threads at the same time
+        self.conn = sqlite3.connect(filepath, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                          'url TEXT PRIMARY KEY, path TEXT, name TEXT, type TEXT, '
+                          'size_bytes INTEGER, mtime INTEGER, parent_url TEXT, crawled_at REAL)')
+        self.conn.commit()
+
+    def write(self, rows):
+        crawled_at = time.time()
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                  [row + (crawled_at,) for row in rows])
+
+    def close(self):
+        # Built once after the bulk load, which is much faster than maintaining them per batch
+        with self.conn:
+            self.conn.execute('CREATE INDEX IF NOT EXISTS entries_path ON entries (path)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS entries_name ON entries (name)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent_url)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS entries_type_size ON entries (type, size_bytes)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS entries_mtime ON entries (mtime)')
+        self.conn.close()
+
+class JSONLCatalog:
+    def __init__(self, filepath, append=False):
+        self.file = open(filepath, 'a' if append else 'w', encoding='utf-8', buffering=1024 * 1024)
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def write(self, rows):
+        columns = CatalogWriter.COLUMNS
+        encode = self.encode
+        self.file.write(''.join([encode(dict(zip(columns, row))) + '\n' for row in rows]))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ParquetCatalog:
+    def __init__(self, filepath):
+        # Imported on first use to keep it off the startup path
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ('url', pyarrow.string()), ('path', pyarrow.string()), ('name', pyarrow.string()),
+            ('type', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+            ('size_bytes', pyarrow.int64()), ('mtime', pyarrow.timestamp('s', tz='UTC')),
+            ('parent_url', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(filepath, self.schema, compression='zstd')
+
+    def write(self, rows):
+        # One row group per batch
+        arrays = []
+        for column, field in zip(zip(*rows), self.schema):
+            if self.pyarrow.types.is_dictionary(field.type):
+                # Few distinct types and parent URLs, so store each once per row group
+                arrays.append(self.pyarrow.array(column, type=field.type.value_type).dictionary_encode())
+            else:
+                arrays.append(self.pyarrow.array(column, type=field.type))
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+def snapshot_sort_key(row):
+    return row[0]
+
+class SnapshotWriter:
+    """Crawler sink saving a listing snapshot sorted by path
+
+    Entries arrive in crawl order, so they are sorted in runs of run_size
+    spilled to temporary files and merged when the crawl closes; memory
+    stays bounded however large the tree is. The snapshot is a gzipped
+    JSON lines file: a header object, then [path, type, size_bytes, mtime]
+    rows in path order.
+    """
+
+    def __init__(self, filepath, start_url, run_size=200000):
+        self.filepath = filepath
+        self.start_url = start_url
+        self.run_size = run_size
+        self.rows = []
+        self.run_paths = []
+        self.written = 0
+
+    def on_directory(self, url, items):
+        for record in listing_records(self.start_url, url, items):
+            self.rows.append((record[1], record[3], record[4], record[5]))
+        if len(self.rows) >= self.run_size:
+            self.spill()
+
+    def spill(self):
+        self.rows.sort(key=snapshot_sort_key)
+        run_path = f"{self.filepath}.run{len(self.run_paths)}"
+        with open(run_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(row) + '\n' for row in self.rows)
+        self.run_paths.append(run_path)
+        self.rows = []
+
+    def read_run(self, run_path):
+        with open(run_path, encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def close(self):
+        # Imported on first use to keep them off the startup path
+        import gzip
+        import heapq
+        with perf_recorder.span('snapshot.write', runs=len(self.run_paths)):
+            self.rows.sort(key=snapshot_sort_key)
+            if self.run_paths:
+                rows = heapq.merge(self.rows, *(self.read_run(path) for path in self.run_paths),
+                                   key=snapshot_sort_key)
+            else:
+                rows = self.rows
+            temp_path = self.filepath + '.tmp'
+            try:
+                # Fast compression; snapshots are written far more often than read twice
+                with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+                    f.write(json.dumps({'snapshot': 1, 'url': self.start_url, 'taken': time.time()}) + '\n')
+                    for row in rows:
+                        f.write(json.dumps(row) + '\n')
+                        self.written += 1
+                os.replace(temp_path, self.filepath)
+            finally:
+                for run_path in self.run_paths:
+                    os.remove(run_path)
+                self.rows = []
+
+def read_snapshot(filepath):
+    """Return (header, rows) where rows lazily yields [path, type, size_bytes, mtime]"""
+    # Imported on first use to keep it off the startup path
+    import gzip
+    f = gzip.open(filepath, 'rt', encoding='utf-8')
+    header = json.loads(f.readline())
+
+    def rows():
+        with f:
+            for line in f:
+                yield json.loads(line)
+    return header, rows()
+
+def diff_snapshots(old_rows, new_rows):
+    """Merge two path-sorted snapshots, yielding (change, path, old_row, new_row)
+
+    change is 'added', 'removed' or 'changed'. Files change when their type,
+    size or modification time differs; directories only when their type
+    does, as their times move with every change inside them.
+    """
+    old_row = next(old_rows, None)
+    new_row = next(new_rows, None)
+    while old_row is not None or new_row is not None:
+        if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+            yield 'removed', old_row[0], old_row, None
+            old_row = next(old_rows, None)
+        elif old_row is None or new_row[0] < old_row[0]:
+            yield 'added', new_row[0], None, new_row
+            new_row = next(new_rows, None)
+        else:
+            if old_row[1] != new_row[1] or (new_row[1] == 'file' and old_row[2:] != new_row[2:]):
+                yield 'changed', new_row[0], old_row, new_row
+            old_row = next(old_rows, None)
+            new_row = next(new_rows, None)
+
+class SnapshotStore:
+    """Snapshots kept per start URL below one directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def directory_for(self, url):
+        # Imported on first use to keep it off the startup path
+        import hashlib
+        return os.path.join(self.root, hashlib.sha1(url.encode('utf-8')).hexdigest()[:16])
+
+    def new_path(self, url):
+        directory = self.directory_for(url)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, time.strftime('%Y%m%d-%H%M%S') + '.snap.gz')
+
+    def list(self, url):
+        """Return the snapshot paths for url, oldest first"""
+        directory = self.directory_for(url)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith('.snap.gz')]
+
+def discard_partial_snapshot(crawler, writer, success=True):
+    """Remove the snapshot of a crawl that missed listings; returns why, or None when it is kept
+
+    A stopped or failed crawl, or one with directories that could not be
+    listed, would diff as mass deletions of everything it did not see.
+    """
+    if not success:
+        reason = 'the crawl failed'
+    elif crawler.stop_requested:
+        reason = 'the crawl was stopped'
+    elif crawler.errors:
+        reason = f'{len(crawler.errors)} directories could not be listed'
+    else:
+        return None
+    if os.path.exists(writer.filepath):
+        os.remove(writer.filepath)
+    return reason
+
+def format_diff_row(change, path, old_row, new_row):
+    """Flatten a diff entry for CSV and JSON export"""
+    old_row = old_row or [None] * 4
+    new_row = new_row or [None] * 4
+    return {'change': change, 'path': path, 'type': (new_row[1] or old_row[1]),
+            'old_size': old_row[2], 'new_size': new_row[2], 'old_mtime': old_row[3], 'new_mtime': new_row[3]}
+
+def export_diff(old_path, new_path, output_path):
+    """Stream the diff of two snapshot files into a .csv or .jsonl file; returns the counts"""
+    # Imported on first use to keep it off the startup path
+    import csv
+    counts = {'added': 0, 'removed': 0, 'changed': 0}
+    _, old_rows = read_snapshot(old_path)
+    _, new_rows = read_snapshot(new_path)
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        if output_path.lower().endswith('.csv'):
+            writer = csv.DictWriter(f, ['change', 'path', 'type', 'old_size', 'new_size', 'old_mtime', 'new_mtime'])
+            writer.writeheader()
+        for entry in diff_snapshots(old_rows, new_rows):
+            counts[entry[0]] += 1
+            row = format_diff_row(*entry)
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row) + '\n')
+    return counts
+
+class DirectoryWatcher(QObject):
+    """Polls watched directories with conditional GETs on the Qt event loop
+
+    Every watch is a dict with url, interval (seconds), pattern and
+    auto_download. A directory that answers 304 (or lists nothing new)
+    waits twice as long before the next poll, up to MAX_BACKOFF times its
+    interval; new entries reset the delay. Validators and the names seen
+    so far are kept in state_path, so entries that appear while the app
+    is closed are reported on the first poll.
+    """
+    new_entries = pyqtSignal(dict, list)  # watch, items not seen before
+    polled = pyqtSignal(str, str)  # url, status text
+    MAX_BACKOFF = 8
+
+    def __init__(self, create_fetch, state_path, parent=None):
+        super().__init__(parent)
+        self.create_fetch = create_fetch
+        self.state_path = state_path
+        self.watches = {}
+        self.timers = {}
+        self.fetches = {}
+        self.state = {}
+        try:
+            with open(state_path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def set_watches(self, watches):
+        """Start, update or stop polls to match the watch list"""
+        urls = {watch['url'] for watch in watches}
+        for url in list(self.watches):
+            if url not in urls:
+                self.timers.pop(url).stop()
+                self.watches.pop(url)
+        for watch in watches:
+            url = watch['url']
+            if url not in self.watches:
+                timer = QTimer(self)
+                timer.setSingleShot(True)
+                timer.timeout.connect(lambda url=url: self.poll(url))
+                self.timers[url] = timer
+                # First poll soon after startup, spread out by the jitter
+                self.watches[url] = dict(watch)
+                self.schedule(url, min(5, watch['interval']))
+            else:
+                self.watches[url].update(watch)
+
+    def schedule(self, url, delay):
+        # Imported on first use to keep it off the startup path
+        import random
+        self.watches[url]['delay'] = delay
+        # Jitter keeps watches with equal intervals from polling in lockstep
+        self.timers[url].start(int(delay * random.uniform(0.9, 1.1) * 1000))
+
+    def poll(self, url):
+        if url not in self.watches or url in self.fetches:
+            return
+        state = self.state.get(url, {})
+        fetch = self.create_fetch(url, state.get('etag'), state.get('last_modified'), 'watch')
+        fetch.listing_ready.connect(self.poll_done)
+        fetch.failed.connect(self.poll_failed)
+        fetch.finished.connect(lambda url=url: self.fetches.pop(url, None))
+        self.fetches[url] = fetch
+        fetch.start()
+
+    def poll_now(self, url):
+        if url in self.watches:
+            self.timers[url].stop()
+            self.poll(url)
+
+    def backoff(self, url):
+        watch = self.watches[url]
+        self.schedule(url, min(watch['delay'] * 2, watch['interval'] * self.MAX_BACKOFF))
+
+    def poll_done(self, url, items, headers):
+        if url not in self.watches:
+            return
+        watch = self.watches[url]
+        if items is None:
+            WATCH_POLLS.inc(result='unchanged')
+            self.polled.emit(url, 'Not modified')
+            self.backoff(url)
+            return
+
+        state = self.state.setdefault(url, {})
+        state['etag'] = headers.get('ETag') or headers.get('etag')
+        state['last_modified'] = headers.get('Last-Modified') or headers.get('last-modified')
+        # Skip the parent directory link
+        current = [item for item in items if item['url'].startswith(url) and item['url'] != url]
+        known = state.get('names')
+        state['names'] = [item['name'] for item in current]
+        self.save_state()
+
+        if known is None:
+            # First poll of a new watch only records what is there
+            WATCH_POLLS.inc(result='unchanged')
+            self.polled.emit(url, f"Watching {len(current)} entries")
+            self.schedule(url, watch['interval'])
+            return
+        known = set(known)
+        added = [item for item in current if item['name'] not in known]
+        if added:
+            WATCH_POLLS.inc(result='changed')
+            self.polled.emit(url, f"{len(added)} new")
+            self.new_entries.emit(dict(watch), added)
+            self.schedule(url, watch['interval'])
+        else:
+            WATCH_POLLS.inc(result='unchanged')
+            self.polled.emit(url, 'No new entries')
+            self.backoff(url)
+
+    def poll_failed(self, url, message):
+        if url not in self.watches:
+            return
+        WATCH_POLLS.inc(result='error')
+        self.polled.emit(url, f"Error: {message}")
+        self.backoff(url)
+
+    def save_state(self):
+        # Only keep state for directories still watched
+        state = {url: value for url, value in self.state.items() if url in self.watches}
+        temp_path = self.state_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving watch state: {e}")
+
+    def stop(self):
+        for timer in self.timers.values():
+            timer.stop()
+        for fetch in list(self.fetches.values()):
+            fetch.wait()
+
+class WatchListDialog(QDialog):
+    """Edit the watched directories"""
+    COLUMNS = ['Directory', 'Interval (min)', 'Auto-download Pattern', 'Status']
+
+    def __init__(self, watches, current_url, statuses, parent=None):
+        super().__init__(parent)
+        self.watches = [dict(watch) for watch in watches]
+        self.current_url = current_url
+        self.statuses = statuses
+        self.setWindowTitle('Watched Directories')
+        self.setMinimumSize(750, 400)
+        self.initUI()
+        self.refresh()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        self.watch_table = QTableWidget(0, len(self.COLUMNS))
+        self.watch_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.watch_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.watch_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.watch_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.watch_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.watch_table)
+
+        add_layout = QGridLayout()
+        add_layout.addWidget(QLabel('Poll every (minutes):'), 0, 0)
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 24 * 60)
+        self.interval_spin.setValue(15)
+        add_layout.addWidget(self.interval_spin, 0, 1)
+        self.auto_download_check = QCheckBox('Download new files matching:')
+        add_layout.addWidget(self.auto_download_check, 1, 0)
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText('e.g. *.iso (empty = all files)')
+        add_layout.addWidget(self.pattern_edit, 1, 1)
+        layout.addLayout(add_layout)
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton('Watch Current Directory')
+        add_button.clicked.connect(self.add_current)
+        button_layout.addWidget(add_button)
+        remove_button = QPushButton('Remove')
+        remove_button.clicked.connect(self.remove_selected)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        ok_button = QPushButton('OK')
+        ok_button.clicked.connect(self.accept)
+        button_layout.addWidget(ok_button)
+        cancel_button = QPushButton('Cancel')
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        self.watch_table.setRowCount(len(self.watches))
+        for row, watch in enumerate(self.watches):
+            pattern = (watch['pattern'] or '*') if watch['auto_download'] else ''
+            values = [unquote(watch['url']), str(watch['interval'] // 60), pattern,
+                      self.statuses.get(watch['url'], '')]
+            for column, value in enumerate(values):
+                self.watch_table.setItem(row, column, QTableWidgetItem(value))
+
+    def add_current(self):
+        watch = {'url': self.current_url, 'interval': self.interval_spin.value() * 60,
+                 'pattern': self.pattern_edit.text().strip(),
+                 'auto_download': self.auto_download_check.isChecked()}
+        # Adding a watched directory again updates its options
+        self.watches = [existing for existing in self.watches if existing['url'] != self.current_url]
+        self.watches.append(watch)
+        self.refresh()
+
+    def remove_selected(self):
+        rows = {index.row() for index in self.watch_table.selectedIndexes()}
+        self.watches = [watch for row, watch in enumerate(self.watches) if row not in rows]
+        self.refresh()
+
+class SelectionRuleDialog(QDialog):
+    """Select or download the entries matching a SelectionRule"""
+    HELP = ('Globs or re:REGEX match names; narrow with size<50M, size>=1G, '
+            'newer:2024-01-01, older:7d and type:file or type:dir.')
+
+    def __init__(self, items, rule_text='', parent=None):
+        super().__init__(parent)
+        self.items = items
+        self.rule = None
+        self.action = None
+        self.setWindowTitle('Select by Rule')
+        self.setMinimumWidth(520)
+        self.initUI()
+        self.rule_edit.setText(rule_text)
+        self.update_matches()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        self.rule_edit = QLineEdit()
+        self.rule_edit.setPlaceholderText('e.g. *.deb newer:2024-01-01 size<50M')
+        # Re-evaluate once typing pauses
+        self.match_timer = QTimer(self)
+        self.match_timer.setSingleShot(True)
+        self.match_timer.setInterval(150)
+        self.match_timer.timeout.connect(self.update_matches)
+        self.rule_edit.textChanged.connect(self.match_timer.start)
+        self.rule_edit.returnPressed.connect(lambda: self.finish('select'))
+        layout.addWidget(self.rule_edit)
+
+        help_label = QLabel(self.HELP)
+        help_label.setWordWrap(True)
+        layout.addWidget(help_label)
+        self.match_label = QLabel()
+        layout.addWidget(self.match_label)
+
+        button_layout = QHBoxLayout()
+        self.select_button = QPushButton('Select Matches')
+        self.select_button.clicked.connect(lambda: self.finish('select'))
+        button_layout.addWidget(self.select_button)
+        self.download_button = QPushButton('Download Matches')
+        self.download_button.clicked.connect(lambda: self.finish('download'))
+        button_layout.addWidget(self.download_button)
+        self.recursive_button = QPushButton('Download Matches Recursively')
+        self.recursive_button.clicked.connect(lambda: self.finish('recursive'))
+        button_layout.addWidget(self.recursive_button)
+        button_layout.addStretch()
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.reject)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def update_matches(self):
+        self.match_timer.stop()
+        try:
+            self.rule = SelectionRule(self.rule_edit.text())
+        except ValueError as e:
+            self.rule = None
+            self.match_label.setText(str(e))
+        else:
+            matches = [self.items[index] for index in self.rule.select(self.items)]
+            files = sum(1 for item in matches if item['type'] == 'file')
+            total = sum(item['size_bytes'] or 0 for item in matches if item['type'] == 'file')
+            self.match_label.setText(f'{len(matches)} of {len(self.items)} entries match '
+                                     f'({files} files, {total / 1024 / 1024:.1f} MB)')
+        for button in (self.select_button, self.download_button, self.recursive_button):
+            button.setEnabled(self.rule is not None)
+
+    def finish(self, action):
+        self.update_matches()
+        if self.rule is None:
+            return
+        self.action = action
+        self.accept()
+
+class ContentSearchDialog(QDialog):
+    def __init__(self, content_index, parent=None):
+        super().__init__(parent)
+        self.content_index = content_index
+        self.parent_window = parent
+        self.setWindowTitle('Search File Contents')
+        self.setMinimumSize(600, 450)
+        self.initUI()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        query_layout = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText('Words to find in indexed text files...')
+        self.query_edit.returnPressed.connect(self.run_query)
+        query_layout.addWidget(self.query_edit)
+        search_button = QPushButton('Search')
+        search_button.clicked.connect(self.run_query)
+        query_layout.addWidget(search_button)
+        layout.addLayout(query_layout)
+
+        self.results_list = QListWidget()
+        self.results_list.currentItemChanged.connect(self.show_snippet)
+        self.results_list.itemDoubleClicked.connect(self.open_hit)
+        layout.addWidget(self.results_list)
+
+        self.snippet_view = QTextEdit()
+        self.snippet_view.setReadOnly(True)
+        self.snippet_view.setMaximumHeight(120)
+        layout.addWidget(self.snippet_view)
+
+        button_layout = QHBoxLayout()
+        self.count_label = QLabel(f'{self.content_index.document_count()} files indexed')
+        button_layout.addWidget(self.count_label)
+        button_layout.addStretch()
+        open_button = QPushButton('Open in Preview')
+        open_button.clicked.connect(lambda: self.open_hit(self.results_list.currentItem()))
+        button_layout.addWidget(open_button)
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def run_query(self):
+        self.results_list.clear()
+        self.snippet_view.clear()
+        query = self.query_edit.text().strip()
+        if not query:
+            return
+
+        try:
+            hits = self.content_index.search(query)
+        except sqlite3.Error as e:
+            self.count_label.setText(f'Search failed: {e}')
+            return
+
+        for url, name, snippet in hits:
+            item = QListWidgetItem(f"{name} - {unquote(urlparse(url).path)}")
+            item.setData(Qt.ItemDataRole.UserRole, (url, snippet))
+            self.results_list.addItem(item)
+        self.count_label.setText(f'{len(hits)} matching files')
+
+    def show_snippet(self, item, previous=None):
+        if not item:
+            self.snippet_view.clear()
+            return
+        _, snippet = item.data(Qt.ItemDataRole.UserRole)
+        snippet_html = html.escape(snippet).replace(
+            ContentIndex.HIGHLIGHT_START, '<b style="background-color: #786414;">').replace(
+            ContentIndex.HIGHLIGHT_END, '</b>')
+        self.snippet_view.setHtml(f"<pre style='white-space: pre-wrap;'>{snippet_html}</pre>")
+
+    def open_hit(self, item):
+        if item and self.parent_window:
+            url, _ = item.data(Qt.ItemDataRole.UserRole)
+            self.parent_window.open_in_text_preview(url)
+
+class PerformanceDialog(QDialog):
+    """Live view of the recorded timing spans"""
+    COLUMNS = ['Span', 'Count', 'Mean (ms)', 'p50 (ms)', 'p95 (ms)', 'Max (ms)', 'Total (ms)']
+
+    def __init__(self, recorder, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.parent_window = parent
+        self.setWindowTitle('Performance')
+        self.setMinimumSize(700, 500)
+        self.initUI()
+        self.refresh()
+
+        # Refresh while open so navigation can be watched live
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        self.record_check = QCheckBox('Record timings')
+        self.record_check.setChecked(self.recorder.enabled)
+        self.record_check.toggled.connect(self.set_recording)
+        layout.addWidget(self.record_check)
+
+        self.span_table = QTableWidget(0, len(self.COLUMNS))
+        self.span_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.span_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.span_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.span_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.span_table.verticalHeader().setVisible(False)
+        self.span_table.itemSelectionChanged.connect(self.show_histogram)
+        layout.addWidget(self.span_table)
+
+        self.histogram_view = QTextEdit()
+        self.histogram_view.setReadOnly(True)
+        self.histogram_view.setMaximumHeight(180)
+        layout.addWidget(self.histogram_view)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton('Reset')
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+        export_json_button = QPushButton('Export JSON...')
+        export_json_button.clicked.connect(lambda: self.export('json'))
+        button_layout.addWidget(export_json_button)
+        export_trace_button = QPushButton('Export Chrome Trace...')
+        export_trace_button.clicked.connect(lambda: self.export('trace'))
+        button_layout.addWidget(export_trace_button)
+        button_layout.addStretch()
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def set_recording(self, enabled):
+        if self.parent_window:
+            self.parent_window.set_performance_recording(enabled)
+        else:
+            self.recorder.enabled = enabled
+
+    def refresh(self):
+        self.summary = self.recorder.summary()
+        selected = self.selected_span()
+        self.span_table.setSortingEnabled(False)
+        self.span_table.setRowCount(len(self.summary))
+        for row, (name, stats) in enumerate(self.summary.items()):
+            values = [stats['count'], stats['mean_ms'], stats['p50_ms'],
+                      stats['p95_ms'], stats['max_ms'], stats['total_ms']]
+            self.span_table.setItem(row, 0, QTableWidgetItem(name))
+            for column, value in enumerate(values, 1):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.span_table.setItem(row, column, item)
+            if name == selected:
+                self.span_table.selectRow(row)
+        self.span_table.setSortingEnabled(True)
+        self.show_histogram()
+
+    def selected_span(self):
+        items = self.span_table.selectedItems()
+        return self.span_table.item(items[0].row(), 0).text() if items else None
+
+    def show_histogram(self):
+        name = self.selected_span()
+        if name not in self.summary:
+            self.histogram_view.setPlainText('Select a span to see its duration histogram.')
+            return
+        buckets = self.summary[name]['buckets']
+        largest = max(buckets.values()) or 1
+        lines = [f"{name}: {self.summary[name]['count']} spans"]
+        for label, count in buckets.items():
+            bar = '#' * round(40 * count / largest)
+            lines.append(f"{label:>10} {count:>7} {bar}")
+        self.histogram_view.setPlainText('\n'.join(lines))
+
+    def reset(self):
+        self.recorder.reset()
+        self.refresh()
+
+    def export(self, kind):
+        if kind == 'trace':
+            caption, default_name, data = 'Export Chrome Trace', 'webcrawler-trace.json', self.recorder.to_chrome_trace()
+        else:
+            caption, default_name, data = 'Export Timings', 'webcrawler-timings.json', self.recorder.to_json()
+        filepath, _ = QFileDialog.getSaveFileName(self, caption,
+                                                  os.path.join(os.path.expanduser('~'), default_name),
+                                                  'JSON files (*.json)')
+        if not filepath:
+            return
+        try:
+            with open(filepath, 'w') as f:
+                json.dump(data, f)
+        except OSError as e:
+            QMessageBox.warning(self, 'Export Failed', f'Could not write {filepath}:\n{e}')
+
+    def done(self, result):
+        self.refresh_timer.stop()
+        super().done(result)
+
+class SnapshotDiffThread(QThread):
+    rows_ready = pyqtSignal(list)  # batches of (change, path, old_row, new_row)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, old_path, new_path, max_rows=20000, output_path=None):
+        super().__init__()
+        self.old_path = old_path
+        self.new_path = new_path
+        self.max_rows = max_rows
+        self.output_path = output_path
+        self.counts = {'added': 0, 'removed': 0, 'changed': 0}
+
+    def run(self):
+        try:
+            with perf_recorder.span('snapshot.diff'):
+                if self.output_path:
+                    self.counts = export_diff(self.old_path, self.new_path, self.output_path)
+                else:
+                    self.collect()
+            summary = (f"{self.counts['added']} added, {self.counts['changed']} changed, "
+                       f"{self.counts['removed']} removed")
+            self.finished.emit(True, summary)
+        except (OSError, EOFError, ValueError) as e:
+            self.finished.emit(False, f"Diff failed: {str(e)}")
+
+    def collect(self):
+        """Count every change, sending only the first max_rows to the view"""
+        _, old_rows = read_snapshot(self.old_path)
+        _, new_rows = read_snapshot(self.new_path)
+        batch = []
+        shown = 0
+        for entry in diff_snapshots(old_rows, new_rows):
+            self.counts[entry[0]] += 1
+            if shown < self.max_rows:
+                batch.append(entry)
+                shown += 1
+                if len(batch) >= 1000:
+                    self.rows_ready.emit(batch)
+                    batch = []
+        if batch:
+            self.rows_ready.emit(batch)
+
+class SnapshotDiffDialog(QDialog):
+    """Compare two snapshots of a directory tree"""
+    COLUMNS = ['Change', 'Path', 'Old Size', 'New Size', 'Old Modified', 'New Modified']
+    MAX_ROWS = 20000
+
+    def __init__(self, snapshots, parent=None):
+        super().__init__(parent)
+        self.snapshots = snapshots
+        self.diff_thread = None
+        self.setWindowTitle('Compare Snapshots')
+        self.setMinimumSize(800, 500)
+        self.initUI()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        picker_layout = QGridLayout()
+        self.old_combo = QComboBox()
+        self.new_combo = QComboBox()
+        for filepath in self.snapshots:
+            label = self.snapshot_label(filepath)
+            self.old_combo.addItem(label, filepath)
+            self.new_combo.addItem(label, filepath)
+        # Default to the two most recent snapshots
+        self.old_combo.setCurrentIndex(max(0, len(self.snapshots) - 2))
+        self.new_combo.setCurrentIndex(len(self.snapshots) - 1)
+        picker_layout.addWidget(QLabel('Older:'), 0, 0)
+        picker_layout.addWidget(self.old_combo, 0, 1)
+        picker_layout.addWidget(QLabel('Newer:'), 1, 0)
+        picker_layout.addWidget(self.new_combo, 1, 1)
+        layout.addLayout(picker_layout)
+
+        self.summary_label = QLabel('Choose two snapshots and press Compare.')
+        layout.addWidget(self.summary_label)
+
+        self.diff_table = QTableWidget(0, len(self.COLUMNS))
+        self.diff_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.diff_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.diff_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.diff_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.diff_table)
+
+        button_layout = QHBoxLayout()
+        self.compare_button = QPushButton('Compare')
+        self.compare_button.clicked.connect(self.compare)
+        button_layout.addWidget(self.compare_button)
+        self.export_button = QPushButton('Export...')
+        self.export_button.clicked.connect(self.export)
+        button_layout.addWidget(self.export_button)
+        button_layout.addStretch()
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def snapshot_label(self, filepath):
+        name = os.path.basename(filepath)[:-len('.snap.gz')]
+        try:
+            return time.strftime('%Y-%m-%d %H:%M:%S', time.strptime(name, '%Y%m%d-%H%M%S'))
+        except ValueError:
+            return name
+
+    def format_row_values(self, row):
+        if row is None:
+            return '', ''
+        size = '' if row[2] is None else f"{row[2]:,}"
+        modified = '' if row[3] is None else time.strftime('%Y-%m-%d %H:%M', time.gmtime(row[3]))
+        return size, modified
+
+    def start_thread(self, output_path=None):
+        if self.diff_thread and self.diff_thread.isRunning():
+            return
+        self.compare_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.summary_label.setText('Exporting...' if output_path else 'Comparing...')
+        self.diff_thread = SnapshotDiffThread(self.old_combo.currentData(), self.new_combo.currentData(),
+                                              self.MAX_ROWS, output_path)
+        self.diff_thread.rows_ready.connect(self.add_rows)
+        self.diff_thread.finished.connect(self.diff_finished)
+        self.diff_thread.start()
+
+    def compare(self):
+        self.diff_table.setRowCount(0)
+        self.start_thread()
+
+    def add_rows(self, entries):
+        start = self.diff_table.rowCount()
+        self.diff_table.setRowCount(start + len(entries))
+        for offset, (change, path, old_row, new_row) in enumerate(entries):
+            old_size, old_modified = self.format_row_values(old_row)
+            new_size, new_modified = self.format_row_values(new_row)
+            for column, value in enumerate([change, path, old_size, new_size, old_modified, new_modified]):
+                self.diff_table.setItem(start + offset, column, QTableWidgetItem(value))
+
+    def diff_finished(self, success, message):
+        self.compare_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+        if success and self.diff_thread.output_path:
+            message += f" - written to {self.diff_thread.output_path}"
+        elif success and sum(self.diff_thread.counts.values()) > self.MAX_ROWS:
+            message += f" (showing the first {self.MAX_ROWS}, export for all)"
+        self.summary_label.setText(message)
+
+    def export(self):
+        filepath, _ = QFileDialog.getSaveFileName(self, 'Export Differences',
+                                                  os.path.join(os.path.expanduser('~'), 'snapshot-diff.csv'),
+                                                  'CSV files (*.csv);;JSON Lines (*.jsonl)')
+        if filepath:
+            self.start_thread(filepath)
+
+    def done(self, result):
+        if self.diff_thread and self.diff_thread.isRunning():
+            self.diff_thread.wait()
+        super().done(result)
+
+class SettingsDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent_window = parent
+        self.setWindowTitle('WebCrawler Settings')
+        self.setModal(True)
+        self.setMinimumSize(400, 300)
+        self.initUI()
+        
+    def initUI(self):
+        layout = QVBoxLayout()
+        
+        # Font settings
+        font_group = QFrame()
+        font_layout = QGridLayout()
+        
+        font_layout.addWidget(QLabel('Font Family:'), 0, 0)
+        self.font_combo = QComboBox()
+        font_layout.addWidget(self.font_combo, 0, 1)
+        
+        font_layout.addWidget(QLabel('Font Size:'), 1, 0)
+        self.font_size_spin = QSpinBox()
+        self.font_size_spin.setRange(8, 72)
+        self.font_size_spin.setValue(12)
+        font_layout.addWidget(self.font_size_spin, 1, 1)
+        
+        self.font_dialog_button = QPushButton('Choose Font...')
+        self.font_dialog_button.clicked.connect(self.open_font_dialog)
+        font_layout.addWidget(self.font_dialog_button, 2, 0, 1, 2)
+        
+        # Now populate fonts AFTER widgets are created
+        self.populate_fonts()
+        
+        font_group.setLayout(font_layout)
+        layout.addWidget(QLabel('Font Settings'))
+        layout.addWidget(font_group)
+        
+        # View settings
+        view_group = QFrame()
+        view_layout = QVBoxLayout()
+        
+        self.show_tree_check = QCheckBox('Show Directory Tree')
+        self.show_tree_check.setChecked(True)
+        view_layout.addWidget(self.show_tree_check)
+        
+        self.show_info_check = QCheckBox('Show File Information Panel')
+        self.show_info_check.setChecked(True)
+        view_layout.addWidget(self.show_info_check)
+        
+        self.show_toolbar_check = QCheckBox('Show Toolbar')
+        self.show_toolbar_check.setChecked(True)
+        view_layout.addWidget(self.show_toolbar_check)
+        
+        self.show_statusbar_check = QCheckBox('Show Status Bar')
+        self.show_statusbar_check.setChecked(True)
+        view_layout.addWidget(self.show_statusbar_check)
+        
+        view_group.setLayout(view_layout)
+        layout.addWidget(QLabel('View Settings'))
+        layout.addWidget(view_group)
+        
+        # Preview settings
+        preview_group = QFrame()
+        preview_layout = QVBoxLayout()
+        
+        self.show_image_preview_check = QCheckBox('Enable Image Preview')
+        self.show_image_preview_check.setChecked(False)
+        preview_layout.addWidget(self.show_image_preview_check)
+        
+        self.show_text_preview_check = QCheckBox('Enable Text File Preview')
+        self.show_text_preview_check.setChecked(False)
+        preview_layout.addWidget(self.show_text_preview_check)
+        
+        preview_group.setLayout(preview_layout)
+        layout.addWidget(QLabel('Preview Settings'))
+        layout.addWidget(preview_group)
+        
+        # Download settings
+        download_group = QFrame()
+        download_layout = QGridLayout()
+        
+        download_layout.addWidget(QLabel('Default Download Path:'), 0, 0)
+        self.download_path_edit = QLineEdit()
+        self.download_path_edit.setText(os.path.join(os.path.expanduser('~'), 'Downloads'))
+        download_layout.addWidget(self.download_path_edit, 0, 1)
+        
+        self.browse_download_path_button = QPushButton('Browse...')
+        self.browse_download_path_button.clicked.connect(self.browse_download_path)
+        download_layout.addWidget(self.browse_download_path_button, 0, 2)
+        
+        download_group.setLayout(download_layout)
+        layout.addWidget(QLabel('Download Settings'))
+        layout.addWidget(download_group)
+        
+        # Content index settings
+        index_group = QFrame()
+        index_layout = QGridLayout()
+        
+        index_layout.addWidget(QLabel('Max Indexed File Size (KB):'), 0, 0)
+        self.index_max_size_spin = QSpinBox()
+        self.index_max_size_spin.setRange(1, 1024 * 1024)
+        self.index_max_size_spin.setValue(1024)
+        index_layout.addWidget(self.index_max_size_spin, 0, 1)
+        
+        index_layout.addWidget(QLabel('Indexing Bandwidth Limit (KB/s, 0 = unlimited):'), 1, 0)
+        self.index_bandwidth_spin = QSpinBox()
+        self.index_bandwidth_spin.setRange(0, 1024 * 1024)
+        self.index_bandwidth_spin.setValue(0)
+        index_layout.addWidget(self.index_bandwidth_spin, 1, 1)
+        
+        index_group.setLayout(index_layout)
+        layout.addWidget(QLabel('Content Index Settings'))
+        layout.addWidget(index_group)
+        
+        # Network settings
+        network_group = QFrame()
+        network_layout = QGridLayout()
+        
+        network_layout.addWidget(QLabel('HTTP Engine:'), 0, 0)
+        self.http_engine_combo = QComboBox()
+        self.http_engine_combo.addItem('Threads (requests)', 'threads')
+        self.http_engine_combo.addItem('Asyncio (httpx)' if HTTPX_AVAILABLE else 'Asyncio (install httpx)', 'asyncio')
+        if not HTTPX_AVAILABLE:
+            self.http_engine_combo.model().item(1).setEnabled(False)
+        self.http_engine_combo.setToolTip('Used by listings, previews, crawls, downloads, the directory tree, '
+                                          'watch polls and HEAD enrichment')
+        network_layout.addWidget(self.http_engine_combo, 0, 1)
+        
+        self.http2_check = QCheckBox('Use HTTP/2 when the server supports it' if HTTP2_AVAILABLE
+                                     else 'Use HTTP/2 (install h2)')
+        self.http2_check.setEnabled(HTTP2_AVAILABLE)
+        network_layout.addWidget(self.http2_check, 1, 0, 1, 2)
+        
+        network_layout.addWidget(QLabel('Concurrent Listing Fetches (crawls):'), 2, 0)
+        self.crawl_concurrency_spin = QSpinBox()
+        self.crawl_concurrency_spin.setRange(1, 256)
+        self.crawl_concurrency_spin.setValue(16)
+        network_layout.addWidget(self.crawl_concurrency_spin, 2, 1)
+        
+        network_layout.addWidget(QLabel('Concurrent Downloads:'), 3, 0)
+        self.download_concurrency_spin = QSpinBox()
+        self.download_concurrency_spin.setRange(1, 64)
+        self.download_concurrency_spin.setValue(4)
+        network_layout.addWidget(self.download_concurrency_spin, 3, 1)
+        
+        network_layout.addWidget(QLabel('Visited Set (crawls):'), 4, 0)
+        self.crawl_visited_combo = QComboBox()
+        self.crawl_visited_combo.addItem('Exact URLs', 'exact')
+        self.crawl_visited_combo.addItem('64-bit URL hashes', 'hashed')
+        self.crawl_visited_combo.addItem('Bloom filter (fixed memory)', 'bloom')
+        network_layout.addWidget(self.crawl_visited_combo, 4, 1)
+        
+        self.crawl_checkpoints_check = QCheckBox('Checkpoint crawls so they can be resumed')
+        self.crawl_checkpoints_check.setChecked(True)
+        network_layout.addWidget(self.crawl_checkpoints_check, 5, 0, 1, 2)
+        
+        network_layout.addWidget(QLabel('Back/Forward Page Cache (MB, 0 = off):'), 6, 0)
+        self.page_cache_spin = QSpinBox()
+        self.page_cache_spin.setRange(0, 4096)
+        self.page_cache_spin.setValue(64)
+        network_layout.addWidget(self.page_cache_spin, 6, 1)
+        if self.parent_window is not None:
+            network_layout.addWidget(QLabel(f'In use: {self.parent_window.page_cache.usage()}'), 7, 0, 1, 2)
+        
+        self.enrich_visible_check = QCheckBox('Fetch exact sizes of visible files with HEAD requests')
+        self.enrich_visible_check.setChecked(False)
+        network_layout.addWidget(self.enrich_visible_check, 8, 0, 1, 2)
+        
+        network_layout.addWidget(QLabel('HEAD Requests per Second:'), 9, 0)
+        self.enrich_rate_spin = QSpinBox()
+        self.enrich_rate_spin.setRange(1, 1000)
+        self.enrich_rate_spin.setValue(10)
+        network_layout.addWidget(self.enrich_rate_spin, 9, 1)
+        
+        network_group.setLayout(network_layout)
+        layout.addWidget(QLabel('Network Settings (engine changes apply after restart)'))
+        layout.addWidget(network_group)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        
+        self.apply_button = QPushButton('Apply')
+        self.apply_button.clicked.connect(self.apply_settings)
+        button_layout.addWidget(self.apply_button)
+        
+        self.ok_button = QPushButton('OK')
+        self.ok_button.clicked.connect(self.accept_settings)
+        button_layout.addWidget(self.ok_button)
+        
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        
+    def populate_fonts(self):
+        font_db = QFontDatabase
+        families = font_db.families()
+        self.font_combo.addItems(families)
+        
+        # Try to set current font
+        if self.parent_window:
+            current_font = self.parent_window.custom_font
+            index = self.font_combo.findText(current_font.family())
+            if index >= 0:
+                self.font_combo.setCurrentIndex(index)
+            self.font_size_spin.setValue(current_font.pointSize())
+            
+    def open_font_dialog(self):
+        current_font = QFont(self.font_combo.currentText(), self.font_size_spin.value())
+        font, ok = QFontDialog.getFont(current_font, self)
+        if ok:
+            self.font_combo.setCurrentText(font.family())
+            self.font_size_spin.setValue(font.pointSize())
+            
+    def load_settings(self, settings):
+        if 'font_family' in settings:
+            index = self.font_combo.findText(settings['font_family'])
+            if index >= 0:
+                self.font_combo.setCurrentIndex(index)
+        if 'font_size' in settings:
+            self.font_size_spin.setValue(settings['font_size'])
+        if 'show_tree' in settings:
+            self.show_tree_check.setChecked(settings['show_tree'])
+        if 'show_info' in settings:
+            self.show_info_check.setChecked(settings['show_info'])
+        if 'show_toolbar' in settings:
+            self.show_toolbar_check.setChecked(settings['show_toolbar'])
+        if 'show_statusbar' in settings:
+            self.show_statusbar_check.setChecked(settings['show_statusbar'])
+        if 'show_image_preview' in settings:
+            self.show_image_preview_check.setChecked(settings['show_image_preview'])
+        if 'show_text_preview' in settings:
+            self.show_text_preview_check.setChecked(settings['show_text_preview'])
+        if 'default_download_path' in settings:
+            self.download_path_edit.setText(settings['default_download_path'])
+        if 'index_max_file_size_kb' in settings:
+            self.index_max_size_spin.setValue(settings['index_max_file_size_kb'])
+        if 'index_bandwidth_limit_kbps' in settings:
+            self.index_bandwidth_spin.setValue(settings['index_bandwidth_limit_kbps'])
+        if 'http_engine' in settings:
+            index = self.http_engine_combo.findData(settings['http_engine'])
+            if index >= 0:
+                self.http_engine_combo.setCurrentIndex(index)
+        if 'http2' in settings:
+            self.http2_check.setChecked(settings['http2'])
+        if 'crawl_concurrency' in settings:
+            self.crawl_concurrency_spin.setValue(settings['crawl_concurrency'])
+        if 'download_concurrency' in settings:
+            self.download_concurrency_spin.setValue(settings['download_concurrency'])
+        if 'crawl_visited_set' in settings:
+            index = self.crawl_visited_combo.findData(settings['crawl_visited_set'])
+            if index >= 0:
+                self.crawl_visited_combo.setCurrentIndex(index)
+        if 'crawl_checkpoints' in settings:
+            self.crawl_checkpoints_check.setChecked(settings['crawl_checkpoints'])
+        if 'page_cache_mb' in settings:
+            self.page_cache_spin.setValue(settings['page_cache_mb'])
+        if 'enrich_visible' in settings:
+            self.enrich_visible_check.setChecked(settings['enrich_visible'])
+        if 'enrich_rate' in settings:
+            self.enrich_rate_spin.setValue(settings['enrich_rate'])
+    
+    def browse_download_path(self):
+        """Browse for download directory"""
+        directory = QFileDialog.getExistingDirectory(
+            self, 
+            'Select Download Directory',
+            self.download_path_edit.text()
+        )
+        if directory:
+            self.download_path_edit.setText(directory)
+            
+    def get_settings(self):
+        return {
+            'font_family': self.font_combo.currentText(),
+            'font_size': self.font_size_spin.value(),
+            'show_tree': self.show_tree_check.isChecked(),
+            'show_info': self.show_info_check.isChecked(),
+            'show_toolbar': self.show_toolbar_check.isChecked(),
+            'show_statusbar': self.show_statusbar_check.isChecked(),
+            'show_image_preview': self.show_image_preview_check.isChecked(),
+            'show_text_preview': self.show_text_preview_check.isChecked(),
+            'default_download_path': self.download_path_edit.text(),
+            'index_max_file_size_kb': self.index_max_size_spin.value(),
+            'index_bandwidth_limit_kbps': self.index_bandwidth_spin.value(),
+            'http_engine': self.http_engine_combo.currentData(),
+            'http2': self.http2_check.isChecked(),
+            'crawl_concurrency': self.crawl_concurrency_spin.value(),
+            'download_concurrency': self.download_concurrency_spin.value(),
+            'crawl_visited_set': self.crawl_visited_combo.currentData(),
+            'crawl_checkpoints': self.crawl_checkpoints_check.isChecked(),
+            'page_cache_mb': self.page_cache_spin.value(),
+            'enrich_visible': self.enrich_visible_check.isChecked(),
+            'enrich_rate': self.enrich_rate_spin.value()
+        }
+        
+    def apply_settings(self):
+        if self.parent_window:
+            self.parent_window.apply_settings(self.get_settings())
+            
+    def accept_settings(self):
         self.apply_settings()
         self.accept()
 
-class DownloadThread(QThread):
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(bool, str)
-    
-    def __init__(self, url, filepath):
-        super().__init__()
-        self.url = url
-        self.filepath = filepath
-        
-    def run(self):
-        try:
-            response = requests.get(self.url, stream=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(self.filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress_percent = int((downloaded / total_size) * 100)
-                            self.progress.emit(progress_percent)
-                        
-            self.finished.emit(True, f"Downloaded successfully to {self.filepath}")
-        except Exception as e:
-            self.finished.emit(False, f"Download failed: {str(e)}")
+FSYNC_POLICIES = {
+    'never': 'Never (leave it to the OS)',
+    'close': 'When each file is complete',
+    'interval': 'Every 64 MB and when complete',
+}
+
+class DownloadFile:
+    """Target file of a download
+
+    The file is preallocated with posix_fallocate when the size is known,
+    so large images are not grown (and fragmented) chunk by chunk. It is
+    synced to disk according to fsync_policy, one of FSYNC_POLICIES.
+    """
+    FSYNC_INTERVAL = 64 * 1024 * 1024
+
+    def __init__(self, filepath, total_size=0, fsync_policy='never'):
+        self.fsync_policy = fsync_policy
+        self.total_size = total_size
+        self.written = 0
+        self.unsynced = 0
+        self.fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+        self.preallocated = False
+        if total_size > 0 and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self.fd, 0, total_size)
+                self.preallocated = True
+            except OSError:
+                # Not supported by every filesystem; the file just grows as written
+                pass
+
+    def write(self, data):
+        """Write all of data (bytes or a memoryview)"""
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+        self.written += len(data)
+        self.unsynced += len(data)
+        if self.fsync_policy == 'interval' and self.unsynced >= self.FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        getattr(os, 'fdatasync', os.fsync)(self.fd)
+        self.unsynced = 0
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            # A transfer that ended early must not leave preallocated zeros behind
+            if self.preallocated and self.written != self.total_size:
+                os.ftruncate(self.fd, self.written)
+            if self.fsync_policy != 'never' and self.unsynced:
+                self.sync()
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def stream_response_to_file(response, output, progress_callback=None, buffer_size=1024 * 1024):
+    """Copy the body of a streamed requests response into a DownloadFile
+
+    Bodies without a Content-Encoding are read from the connection with
+    readinto() into one reused buffer, so no bytes object is allocated per
+    chunk; encoded bodies go through iter_content() to be decoded.
+    progress_callback(downloaded, total_size) is called after each write.
+    Raises ChunkedEncodingError when the connection closes before
+    Content-Length bytes arrived, as iter_content() does.
+    """
+    total_size = output.total_size
+    # http.client response under urllib3's, whose own readinto() copies
+    connection_stream = getattr(response.raw, '_fp', None)
+    encoding = response.headers.get('Content-Encoding', 'identity').lower()
+    if encoding in ('', 'identity') and hasattr(connection_stream, 'readinto'):
+        buffer = memoryview(bytearray(buffer_size))
+        while True:
+            count = connection_stream.readinto(buffer)
+            if not count:
+                break
+            output.write(buffer[:count])
+            HTTP_BYTES.inc(count, kind='download')
+            if progress_callback:
+                progress_callback(output.written, total_size)
+        # Reading below urllib3 skips its check that the whole body arrived
+        if total_size and output.written != total_size:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Connection closed after {output.written} of {total_size} bytes")
+    else:
+        for chunk in response.iter_content(chunk_size=buffer_size):
+            output.write(chunk)
+            HTTP_BYTES.inc(len(chunk), kind='download')
+            if progress_callback:
+                progress_callback(output.written, total_size)
+    return output.written
+
+def download_to_file(url, filepath, progress_callback=None, fsync_policy='never', session=None):
+    """GET url into filepath through the preallocated, copy-free write path; returns the bytes written"""
+    if split_archive_url(url):
+        return download_archive_member(url, filepath, progress_callback, fsync_policy)
+    response = (session or requests).get(url, stream=True, timeout=30, hooks=request_hooks('download'))
+    try:
+        response.raise_for_status()
+        # With a Content-Encoding the length is of the encoded body, so don't preallocate
+        encoded = response.headers.get('Content-Encoding', 'identity').lower() not in ('', 'identity')
+        total_size = 0 if encoded else int(response.headers.get('content-length', 0) or 0)
+        with DownloadFile(filepath, total_size, fsync_policy) as output:
+            return stream_response_to_file(response, output, progress_callback)
+    finally:
+        response.close()
+
+# Archives that can be extracted while they download, as (suffix, container,
+# compression). tar and the single-file compressors are read strictly
+# forward; .7z and .zip keep their index at the end, so they can't be.
+STREAM_EXTRACT_SUFFIXES = [
+    ('.tar.gz', 'tar', 'gz'), ('.tgz', 'tar', 'gz'),
+    ('.tar.xz', 'tar', 'xz'), ('.txz', 'tar', 'xz'), ('.tar.lzma', 'tar', 'xz'),
+    ('.tar.bz2', 'tar', 'bz2'), ('.tbz2', 'tar', 'bz2'), ('.tbz', 'tar', 'bz2'),
+    ('.tar', 'tar', ''),
+    ('.gz', 'file', 'gz'), ('.xz', 'file', 'xz'), ('.lzma', 'file', 'xz'), ('.bz2', 'file', 'bz2'),
+]
+
+# Compressed chunks read from the network, and how many may wait for the extractor
+EXTRACT_CHUNK_SIZE = 256 * 1024
+EXTRACT_QUEUE_CHUNKS = 32
+
+# Checksum files a mirror may publish next to its archives
+CHECKSUM_FILE_NAMES = ['SHA256SUMS', 'SHA256SUMS.txt', 'sha256sums.txt', 'sha256sum.txt']
+
+def stream_extract_kind(filename):
+    """(container, compression, name without the suffix) for a streamable archive, else None"""
+    lower = filename.lower()
+    for suffix, container, compression in STREAM_EXTRACT_SUFFIXES:
+        if lower.endswith(suffix) and len(filename) > len(suffix):
+            return container, compression, filename[:-len(suffix)]
+    return None
+
+def checksum_url_for(items, name):
+    """URL of the listed SHA-256 file covering name, or None"""
+    urls = {item['name']: item['url'] for item in items if item.get('type') == 'file'}
+    for candidate in [name + '.sha256', name + '.sha256sum'] + CHECKSUM_FILE_NAMES:
+        if candidate in urls:
+            return urls[candidate]
+    return None
+
+def parse_sha256_file(text, name):
+    """Expected digest of name from sha256sum, BSD or single-digest file contents"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines:
+        # BSD style: SHA256 (name) = digest
+        match = re.match(r'SHA256 \((.+)\) = ([0-9a-fA-F]{64})$', line)
+        if match and os.path.basename(match.group(1)) == name:
+            return match.group(2).lower()
+        # GNU style: digest, then name (with * in binary mode)
+        parts = line.split(None, 1)
+        if len(parts) == 2 and re.fullmatch(r'[0-9a-fA-F]{64}', parts[0]):
+            if os.path.basename(parts[1].lstrip('*')) == name:
+                return parts[0].lower()
+    # A file.sha256 next to the archive may hold just the digest
+    if len(lines) == 1 and re.fullmatch(r'[0-9a-fA-F]{64}', lines[0].split()[0]):
+        return lines[0].split()[0].lower()
+    return None
+
+class ChunkQueueReader:
+    """Read-only file object over byte chunks another thread puts on a queue
+
+    None ends the stream; an exception put on the queue is raised by read().
+    """
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.chunk = b''
+        self.offset = 0
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while self.offset >= len(self.chunk):
+            if self.eof:
+                return b''
+            chunk = self.chunks.get()
+            if chunk is None or isinstance(chunk, BaseException):
+                self.eof = True
+                if chunk is not None:
+                    raise chunk
+                return b''
+            self.chunk, self.offset = chunk, 0
+        # Short reads are fine for the decompressors and tarfile
+        if self.offset == 0 and (size is None or size < 0 or size >= len(self.chunk)):
+            data = self.chunk
+        else:
+            end = len(self.chunk) if size is None or size < 0 else self.offset + size
+            data = self.chunk[self.offset:end]
+        self.offset += len(data)
+        return data
+
+def extract_stream(stream, container, compression, target, fsync_policy='never'):
+    """Decompress stream into the file target, or unpack its tar into the directory target"""
+    # Imported on first use to keep it off the startup path
+    if compression == 'gz':
+        import gzip
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    elif compression == 'xz':
+        import lzma
+        stream = lzma.LZMAFile(stream)
+    elif compression == 'bz2':
+        import bz2
+        stream = bz2.BZ2File(stream)
+    
+    if container == 'tar':
+        import tarfile
+        if not hasattr(tarfile, 'data_filter'):
+            raise RuntimeError('Extracting tar archives safely needs a Python with tarfile extraction filters')
+        os.makedirs(target, exist_ok=True)
+        # 'r|' reads the members in order without seeking
+        with tarfile.open(fileobj=stream, mode='r|') as archive:
+            archive.extractall(target, filter='data')
+    else:
+        with DownloadFile(target, 0, fsync_policy) as output:
+            while True:
+                data = stream.read(EXTRACT_CHUNK_SIZE)
+                if not data:
+                    break
+                output.write(data)
+
+def move_into_place(source, target):
+    """Move an extracted file or tree to target, merging a tree into an existing directory"""
+    if not (os.path.isdir(source) and os.path.isdir(target)):
+        os.replace(source, target)
+        return
+    for root, dirs, files in os.walk(source):
+        destination = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(destination, exist_ok=True)
+        # Symlinks to directories are listed in dirs, but are moved like files
+        links = [name for name in dirs if os.path.islink(os.path.join(root, name))]
+        dirs[:] = [name for name in dirs if name not in links]
+        for name in files + links:
+            os.replace(os.path.join(root, name), os.path.join(destination, name))
+
+def download_and_extract(url, filepath, progress_callback=None, fsync_policy='never',
+                         expected_sha256=None, session=None):
+    """Extract the archive at url while it downloads; filepath is where it would be saved
+
+    The network is read in this thread and the compressed chunks are handed
+    to a worker thread that decompresses and unpacks them, so transfer and
+    decompression overlap. The SHA-256 is computed over the compressed
+    stream as received, and checked against expected_sha256 when given.
+    Output is unpacked into a hidden staging directory next to the target
+    and moved into place only once the whole archive arrived and verified;
+    on any failure it is removed. Returns (compressed bytes, hex digest,
+    extracted path).
+    """
+    # Imported on first use to keep it off the startup path
+    import hashlib
+    import queue
+    import shutil
+    import tempfile
+    from urllib3.exceptions import ProtocolError
+    
+    container, compression, target = stream_extract_kind(filepath)
+    parent = os.path.dirname(os.path.abspath(target))
+    os.makedirs(parent, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f'.{os.path.basename(target)}.', suffix='.partial', dir=parent)
+    staged = os.path.join(staging_dir, os.path.basename(target))
+    chunks = queue.Queue(maxsize=EXTRACT_QUEUE_CHUNKS)
+    done = threading.Event()
+    errors = []
+    
+    def extract():
+        try:
+            extract_stream(ChunkQueueReader(chunks), container, compression, staged, fsync_policy)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            done.set()
+    
+    def hand_over(chunk):
+        # Once the extractor has stopped reading nobody drains the queue
+        while not done.is_set():
+            try:
+                chunks.put(chunk, timeout=0.2)
+                return
+            except queue.Full:
+                pass
+    
+    try:
+        worker = threading.Thread(target=extract, name='extract', daemon=True)
+        worker.start()
+        digest = hashlib.sha256()
+        received = 0
+        end_of_stream = None
+        try:
+            response = (session or requests).get(url, stream=True, timeout=30, headers={'Accept-Encoding': 'identity'},
+                                                 hooks=request_hooks('download'))
+            try:
+                response.raise_for_status()
+                total_size = int(response.headers.get('content-length', 0) or 0)
+                # The raw body is the archive as stored, whatever Content-Encoding claims
+                try:
+                    for chunk in response.raw.stream(EXTRACT_CHUNK_SIZE, decode_content=False):
+                        digest.update(chunk)
+                        received += len(chunk)
+                        HTTP_BYTES.inc(len(chunk), kind='download')
+                        # Past the end of a tar the extractor is done, but the rest still counts for the hash
+                        hand_over(chunk)
+                        if errors:
+                            break
+                        if progress_callback and total_size > 0:
+                            progress_callback(received, total_size)
+                except ProtocolError as e:
+                    # Raised as iter_content() would, so the callers' RequestException handlers see it
+                    raise requests.exceptions.ChunkedEncodingError(e) from e
+            finally:
+                response.close()
+        except Exception as e:
+            end_of_stream = e
+            raise
+        finally:
+            hand_over(end_of_stream)
+            worker.join()
+        
+        if errors:
+            raise errors[0]
+        hexdigest = digest.hexdigest()
+        if expected_sha256 and hexdigest != expected_sha256.lower():
+            raise ValueError(f"SHA-256 mismatch for {os.path.basename(filepath)}: "
+                             f"expected {expected_sha256.lower()}, got {hexdigest}")
+        move_into_place(staged, target)
+    finally:
+        # Holds nothing after a successful move, and the unverified output after a failure
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return received, hexdigest, target
+
+class RangeNotSupported(requests.RequestException):
+    """The server sent a whole file (or a changed one) where a byte range was asked for"""
+
+class RemoteRangeFile:
+    """Seekable, read-only file object over HTTP Range requests
+
+    Opening fetches the tail of the file, where archive indexes live, and
+    learns the size from Content-Range in the same request. Reads that miss
+    the buffer fetch at least `readahead` bytes, doubling while the reads
+    are sequential, so streaming a member takes a few requests rather than
+    one per read. Later requests carry If-Range, so a file that changed on
+    the server fails instead of mixing old and new bytes.
+    """
+    TAIL_SIZE = 64 * 1024 + 22
+    MIN_READAHEAD = 64 * 1024
+    MAX_READAHEAD = 4 * 1024 * 1024
+
+    def __init__(self, url, session=None):
+        self.url = url
+        self.session = session or create_session()
+        self.position = 0
+        self.readahead = self.MIN_READAHEAD
+        self.requests = 0
+        self.bytes_fetched = 0
+        self.validator = None
+        
+        response = self.request(self.initial_range())
+        try:
+            content_range = re.match(r'bytes (\d+)-(\d+)/(\d+)', response.headers.get('Content-Range', ''))
+            if response.status_code == 206 and content_range:
+                self.size = int(content_range.group(3))
+                self.buffer_start = int(content_range.group(1))
+            elif response.status_code == 200 and int(response.headers.get('Content-Length', -1)) in range(self.TAIL_SIZE + 1):
+                # Small files may come whole, which is all of them anyway
+                self.size = int(response.headers['Content-Length'])
+                self.buffer_start = 0
+            else:
+                raise RangeNotSupported(f'{url} does not support byte ranges', response=response)
+            self.buffer = self.receive(response)
+        finally:
+            response.close()
+        # Weak ETags can't be used in If-Range
+        etag = response.headers.get('ETag')
+        self.validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+
+    def initial_range(self):
+        return f'bytes=-{self.TAIL_SIZE}'
+
+    def request(self, byte_range):
+        headers = {'Range': byte_range, 'Accept-Encoding': 'identity'}
+        if self.validator:
+            headers['If-Range'] = self.validator
+        response = self.session.get(self.url, headers=headers, stream=True, timeout=30, hooks=request_hooks('range'))
+        response.raise_for_status()
+        return response
+
+    def receive(self, response):
+        data = response.content
+        self.requests += 1
+        self.bytes_fetched += len(data)
+        HTTP_BYTES.inc(len(data), kind='range')
+        return data
+
+    def fetch(self, offset, length):
+        """Bytes offset to offset + length from the server"""
+        response = self.request(f'bytes={offset}-{offset + length - 1}')
+        try:
+            if response.status_code != 206:
+                raise RangeNotSupported(f'{self.url} changed on the server or ignored a byte range', response=response)
+            return self.receive(response)
+        finally:
+            response.close()
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = max(0, min(size, self.size - self.position))
+        parts = []
+        offset = self.position - self.buffer_start
+        if offset < 0 and 0 < size + offset <= len(self.buffer):
+            # Only the start is missing, as when a central directory runs into the prefetched tail
+            self.buffer = self.fetch(self.position, -offset) + self.buffer
+            self.buffer_start = self.position
+            offset = 0
+        if 0 <= offset < len(self.buffer):
+            parts.append(self.buffer[offset:offset + size])
+            self.position += len(parts[0])
+            size -= len(parts[0])
+        if size:
+            # Sequential reads grow the readahead, a jump resets it
+            if self.position == self.buffer_start + len(self.buffer):
+                self.readahead = min(self.readahead * 2, self.MAX_READAHEAD)
+            else:
+                self.readahead = self.MIN_READAHEAD
+            length = min(max(size, self.readahead), self.size - self.position)
+            self.buffer = self.fetch(self.position, length)
+            self.buffer_start = self.position
+            parts.append(self.buffer[:size])
+            self.position += len(parts[-1])
+        return b''.join(parts) if len(parts) != 1 else parts[0]
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.buffer = b''
+
+class RemoteArchive:
+    """A container file browsed in place, as directories of listing-style items
+
+    Subclasses open the remote file, yield (path, is_dir, size, mtime) from
+    entries() and return a file object for a member from open().
+    """
+    def __init__(self, url):
+        self.url = url
+        self.directories = None
+        self.sizes = {}
+
+    def member_url(self, path):
+        return f"{self.url}#/{quote(path)}"
+
+    def listing(self, inner_path):
+        """Items of the directory inner_path ('' or 'dir/sub/'), or None if there is none"""
+        if self.directories is None:
+            self.directories = self.build_directories()
+        items = self.directories.get(inner_path)
+        return list(items.values()) if items is not None else None
+
+    def member_size(self, path):
+        if self.directories is None:
+            self.directories = self.build_directories()
+        return self.sizes.get(path, 0)
+
+    def build_directories(self):
+        directories = {'': {}}
+        
+        def add_directory(path, mtime=None):
+            # Archives need not list the directories their members are in
+            if path not in directories:
+                parent, _, name = path.rstrip('/').rpartition('/')
+                parent = parent + '/' if parent else ''
+                add_directory(parent)
+                directories[path] = {}
+                directories[parent][name + '/'] = self.make_item(path, name + '/', 'directory', None, mtime)
+        
+        for path, is_dir, size, mtime in self.entries():
+            path = path.lstrip('/')
+            if not path.rstrip('/'):
+                continue
+            if is_dir:
+                add_directory(path.rstrip('/') + '/', mtime)
+                continue
+            parent, _, name = path.rpartition('/')
+            parent = parent + '/' if parent else ''
+            add_directory(parent)
+            self.sizes[path] = size
+            directories[parent][name] = self.make_item(path, name, 'file', size, mtime)
+        return directories
+
+    def make_item(self, path, name, item_type, size, mtime):
+        url = self.member_url(path)
+        return {
+            'type': item_type,
+            # Absolute, so urljoin() against the archive page keeps the fragment
+            'href': url,
+            'url': url,
+            'name': name,
+            'size': format_size(size) if item_type == 'file' else '',
+            'modified': time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime)) if mtime else '',
+            'is_web_file': False,
+            'size_bytes': size,
+            'mtime': mtime,
+            # Sizes come from the archive index, so there is nothing to HEAD
+            'exact_size': item_type == 'file',
+            'archive': self.url,
+        }
+
+    def transfer_summary(self):
+        return f"{self.file.bytes_fetched / 1024:.1f} KB in {self.file.requests} requests"
+
+class RemoteZipArchive(RemoteArchive):
+    """ZIP (and APK/JAR) archive read through its central directory
+
+    zipfile finds the end-of-central-directory record in the prefetched
+    tail, reads the central directory in one more range at most, and reads
+    a member's local header and data only when it is opened.
+    """
+    def __init__(self, url, session=None):
+        super().__init__(url)
+        # Imported on first use to keep it off the startup path
+        import zipfile
+        self.file = RemoteRangeFile(url, session)
+        try:
+            self.zip = zipfile.ZipFile(self.file)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f'{unquote(os.path.basename(urlparse(url).path))} is not a ZIP archive: {e}')
+
+    def entries(self):
+        for info in self.zip.infolist():
+            try:
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+            except (OverflowError, ValueError):
+                mtime = None
+            yield info.filename, info.is_dir(), info.file_size, mtime
+
+    def open(self, path):
+        return self.zip.open(path)
+
+class RemoteBlockFile(RemoteRangeFile):
+    """RemoteRangeFile reading through an LRU cache of fixed-size blocks
+
+    Opening fetches the head of the file instead of the tail. The blocks a
+    read needs that are not cached are fetched with one range per run of
+    adjacent missing blocks, and read_at() may be called from several
+    threads. Reads of STREAM_SIZE or more go past the cache, so copying a
+    large member out doesn't evict the blocks holding directories.
+    """
+    BLOCK_SIZE = 64 * 1024
+    STREAM_SIZE = 1024 * 1024
+
+    def __init__(self, url, session=None, cache_bytes=16 * 1024 * 1024):
+        self.blocks = OrderedDict()
+        self.max_blocks = max(cache_bytes // self.BLOCK_SIZE, 16)
+        self.lock = threading.Lock()
+        super().__init__(url, session)
+        # The first response seeds the cache
+        self.store(self.buffer_start, self.buffer)
+        self.buffer = b''
+
+    def initial_range(self):
+        return f'bytes=0-{self.BLOCK_SIZE - 1}'
+
+    def store(self, start, data):
+        """Cache data fetched from the block-aligned offset start"""
+        for offset in range(0, len(data), self.BLOCK_SIZE):
+            block = data[offset:offset + self.BLOCK_SIZE]
+            # Only whole blocks, or the last one of the file
+            if len(block) == self.BLOCK_SIZE or start + offset + len(block) == self.size:
+                index = (start + offset) // self.BLOCK_SIZE
+                self.blocks[index] = block
+                self.blocks.move_to_end(index)
+        while len(self.blocks) > self.max_blocks:
+            self.blocks.popitem(last=False)
+
+    def load_blocks(self, first, last):
+        """Make sure blocks first to last are cached; call with the lock held"""
+        missing = [index for index in range(first, last + 1) if index not in self.blocks]
+        start = 0
+        while start < len(missing):
+            end = start
+            while end + 1 < len(missing) and missing[end + 1] == missing[end] + 1:
+                end += 1
+            offset = missing[start] * self.BLOCK_SIZE
+            length = min((missing[end] + 1) * self.BLOCK_SIZE, self.size) - offset
+            self.store(offset, self.fetch(offset, length))
+            start = end + 1
+
+    def read_at(self, offset, length):
+        """length bytes from offset (fewer at the end of the file)"""
+        length = max(0, min(length, self.size - offset))
+        if not length:
+            return b''
+        if length >= self.STREAM_SIZE:
+            with self.lock:
+                return self.fetch(offset, length)
+        first = offset // self.BLOCK_SIZE
+        last = (offset + length - 1) // self.BLOCK_SIZE
+        with self.lock:
+            self.load_blocks(first, last)
+            blocks = []
+            for index in range(first, last + 1):
+                self.blocks.move_to_end(index)
+                blocks.append(self.blocks[index])
+        data = blocks[0] if len(blocks) == 1 else b''.join(blocks)
+        skip = offset - first * self.BLOCK_SIZE
+        return data[skip:skip + length]
+
+    def prefetch(self, offset, length):
+        """Cache a span expected to be read soon, in as few requests as possible"""
+        length = max(0, min(length, self.size - offset, self.max_blocks * self.BLOCK_SIZE // 2))
+        if length:
+            with self.lock:
+                self.load_blocks(offset // self.BLOCK_SIZE, (offset + length - 1) // self.BLOCK_SIZE)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        data = self.read_at(self.position, size)
+        self.position += len(data)
+        return data
+
+class RemoteExtentFile:
+    """Read-only file object over a member stored as (offset, length) extents of a RemoteBlockFile"""
+
+    def __init__(self, block_file, extents):
+        self.block_file = block_file
+        self.extents = extents
+        self.index = 0
+        self.offset = 0
+
+    def read(self, size=-1):
+        parts = []
+        while self.index < len(self.extents) and size != 0:
+            start, length = self.extents[self.index]
+            count = length - self.offset if size < 0 else min(size, length - self.offset)
+            data = self.block_file.read_at(start + self.offset, count)
+            if not data:
+                break
+            parts.append(data)
+            self.offset += len(data)
+            if size > 0:
+                size -= len(data)
+            if self.offset >= length:
+                self.index += 1
+                self.offset = 0
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class RemoteIsoImage(RemoteArchive):
+    """ISO9660 image read block-wise, with Rock Ridge or Joliet names when present
+
+    Only the volume descriptors, the path table and the directories that
+    are listed get read. The path table gives the location of every
+    directory, and mastering tools write directories next to each other,
+    so the span holding them is prefetched in one range when it is small.
+    """
+    SECTOR_SIZE = 2048
+    MAX_DIRECTORY_PREFETCH = 4 * 1024 * 1024
+    JOLIET_ESCAPES = (b'%/@', b'%/C', b'%/E')
+
+    def __init__(self, url, session=None):
+        super().__init__(url)
+        self.file = RemoteBlockFile(url, session)
+        self.joliet = False
+        self.rock_ridge = False
+        self.entries_by_directory = {}
+        
+        # Volume descriptors start at sector 16 and end with a terminator
+        primary = joliet = None
+        for sector in range(16, 64):
+            descriptor = self.file.read_at(sector * self.SECTOR_SIZE, self.SECTOR_SIZE)
+            if descriptor[1:6] != b'CD001':
+                break
+            if descriptor[0] == 1 and primary is None:
+                primary = descriptor
+            elif descriptor[0] == 2 and descriptor[88:91] in self.JOLIET_ESCAPES:
+                joliet = descriptor
+            elif descriptor[0] == 255:
+                break
+        if primary is None:
+            name = unquote(os.path.basename(urlparse(url).path))
+            raise ValueError(f'{name} is not an ISO9660 image')
+        self.volume_id = primary[40:72].decode('ascii', 'replace').strip()
+        
+        # Rock Ridge keeps the original names in the primary tree; otherwise prefer Joliet's
+        root = self.parse_record(primary[156:190])
+        root_records = self.read_directory(root['extents'])
+        self.rock_ridge = bool(root_records) and b'SP\x07\x01\xbe\xef' in root_records[0]['system_use'][:7]
+        descriptor = primary
+        if joliet is not None and not self.rock_ridge:
+            descriptor = joliet
+            self.joliet = True
+            root = self.parse_record(joliet[156:190])
+        self.root = root
+        self.prefetch_directories(descriptor)
+
+    def prefetch_directories(self, descriptor):
+        """Cache the span of sectors holding every directory, found through the path table"""
+        table_size = int.from_bytes(descriptor[132:136], 'little')
+        table_sector = int.from_bytes(descriptor[140:144], 'little')
+        if not table_size or table_size > self.MAX_DIRECTORY_PREFETCH:
+            return
+        table = self.file.read_at(table_sector * self.SECTOR_SIZE, table_size)
+        sectors = []
+        offset = 0
+        while offset + 8 <= len(table):
+            name_length = table[offset]
+            if not name_length:
+                break
+            sectors.append(int.from_bytes(table[offset + 2:offset + 6], 'little'))
+            offset += 8 + name_length + (name_length & 1)
+        if sectors:
+            start = min(sectors) * self.SECTOR_SIZE
+            # The last directory is at least one sector long
+            length = (max(sectors) + 1) * self.SECTOR_SIZE - start
+            if length <= self.MAX_DIRECTORY_PREFETCH:
+                self.file.prefetch(start, length)
+
+    def parse_record(self, record):
+        """Fields of one directory record"""
+        # Imported on first use to keep it off the startup path
+        import calendar
+        name_length = record[32]
+        raw_name = record[33:33 + name_length]
+        year, month, day, hour, minute, second, zone = record[18:25]
+        mtime = None
+        if month:
+            try:
+                # The zone is a signed count of 15 minute intervals from GMT
+                mtime = calendar.timegm((1900 + year, month, day, hour, minute, second)) \
+                    - (zone - 256 if zone > 127 else zone) * 900
+            except (OverflowError, ValueError):
+                mtime = None
+        start = int.from_bytes(record[2:6], 'little') * self.SECTOR_SIZE
+        size = int.from_bytes(record[10:14], 'little')
+        return {
+            'raw_name': raw_name,
+            'is_dir': bool(record[25] & 0x02),
+            # Files over 4 GB continue in further records of the same name
+            'more_extents': bool(record[25] & 0x80),
+            'extents': [(start, size)],
+            'size': size,
+            'mtime': mtime,
+            'system_use': record[33 + name_length + (0 if name_length & 1 else 1):],
+        }
+
+    def read_directory(self, extents):
+        """Records of a directory extent, without the . and .. entries"""
+        records = []
+        for start, size in extents:
+            data = self.file.read_at(start, size)
+            offset = 0
+            while offset < len(data):
+                length = data[offset]
+                if not length:
+                    # Records don't cross sectors; the rest of this one is padding
+                    offset = (offset // self.SECTOR_SIZE + 1) * self.SECTOR_SIZE
+                    continue
+                records.append(self.parse_record(data[offset:offset + length]))
+                offset += length
+        return records
+
+    def record_name(self, record):
+        if self.rock_ridge:
+            # NM entries of the System Use area, possibly split over several
+            parts = []
+            system_use = record['system_use']
+            offset = 0
+            while offset + 4 <= len(system_use):
+                signature, length = system_use[offset:offset + 2], system_use[offset + 2]
+                if length < 4:
+                    break
+                if signature == b'NM':
+                    parts.append(system_use[offset + 5:offset + length])
+                offset += length
+            if parts:
+                return b''.join(parts).decode('utf-8', 'replace')
+        raw_name = record['raw_name']
+        name = raw_name.decode('utf-16-be', 'replace') if self.joliet else raw_name.decode('ascii', 'replace')
+        name = name.split(';')[0]
+        return name if record['is_dir'] else name.rstrip('.')
+
+    def directory_entries(self, inner_path):
+        """name -> record for the directory inner_path, or None if there is none"""
+        entries = self.entries_by_directory.get(inner_path)
+        if entries is not None:
+            return entries
+        if inner_path:
+            parent, _, name = inner_path.rstrip('/').rpartition('/')
+            parent_entries = self.directory_entries(parent + '/' if parent else '')
+            record = parent_entries.get(name) if parent_entries is not None else None
+            if record is None or not record['is_dir']:
+                return None
+        else:
+            record = self.root
+        
+        entries = OrderedDict()
+        previous = None
+        for child in self.read_directory(record['extents']):
+            if child['raw_name'] in (b'\x00', b'\x01'):
+                continue
+            if previous is not None and previous['more_extents']:
+                previous['extents'] += child['extents']
+                previous['size'] += child['size']
+                previous['more_extents'] = child['more_extents']
+                continue
+            entries[self.record_name(child)] = child
+            previous = child
+        self.entries_by_directory[inner_path] = entries
+        return entries
+
+    def listing(self, inner_path):
+        entries = self.directory_entries(inner_path)
+        if entries is None:
+            return None
+        items = []
+        for name, record in entries.items():
+            if record['is_dir']:
+                items.append(self.make_item(inner_path + name + '/', name + '/', 'directory', None, record['mtime']))
+            else:
+                items.append(self.make_item(inner_path + name, name, 'file', record['size'], record['mtime']))
+        return items
+
+    def member_record(self, path):
+        parent, _, name = path.rpartition('/')
+        entries = self.directory_entries(parent + '/' if parent else '')
+        record = entries.get(name) if entries is not None else None
+        if record is None or record['is_dir']:
+            raise FileNotFoundError(f'{path} is not a file in {self.volume_id or "the image"}')
+        return record
+
+    def member_size(self, path):
+        return self.member_record(path)['size']
+
+    def open(self, path):
+        return RemoteExtentFile(self.file, self.member_record(path)['extents'])
+
+# Container types browsed in place, by file suffix
+REMOTE_ARCHIVE_TYPES = {
+    '.zip': RemoteZipArchive,
+    '.apk': RemoteZipArchive,
+    '.jar': RemoteZipArchive,
+    '.whl': RemoteZipArchive,
+    '.iso': RemoteIsoImage,
+    # Hybrid images carry an ISO9660 file system too
+    '.img': RemoteIsoImage,
+}
+
+def remote_archive_type(name):
+    """RemoteArchive subclass for a file name, or None"""
+    return REMOTE_ARCHIVE_TYPES.get(os.path.splitext(name.lower())[1])
+
+def split_archive_url(url):
+    """(archive URL, path inside it) for member URLs like .../x.zip#/dir/file, else None"""
+    base, separator, fragment = url.partition('#')
+    if separator and fragment.startswith('/') and remote_archive_type(urlparse(base).path):
+        return base, unquote(fragment[1:])
+    return None
+
+class RemoteArchiveCache:
+    """Recently opened remote archives by URL, shared by views, previews and downloads"""
+
+    def __init__(self, max_archives=8):
+        self.max_archives = max_archives
+        self.archives = OrderedDict()
+        self.lock = threading.Lock()
+
+    def open(self, url):
+        with self.lock:
+            archive = self.archives.get(url)
+            if archive is not None:
+                self.archives.move_to_end(url)
+                return archive
+        # Opened outside the lock; two threads may race, the later one wins
+        archive = remote_archive_type(urlparse(url).path)(url)
+        with self.lock:
+            self.archives[url] = archive
+            while len(self.archives) > self.max_archives:
+                self.archives.popitem(last=False)
+        return archive
+
+    def discard(self, url):
+        with self.lock:
+            self.archives.pop(url, None)
+
+REMOTE_ARCHIVES = RemoteArchiveCache()
+
+def download_archive_member(url, filepath, progress_callback=None, fsync_policy='never'):
+    """Extract one member of a remote archive by ranged reads; returns the bytes written"""
+    archive_url, path = split_archive_url(url)
+    archive = REMOTE_ARCHIVES.open(archive_url)
+    total_size = archive.member_size(path)
+    with archive.open(path) as member, DownloadFile(filepath, total_size, fsync_policy) as output:
+        while True:
+            data = member.read(1024 * 1024)
+            if not data:
+                break
+            output.write(data)
+            if progress_callback and total_size > 0:
+                progress_callback(output.written, total_size)
+    return output.written
+
+DEB_EXTENSIONS = ('.deb', '.udeb', '.ddeb')
+
+def open_remote_stream(url):
+    """Sequentially readable file object for url, transferring only what is read"""
+    archive = split_archive_url(url)
+    if archive:
+        return REMOTE_ARCHIVES.open(archive[0]).open(archive[1])
+    return RemoteBlockFile(url, cache_bytes=0)
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('Unexpected end of file')
+    return data
+
+def parse_control_fields(text):
+    """Fields of a Debian control paragraph, with continuation lines joined"""
+    fields = OrderedDict()
+    name = None
+    for line in text.splitlines():
+        if line[:1] in (' ', '\t') and name:
+            fields[name] += '\n' + line[1:]
+        elif ':' in line:
+            name, value = line.split(':', 1)
+            fields[name] = value.strip()
+    return fields
+
+def read_deb_info(url):
+    """Control fields and file list of the .deb at url, read without downloading it
+
+    A .deb is an ar archive of debian-binary, control.tar.* and data.tar.*,
+    in that order, so only the start of the file is read: for a package on
+    the server that is the first 64 KB, one ranged request, unless the
+    control member is larger. The file list comes from md5sums.
+    """
+    # Imported on first use to keep it off the startup path
+    import io
+    import tarfile
+    
+    stream = open_remote_stream(url)
+    try:
+        if read_exactly(stream, 8) != b'!<arch>\n':
+            raise ValueError('Not a Debian package (no ar header)')
+        while True:
+            header = stream.read(60)
+            if len(header) < 60:
+                raise ValueError('Debian package without a control.tar member')
+            name = header[:16].decode('ascii', 'replace').strip().rstrip('/')
+            size = int(header[48:58].decode('ascii').strip() or 0)
+            if name.startswith('control.tar'):
+                data = read_exactly(stream, size)
+                break
+            # Members are padded to an even size
+            read_exactly(stream, size + (size & 1))
+        bytes_fetched = getattr(stream, 'bytes_fetched', None)
+        requests_made = getattr(stream, 'requests', None)
+    finally:
+        stream.close()
+    
+    if name.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise ValueError('control.tar.zst needs the zstandard module (pip install zstandard)')
+        import zstandard
+        data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    
+    fields = OrderedDict()
+    files = []
+    # 'r:*' handles gzip, xz, bzip2 and uncompressed control members
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:*') as control_tar:
+        for member in control_tar:
+            member_name = member.name[2:] if member.name.startswith('./') else member.name
+            if member_name not in ('control', 'md5sums') or not member.isfile():
+                continue
+            text = control_tar.extractfile(member).read().decode('utf-8', 'replace')
+            if member_name == 'control':
+                fields = parse_control_fields(text)
+            else:
+                files = ['/' + line.split(None, 1)[1] for line in text.splitlines() if len(line.split(None, 1)) == 2]
+    return {'fields': fields, 'files': files, 'member': name,
+            'bytes_fetched': bytes_fetched, 'requests': requests_made}
+
+def format_deb_info(info, max_files=200):
+    """Info panel text for read_deb_info() results"""
+    if 'error' in info:
+        return f"Package metadata: {info['error']}"
+    fields = info['fields']
+    lines = []
+    for name in ['Package', 'Version', 'Architecture', 'Maintainer', 'Section', 'Priority',
+                 'Installed-Size', 'Depends', 'Pre-Depends', 'Recommends', 'Suggests',
+                 'Conflicts', 'Breaks', 'Replaces', 'Provides', 'Homepage']:
+        if name in fields:
+            value = fields[name]
+            if name == 'Installed-Size' and value.isdigit():
+                value = f"{int(value):,} KB"
+            lines.append(f"{name}: {value}")
+    if 'Description' in fields:
+        lines.append(f"Description: {fields['Description'].splitlines()[0]}")
+    if info.get('bytes_fetched') is not None:
+        lines.append(f"(read {info['bytes_fetched'] / 1024:.1f} KB in {info['requests']} requests)")
+    files = info['files']
+    if files:
+        lines.append('')
+        lines.append(f"Files ({len(files)}):")
+        lines.extend(files[:max_files])
+        if len(files) > max_files:
+            lines.append(f"... and {len(files) - max_files} more")
+    return '\n'.join(lines)
+
+class PackageInfoThread(QThread):
+    """Reads a .deb's control data with ranged requests off the GUI thread"""
+    info_ready = pyqtSignal(str, object, object)  # url, validator (None: don't cache), info dict
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, url, validator):
+        super().__init__()
+        self.url = url
+        self.validator = validator
+
+    def run(self):
+        try:
+            with perf_recorder.span('preview.deb', url=self.url) as span:
+                info = read_deb_info(self.url)
+                span.set(bytes=info['bytes_fetched'])
+            self.info_ready.emit(self.url, self.validator, info)
+            self.finished.emit(True, '')
+        except requests.RequestException as e:
+            HTTP_ERRORS.inc(kind='range', error=type(e).__name__)
+            # Not cached, so selecting the package again retries
+            self.info_ready.emit(self.url, None, {'error': str(e)})
+            self.finished.emit(False, f"Cannot read package metadata: {e}")
+        except Exception as e:
+            # A malformed package: ar, tarfile, gzip or lzma errors
+            self.info_ready.emit(self.url, self.validator, {'error': str(e)})
+            self.finished.emit(False, f"Cannot read package metadata: {e}")
+
+class PreviewFetchThread(QThread):
+    """Reads the start of a file for the previews, off the GUI thread
+
+    Requests go through the shared asyncio engine when one is given, and
+    members of remote archives through ranged reads. The transfer is
+    closed as soon as limit bytes are in, also when a server ignores the
+    Range header and sends the whole file.
+    """
+    content_ready = pyqtSignal(str, object)  # url, bytes
+    finished = pyqtSignal(bool, str)
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, url, engine=None, limit=IMAGE_PREVIEW_LIMIT, span='preview.image'):
+        super().__init__()
+        self.url = url
+        self.engine = engine
+        self.limit = limit
+        self.span = span
+        self.compression = None
+        self.content_type = None
+        self.transferred_bytes = 0
+        self.stop_requested = False
+
+    def stop(self):
+        self.stop_requested = True
+
+    def counted_chunks(self, chunks, kind=None):
+        for chunk in chunks:
+            if self.stop_requested:
+                return
+            self.transferred_bytes += len(chunk)
+            if kind:
+                HTTP_BYTES.inc(len(chunk), kind=kind)
+            yield chunk
+
+    def open_body(self, headers):
+        """Send the GET; returns the response and an iterator over its raw body"""
+        if self.engine is not None:
+            response = EngineStream(self.engine, self.url, headers, 'preview')
+            return response, response.iter_raw(self.CHUNK_SIZE)
+        response = requests.get(self.url, stream=True, timeout=30, headers=headers, hooks=request_hooks('preview'))
+        return response, response.raw.stream(self.CHUNK_SIZE, decode_content=False)
+
+    def read(self, consume):
+        """Hand the file's chunks to consume(chunks) and return its result"""
+        if split_archive_url(self.url):
+            stream = open_remote_stream(self.url)
+            try:
+                return consume(self.counted_chunks(iter(lambda: stream.read(self.CHUNK_SIZE), b'')))
+            finally:
+                stream.close()
+        # The raw body is the file as stored, whatever Content-Encoding claims
+        headers = dict(BROWSER_HEADERS, **{'Accept-Encoding': 'identity'})
+        if not self.compression:
+            # One byte past the limit tells a cut-short preview from a complete one
+            headers['Range'] = f'bytes=0-{self.limit}'
+        response, chunks = self.open_body(headers)
+        try:
+            if response.status_code == 416 and 'Range' in headers:
+                # How servers answer a range starting at 0 of an empty file
+                return consume(())
+            response.raise_for_status()
+            self.content_type = response.headers.get('Content-Type')
+            return consume(self.counted_chunks(chunks, 'preview'))
+        finally:
+            # Drops the connection if the body was not read to the end
+            response.close()
+
+    def read_prefix(self, chunks):
+        """The first limit bytes of chunks, and whether there was more"""
+        data = bytearray()
+        for chunk in chunks:
+            data += chunk
+            if len(data) > self.limit:
+                return bytes(data[:self.limit]), True
+        return bytes(data), False
+
+    def run(self):
+        try:
+            with perf_recorder.span(f'{self.span}.fetch', url=self.url) as span:
+                data, truncated = self.read(self.read_prefix)
+                span.set(bytes=self.transferred_bytes)
+            if self.stop_requested:
+                self.finished.emit(False, 'Stopped')
+                return
+            if truncated:
+                raise ValueError(f"larger than {self.limit // (1024 * 1024)} MB")
+            self.content_ready.emit(self.url, data)
+            self.finished.emit(True, '')
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+class TextPreviewThread(PreviewFetchThread):
+    """Fetches the start of a text file for the text preview, decompressing .gz, .xz and .bz2
+
+    Pages shown as text when WebEngine is missing are loaded the same way.
+    Text is decoded as it arrives, so the cost is bounded by the preview
+    size rather than the file size.
+    """
+    text_ready = pyqtSignal(str, str)  # url, text
+
+    def __init__(self, url, compression=None, engine=None, limit=TEXT_PREVIEW_LIMIT, label=None,
+                 span='preview.text'):
+        super().__init__(url, engine, limit, span)
+        self.compression = compression
+        self.label = label or ('compressed text file' if compression else 'text file')
+
+    def decode_prefix(self, chunks):
+        """Decode the first limit bytes of chunks as they arrive; returns (decoder, truncated)"""
+        decoder = TextDecoder(self.content_type)
+        if self.compression:
+            data, truncated = decompress_prefix(chunks, self.compression, self.limit)
+            decoder.feed(data)
+            return decoder, truncated
+        for chunk in chunks:
+            room = self.limit - decoder.size
+            decoder.feed(chunk[:room])
+            if len(chunk) > room:
+                return decoder, True
+        return decoder, False
+
+    def run(self):
+        step = 'decompress' if self.compression else 'fetch'
+        try:
+            # Decoding runs as the chunks arrive, so it is part of this span
+            with perf_recorder.span(f'{self.span}.{step}', url=self.url) as span:
+                decoder, truncated = self.read(self.decode_prefix)
+                text = decoder.finish()
+                span.set(bytes=self.transferred_bytes, decoded=decoder.size, charset=decoder.charset)
+            if self.stop_requested:
+                self.finished.emit(False, 'Stopped')
+                return
+            if truncated and self.compression:
+                text += (f"\n\n[Preview truncated - first {decoder.size // 1024} KB decompressed "
+                         f"from {self.transferred_bytes / 1024:.0f} KB of the file]")
+            elif truncated:
+                text += f"\n\n[Preview truncated - first {self.limit // (1024 * 1024)} MB shown]"
+            self.text_ready.emit(self.url, text)
+            self.finished.emit(True, '')
+        except Exception as e:
+            self.text_ready.emit(self.url, f"Error loading {self.label}: {str(e)}")
+            self.finished.emit(False, str(e))
+
+class DownloadThread(QThread):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, url, filepath, fsync_policy='never'):
+        super().__init__()
+        self.url = url
+        self.filepath = filepath
+        self.fsync_policy = fsync_policy
+        
+    def run(self):
+        DOWNLOADS_ACTIVE.inc()
+        try:
+            with perf_recorder.span('download.file', url=self.url) as span:
+                last_percent = [-1]
+                
+                def progress(downloaded, total_size):
+                    if total_size > 0:
+                        percent = int(downloaded * 100 / total_size)
+                        if percent != last_percent[0]:
+                            last_percent[0] = percent
+                            self.progress.emit(percent)
+                downloaded = download_to_file(self.url, self.filepath, progress, self.fsync_policy)
+                span.set(bytes=downloaded)
+                        
+            DOWNLOADS.inc(result='ok')
+            self.finished.emit(True, f"Downloaded successfully to {self.filepath}")
+        except Exception as e:
+            DOWNLOADS.inc(result='failed')
+            HTTP_ERRORS.inc(kind='download', error=type(e).__name__)
+            self.finished.emit(False, f"Download failed: {str(e)}")
+        finally:
+            DOWNLOADS_ACTIVE.dec()
+
+class MultiDownloadManager(QThread):
+    file_progress = pyqtSignal(int, int, str)  # file_index, progress_percent, filename
+    overall_progress = pyqtSignal(int, int, str, int)  # completed_files, total_files, current_filename, current_file_percent
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, download_items, download_path, engine=None, concurrency=4, fsync_policy='never',
+                 extract=False, checksum_urls=None):
+        super().__init__()
+        self.download_items = download_items  # List of (url, filename) tuples
+        self.download_path = download_path
+        self.engine = engine
+        self.concurrency = concurrency
+        self.fsync_policy = fsync_policy
+        # Extract streamable archives while downloading instead of saving them
+        self.extract = extract
+        self.checksum_urls = checksum_urls or {}  # url -> URL of its SHA-256 file
+        self.checksum_files = {}
+        self.digests = {}  # url -> SHA-256 of each extracted archive
+        self.completed_files = 0
+    
+    def expected_sha256(self, url, filename):
+        """Digest published for url in its checksum file, fetched once per file"""
+        checksum_url = self.checksum_urls.get(url)
+        if not checksum_url:
+            return None
+        if checksum_url not in self.checksum_files:
+            response = requests.get(checksum_url, timeout=30, hooks=request_hooks('download'))
+            response.raise_for_status()
+            self.checksum_files[checksum_url] = response_text(response)
+        return parse_sha256_file(self.checksum_files[checksum_url], os.path.basename(filename))
+    
+    def download_file(self, url, filename, filepath, progress):
+        """Download (or extract) one file with blocking requests; returns the bytes received"""
+        if self.extract and stream_extract_kind(filename):
+            received, digest, _ = download_and_extract(url, filepath, progress, self.fsync_policy,
+                                                       self.expected_sha256(url, filename))
+            self.digests[url] = digest
+            return received
+        return download_to_file(url, filepath, progress, self.fsync_policy)
+    
+    def summary(self, total_files):
+        message = f"Successfully downloaded {total_files} files"
+        if self.digests:
+            message += f" ({len(self.digests)} extracted)"
+        return message
+        
+    def run(self):
+        if self.engine is not None:
+            self.run_concurrently()
+            return
+        total_files = len(self.download_items)
+        DOWNLOAD_QUEUE.inc(total_files)
+        DOWNLOADS_ACTIVE.inc()
+        try:
+            for i, (url, filename) in enumerate(self.download_items):
+                filepath = os.path.join(self.download_path, filename)
+                # Filenames may carry a relative path when mirroring a tree
+                os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+                
+                # Download file
+                with perf_recorder.span('download.file', url=url) as span:
+                    last_percent = [-1]
+                    
+                    def progress(downloaded, total_size):
+                        if total_size > 0:
+                            percent = int(downloaded * 100 / total_size)
+                            if percent != last_percent[0]:
+                                last_percent[0] = percent
+                                self.file_progress.emit(i, percent, filename)
+                                self.overall_progress.emit(self.completed_files, total_files, filename, percent)
+                    downloaded = self.download_file(url, filename, filepath, progress)
+                    span.set(bytes=downloaded)
+                
+                self.completed_files += 1
+                DOWNLOADS.inc(result='ok')
+                DOWNLOAD_QUEUE.dec()
+            
+            self.finished.emit(True, self.summary(total_files))
+            
+        except Exception as e:
+            DOWNLOADS.inc(result='failed')
+            HTTP_ERRORS.inc(kind='download', error=type(e).__name__)
+            self.finished.emit(False, f"Download failed: {str(e)}")
+        finally:
+            DOWNLOAD_QUEUE.dec(total_files - self.completed_files)
+            DOWNLOADS_ACTIVE.dec()
+
+    def run_concurrently(self):
+        """Download up to `concurrency` files at once on the asyncio engine"""
+        total_files = len(self.download_items)
+        DOWNLOAD_QUEUE.inc(total_files)
+        try:
+            failures = self.engine.submit(self.download_all(total_files)).result()
+        except Exception as e:
+            failures = [str(e)]
+        finally:
+            DOWNLOAD_QUEUE.dec(total_files - self.completed_files)
+        
+        if failures:
+            self.finished.emit(False, f"Download failed for {len(failures)} of {total_files} files: {failures[0]}")
+        else:
+            self.finished.emit(True, self.summary(total_files))
+
+    async def download_all(self, total_files):
+        """Runs on the engine's loop; returns the error messages of failed files"""
+        import asyncio
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def download_one(i, url, filename):
+            async with semaphore:
+                filepath = os.path.join(self.download_path, filename)
+                os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+                last_percent = [-1]
+                
+                def progress(downloaded, total_size):
+                    # Only signal whole-percent steps; each emit is queued to the GUI thread
+                    percent = int(downloaded * 100 / total_size)
+                    if percent != last_percent[0]:
+                        last_percent[0] = percent
+                        self.file_progress.emit(i, percent, filename)
+                        self.overall_progress.emit(self.completed_files, total_files, filename, percent)
+                
+                try:
+                    if (self.extract and stream_extract_kind(filename)) or split_archive_url(url):
+                        # Extraction and ranged reads are blocking, so they run off the event loop
+                        await asyncio.to_thread(self.download_file, url, filename, filepath, progress)
+                    else:
+                        await self.engine.download(url, filepath, progress, fsync_policy=self.fsync_policy)
+                except Exception as e:
+                    DOWNLOADS.inc(result='failed')
+                    HTTP_ERRORS.inc(kind='download', error=type(e).__name__)
+                    return f"{filename}: {e}"
+                self.completed_files += 1
+                DOWNLOADS.inc(result='ok')
+                DOWNLOAD_QUEUE.dec()
+                return None
+        
+        results = await asyncio.gather(*(download_one(i, url, filename)
+                                         for i, (url, filename) in enumerate(self.download_items)))
+        return [message for message in results if message]
+
+class FileItemModel(QAbstractTableModel):
+    """Table model over the parsed directory entries shared by all file views"""
+    COLUMNS = ['Name', 'Size', 'Type', 'Modified']
+
+    def __init__(self, icon_provider=None, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.icon_provider = icon_provider
+
+    def set_items(self, items):
+        """Replace the entries shown by the model"""
+        self.beginResetModel()
+        self.items = items
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        item = self.items[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return item['name']
+            elif column == 1:
+                # Exact sizes from HEAD requests replace the rounded listing sizes
+                return f"{item['size_bytes']:,}" if item.get('exact_size') else item['size']
+            elif column == 2:
+                return item['type'].title()
+            elif column == 3:
+                return item['modified']
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column == 1 and item.get('exact_size'):
+                return f"{item['size_bytes']:,} bytes (listed as {item['size']})"
+            elif column == 2 and item.get('content_type'):
+                return item['content_type']
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if column == 0 and self.icon_provider:
+                return self.icon_provider(item)
+        elif role == Qt.ItemDataRole.UserRole:
+            return item
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole
+                and section < len(self.COLUMNS)):
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+class FileFilterProxyModel(QAbstractProxyModel):
+    """Proxy exposing a subset of the source rows, in a given order
+
+    Unlike QSortFilterProxyModel this does not call back into Python for
+    every source row: the caller computes the visible rows once and the
+    views only map the rows they actually paint.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = None  # None shows every source row in source order
+        self.source_to_proxy = None
+        # Views call index() for every row on layout, so keep it cheap
+        self.row_count = 0
+        self.column_count = 0
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.source_model_reset)
+        model.dataChanged.connect(self.source_data_changed)
+        self.rows = None
+        self.source_to_proxy = None
+        self.row_count = model.rowCount()
+        self.column_count = model.columnCount()
+        self.endResetModel()
+
+    def set_filter_rows(self, rows):
+        """Show only the given source rows (in that order), or all rows for None"""
+        self.beginResetModel()
+        self.rows = rows
+        self.source_to_proxy = None
+        self.row_count = len(rows) if rows is not None else self.sourceModel().rowCount()
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self.rows is not None
+
+    def source_model_reset(self):
+        self.rows = None
+        self.source_to_proxy = None
+        self.row_count = self.sourceModel().rowCount()
+        self.endResetModel()
+
+    def source_data_changed(self, top_left, bottom_right, roles=()):
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            first = self.mapFromSource(self.sourceModel().index(source_row, top_left.column()))
+            if first.isValid():
+                last = self.index(first.row(), bottom_right.column())
+                self.dataChanged.emit(first, last, roles)
+
+    def source_row(self, row):
+        return self.rows[row] if self.rows is not None else row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.column_count
+
+    def index(self, row, column, parent=QModelIndex()):
+        if 0 <= row < self.row_count and 0 <= column < self.column_count and not parent.isValid():
+            return self.createIndex(row, column)
+        return QModelIndex()
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(proxy_index.row()), proxy_index.column())
+
+    def proxy_row(self, source_row):
+        """Proxy row showing source_row, or None when it is filtered out"""
+        if self.rows is None:
+            return source_row
+        if self.source_to_proxy is None:
+            self.source_to_proxy = {source_row: row for row, source_row in enumerate(self.rows)}
+        return self.source_to_proxy.get(source_row)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self.proxy_row(source_index.row())
+        if row is None:
+            return QModelIndex()
+        return self.index(row, source_index.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and self.sourceModel() is not None:
+            return self.sourceModel().headerData(section, orientation, role)
+        return super().headerData(section, orientation, role)
+
+class FileNameMatcher:
+    """Substring, fuzzy and regex matching over the names of a listing
+
+    The rows matched by the previous query are kept, so extending a
+    substring or fuzzy query only rescans the previous result set.
+    """
+    MODES = ['Substring', 'Fuzzy', 'Regex']
+    BOUNDARY_CHARS = '/-_. '
+
+    def __init__(self):
+        self.set_names([])
+
+    def set_names(self, names):
+        """Set the names to match against (row order is kept)"""
+        self.names = [name.lower() for name in names]
+        self.reset()
+
+    def reset(self):
+        self.last_query = ''
+        self.last_mode = None
+        self.last_matches = None
+
+    def match(self, query, mode='Substring'):
+        """Return matching rows, best match first in fuzzy mode
+
+        Raises re.error for an invalid regular expression.
+        """
+        names = self.names
+        if mode == 'Regex':
+            search = re.compile(query, re.IGNORECASE).search
+            matches = [row for row, name in enumerate(names) if search(name)]
+            self.last_query, self.last_mode, self.last_matches = query, mode, matches
+            return matches
+
+        query = query.lower()
+        if (self.last_matches is not None and self.last_mode == mode
+                and self.last_query and query.startswith(self.last_query)):
+            candidates = self.last_matches
+        else:
+            candidates = range(len(names))
+
+        if mode == 'Fuzzy':
+            pattern = re.escape(query[0]) + ''.join(
+                f'[^{re.escape(char)}]*{re.escape(char)}' for char in query[1:])
+            search = re.compile(pattern).search
+            scored = []
+            for row in candidates:
+                found = search(names[row])
+                if found:
+                    scored.append((row, self.fuzzy_score(names[row], query, found.end())))
+            matches = [row for row, _ in scored]
+            ranked = [row for row, _ in sorted(scored, key=lambda entry: -entry[1])]
+        else:
+            matches = [row for row in candidates if query in names[row]]
+            ranked = matches
+
+        self.last_query, self.last_mode, self.last_matches = query, mode, matches
+        return ranked
+
+    def fuzzy_score(self, name, query, end):
+        """Score a fuzzy match fzf-style: compact, boundary-anchored matches win"""
+        # Walk backwards from the end of the forward match to find the
+        # shortest window that still contains the whole query
+        start = end
+        for char in reversed(query):
+            start = name.rfind(char, 0, start)
+
+        gaps = (end - start) - len(query)
+        score = len(query) * 16 - gaps * 2
+        if gaps == 0:
+            score += 32
+        if start == 0 or name[start - 1] in self.BOUNDARY_CHARS:
+            score += 16
+        return score - len(name) / 1000
+
+class TextSearchEngine:
+    """Find every match of a query in a text buffer
+
+    The buffer is lowercased once when the content changes and kept until
+    invalidate() is called, so repeated searches only scan it, never copy it.
+    """
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the cached buffer, e.g. after the viewed content changed"""
+        self.text = None
+        self.normalized = None
+        self.last_key = None
+        self.last_matches = []
+
+    def has_text(self):
+        return self.text is not None
+
+    def set_text(self, text):
+        """Cache the text to search and its normalized form"""
+        self.invalidate()
+        self.text = text
+        lowered = text.lower()
+        # A few characters change length when lowercased; offsets must stay aligned
+        self.normalized = lowered if len(lowered) == len(text) else None
+
+    def find_all(self, query, regex=False, whole_word=False):
+        """Return (start, end) offsets of all case-insensitive matches
+
+        Raises re.error for an invalid regular expression.
+        """
+        if not query or self.text is None:
+            return []
+
+        key = (query, regex, whole_word)
+        if key == self.last_key:
+            return self.last_matches
+
+        if not regex and not whole_word and self.normalized is not None:
+            matches = []
+            needle = query.lower()
+            find = self.normalized.find
+            length = len(needle)
+            index = find(needle)
+            while index != -1:
+                matches.append((index, index + length))
+                index = find(needle, index + length)
+        else:
+            pattern = query if regex else re.escape(query)
+            if whole_word:
+                pattern = rf'\b(?:{pattern})\b'
+            matches = [m.span() for m in re.finditer(pattern, self.text, re.IGNORECASE) if m.end() > m.start()]
+
+        self.last_key = key
+        self.last_matches = matches
+        return matches
+
+class LargeTextView(QAbstractScrollArea):
+    """Read-only plain text view that only lays out the rows on screen
+
+    The text is kept as one string with an array of row start offsets.
+    Lines longer than ROW_CHARS are split into several rows, so every
+    row is short and scrolling, painting and jumping to a match cost the
+    same for a 50 MB log as for a 5 KB one. Offsets used by the selection
+    and highlights are plain string offsets, as TextSearchEngine returns.
+    """
+    ROW_CHARS = 1000
+    TAB_SIZE = 8
+    textChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text = ''
+        self.row_starts = array('q', [0])
+        self.longest_row = 0
+        # Sorted (start, end) offsets to highlight, and the current one
+        self.highlights = []
+        self.current_highlight = None
+        self.anchor = self.cursor_position = 0
+        self.highlight_color = QColor(120, 100, 20)
+        self.viewport().setCursor(Qt.CursorShape.IBeamCursor)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.update_metrics()
+
+    def setReadOnly(self, read_only):
+        # Always read-only; kept so the view can stand in for a QTextEdit
+        pass
+
+    def setPlainText(self, text):
+        """Replace the content; the rows are indexed from the line lengths in one pass"""
+        self.text = text
+        line_lengths = list(map(len, text.split('\n')))
+        self.longest_row = min(max(line_lengths), self.ROW_CHARS)
+        if self.longest_row < self.ROW_CHARS:
+            row_lengths = map((1).__add__, line_lengths)
+        else:
+            row_lengths = self.split_long_lines(line_lengths)
+        self.row_starts = array('q', [0])
+        self.row_starts.extend(itertools.accumulate(row_lengths))
+        # The last sum is just past the end of the text, not the start of a row
+        self.row_starts.pop()
+        if len(self.row_starts) > 1 and self.row_starts[-1] == len(text):
+            # No empty row after a final newline
+            self.row_starts.pop()
+        self.highlights = []
+        self.current_highlight = None
+        self.anchor = self.cursor_position = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+        self.textChanged.emit()
+
+    def split_long_lines(self, line_lengths):
+        """Lengths of the rows, newline included, with long lines split every ROW_CHARS"""
+        for length in line_lengths:
+            while length > self.ROW_CHARS:
+                yield self.ROW_CHARS
+                length -= self.ROW_CHARS
+            yield length + 1
+
+    def toPlainText(self):
+        return self.text
+
+    def clear(self):
+        self.setPlainText('')
+
+    def row_count(self):
+        return len(self.row_starts)
+
+    def row_text(self, row):
+        """Text of a row without its newline"""
+        end = self.row_starts[row + 1] if row + 1 < len(self.row_starts) else len(self.text)
+        return self.text[self.row_starts[row]:end].rstrip('\n')
+
+    def row_of(self, offset):
+        return max(0, bisect.bisect_right(self.row_starts, offset) - 1)
+
+    def update_metrics(self):
+        metrics = QFontMetricsF(self.font())
+        self.metrics = metrics
+        self.line_height = max(1, int(metrics.lineSpacing() + 0.5))
+        self.char_width = metrics.horizontalAdvance('M')
+
+    def changeEvent(self, event):
+        if event.type() == event.Type.FontChange:
+            self.update_metrics()
+            self.update_scrollbars()
+        super().changeEvent(event)
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def update_scrollbars(self):
+        page = self.visible_rows()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.row_count() - page))
+        vertical.setPageStep(page)
+        width = int(self.longest_row * self.char_width * 1.1) + 2 * self.char_width
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, int(width) - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+        horizontal.setSingleStep(int(self.char_width) * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def text_x(self, row_text, column):
+        """Horizontal position of a column in a row, tabs expanded"""
+        return self.metrics.horizontalAdvance(row_text[:column].expandtabs(self.TAB_SIZE))
+
+    def column_at(self, row_text, x):
+        """Column in a row nearest to a horizontal position (binary search, rows are short)"""
+        low, high = 0, len(row_text)
+        while low < high:
+            middle = (low + high) // 2
+            left = self.text_x(row_text, middle)
+            right = self.text_x(row_text, middle + 1)
+            if x < (left + right) / 2:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def offset_at(self, point):
+        """String offset under a viewport position"""
+        if not self.text:
+            return 0
+        row = self.verticalScrollBar().value() + int(point.y()) // self.line_height
+        if row >= self.row_count():
+            return len(self.text)
+        row = max(0, row)
+        x = point.x() + self.horizontalScrollBar().value() - self.char_width / 2
+        return self.row_starts[row] + self.column_at(self.row_text(row), x)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.color(QPalette.ColorRole.Base))
+        painter.setFont(self.font())
+        first = self.verticalScrollBar().value()
+        last = min(self.row_count(), first + self.visible_rows() + 1)
+        if first >= last:
+            return
+        x_offset = self.char_width / 2 - self.horizontalScrollBar().value()
+        ascent = self.metrics.ascent()
+
+        # Only the highlights that touch the visible rows are looked at
+        visible_start = self.row_starts[first]
+        visible_end = self.row_starts[last] if last < self.row_count() else len(self.text)
+        index = max(0, bisect.bisect_left(self.highlights, (visible_start,)) - 1)
+        ranges = []
+        while index < len(self.highlights) and self.highlights[index][0] <= visible_end:
+            ranges.append((self.highlights[index], self.highlight_color))
+            index += 1
+        if self.current_highlight:
+            ranges.append((self.current_highlight, palette.color(QPalette.ColorRole.Highlight)))
+        if self.anchor != self.cursor_position:
+            selection = (min(self.anchor, self.cursor_position), max(self.anchor, self.cursor_position))
+            ranges.append((selection, palette.color(QPalette.ColorRole.Highlight)))
+
+        for row in range(first, last):
+            top = (row - first) * self.line_height
+            text = self.row_text(row)
+            row_start = self.row_starts[row]
+            row_end = row_start + len(text)
+            for (start, end), color in ranges:
+                if end < row_start or start > row_end or end == start:
+                    continue
+                left = self.text_x(text, max(0, start - row_start))
+                right = self.text_x(text, min(len(text), end - row_start))
+                if end > row_end:
+                    # Selection continues past the end of the row
+                    right += self.char_width / 2
+                painter.fillRect(QRectF(x_offset + left, top, right - left, self.line_height), color)
+            painter.setPen(palette.color(QPalette.ColorRole.Text))
+            painter.drawText(QPointF(x_offset, top + ascent), text.expandtabs(self.TAB_SIZE))
+
+    def set_highlights(self, ranges, current=None):
+        """Mark (start, end) ranges; only those on screen are ever painted"""
+        self.highlights = sorted(ranges)
+        self.current_highlight = current
+        self.viewport().update()
+
+    def show_range(self, start, end):
+        """Select a range, scrolling it into view, and make it the current highlight"""
+        self.current_highlight = (start, end)
+        self.anchor = self.cursor_position = start
+        row = self.row_of(start)
+        vertical = self.verticalScrollBar()
+        if not vertical.value() <= row < vertical.value() + self.visible_rows():
+            vertical.setValue(row - self.visible_rows() // 3)
+        text = self.row_text(row)
+        left = self.text_x(text, start - self.row_starts[row])
+        horizontal = self.horizontalScrollBar()
+        if not horizontal.value() <= left < horizontal.value() + self.viewport().width() - 4 * self.char_width:
+            horizontal.setValue(int(left - self.viewport().width() / 3))
+        self.viewport().update()
+
+    def selected_text(self):
+        start, end = sorted((self.anchor, self.cursor_position))
+        return self.text[start:end]
+
+    def copy(self):
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
 
-class MultiDownloadManager(QThread):
-    file_progress = pyqtSignal(int, int, str)  # file_index, progress_percent, filename
-    overall_progress = pyqtSignal(int, int, str, int)  # completed_files, total_files, current_filename, current_file_percent
-    finished = pyqtSignal(bool, str)
-    
-    def __init__(self, download_items, download_path):
-        super().__init__()
-        self.download_items = download_items  # List of (url, filename) tuples
-        self.download_path = download_path
-        self.completed_files = 0
-        
-    def run(self):
-        try:
-            total_files = len(self.download_items)
-            
-            for i, (url, filename) in enumerate(self.download_items):
-                filepath = os.path.join(self.download_path, filename)
-                
-                # Download file
-                response = requests.get(url, stream=True)
-                response.raise_for_status()
-                
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
-                
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                progress_percent = int((downloaded / total_size) * 100)
-                                self.file_progress.emit(i, progress_percent, filename)
-                                self.overall_progress.emit(self.completed_files, total_files, filename, progress_percent)
-                
-                self.completed_files += 1
-            
-            self.finished.emit(True, f"Successfully downloaded {total_files} files")
-            
-        except Exception as e:
-            self.finished.emit(False, f"Download failed: {str(e)}")
+    def selectAll(self):
+        self.anchor, self.cursor_position = 0, len(self.text)
+        self.viewport().update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.cursor_position = self.offset_at(event.position())
+            if not event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.anchor = self.cursor_position
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            position = event.position()
+            # Dragging past the edges scrolls
+            if position.y() < 0:
+                self.verticalScrollBar().triggerAction(self.verticalScrollBar().SliderAction.SliderSingleStepSub)
+            elif position.y() > self.viewport().height():
+                self.verticalScrollBar().triggerAction(self.verticalScrollBar().SliderAction.SliderSingleStepAdd)
+            self.cursor_position = self.offset_at(position)
+            self.viewport().update()
+
+    def mouseDoubleClickEvent(self, event):
+        offset = self.offset_at(event.position())
+        row = self.row_of(offset)
+        row_start = self.row_starts[row]
+        text = self.row_text(row)
+        for match in re.finditer(r'\w+', text):
+            if match.start() <= offset - row_start <= match.end():
+                self.anchor, self.cursor_position = row_start + match.start(), row_start + match.end()
+                self.viewport().update()
+                break
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copy()
+            return
+        if event.matches(QKeySequence.StandardKey.SelectAll):
+            self.selectAll()
+            return
+        vertical = self.verticalScrollBar()
+        actions = {
+            Qt.Key.Key_Up: vertical.SliderAction.SliderSingleStepSub,
+            Qt.Key.Key_Down: vertical.SliderAction.SliderSingleStepAdd,
+            Qt.Key.Key_PageUp: vertical.SliderAction.SliderPageStepSub,
+            Qt.Key.Key_PageDown: vertical.SliderAction.SliderPageStepAdd,
+        }
+        if event.key() in actions:
+            vertical.triggerAction(actions[event.key()])
+        elif event.key() == Qt.Key.Key_Home and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            vertical.setValue(0)
+        elif event.key() == Qt.Key.Key_End and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            vertical.setValue(vertical.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        copy_action = menu.addAction('Copy', self.copy)
+        copy_action.setEnabled(self.anchor != self.cursor_position)
+        menu.addAction('Select All', self.selectAll)
+        menu.exec(event.globalPos())
 
 class WebCrawler(QMainWindow):
-    def __init__(self):
+    TREE_LOADED_ROLE = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, config_dir=None):
         super().__init__()
         self.base_url = "https://glitchlinux.wtf/FILES/"
         self.current_url = self.base_url
@@ -301,6 +5449,10 @@ class WebCrawler(QMainWindow):
         self.history_index = -1
         self.download_thread = None
         self.multi_download_manager = None
+        # Batches waiting for the running MultiDownloadManager: (items, quiet)
+        self.download_queue = deque()
+        self.downloads_running = False
+        self.download_batch_quiet = False
         self.current_items = []
         self.sort_column = 0
         self.sort_order = Qt.SortOrder.AscendingOrder
@@ -312,7 +5464,12 @@ class WebCrawler(QMainWindow):
         self.icons_dir = os.path.join(self.app_dir, "WebCrawler-Icons")
         self.ui_icons_dir = os.path.join(self.icons_dir, "Webcrawler-UI-actions")
         self.fonts_dir = os.path.join(self.app_dir, "WebCrawler-fonts")
-        self.settings_file = os.path.join(self.app_dir, "savefile.cfg")
+        # Settings and everything the app stores go here; the benchmarks use a scratch directory
+        self.config_dir = config_dir or self.app_dir
+        self.settings_file = os.path.join(self.config_dir, "savefile.cfg")
+        self.content_index_file = os.path.join(self.config_dir, "content_index.db")
+        self.crawl_checkpoint_dir = os.path.join(self.config_dir, "crawls")
+        self.snapshot_store = SnapshotStore(os.path.join(self.config_dir, "snapshots"))
         
         # Default settings
         self.settings = {
@@ -327,6 +5484,30 @@ class WebCrawler(QMainWindow):
             'show_text_preview': False,
             'default_download_path': os.path.join(os.path.expanduser('~'), 'Downloads'),
             'surf_mode': False,
+            'search_mode': 'Substring',
+            'search_filter': False,
+            'search_whole_word': False,
+            'index_max_file_size_kb': 1024,
+            'index_bandwidth_limit_kbps': 0,
+            'record_performance': False,
+            'profile_mode': 'cprofile',
+            'profile_dir': os.path.join(os.path.expanduser('~'), 'WebCrawler-profiles'),
+            'detect_stalls': False,
+            'stall_threshold_ms': 200,
+            'http_engine': 'threads',
+            'http2': True,
+            'crawl_concurrency': 16,
+            'download_concurrency': 4,
+            'download_fsync': 'never',
+            'download_extract': False,
+            'crawl_visited_set': 'exact',
+            'crawl_checkpoints': True,
+            'watch_list': [],
+            'selection_rule': '',
+            'page_cache_mb': 64,
+            # Off by default: it sends a burst of HEAD requests per listing
+            'enrich_visible': False,
+            'enrich_rate': 10,
             'bookmarks': []
         }
         
@@ -334,18 +5515,94 @@ class WebCrawler(QMainWindow):
         self.search_active = False
         self.search_results = []
         self.current_search_index = -1
+        self.name_matcher = FileNameMatcher()
+        self.text_search_engine = TextSearchEngine()
+        self.icon_cache = {}
+        
+        # Background crawling and content index
+        self.session = create_session()
+        self.http_engine = None
+        self.crawl_thread = None
+        self.crawl_description = ''
+        self.content_indexer = None
+        
+        # Parsed listings shared by the directory tree and navigation
+        self.listing_cache = ListingCache()
+        self.listing_url = None  # the directory being loaded into the views
+        self.listing_started = 0.0
+        self.listing_fetches = set()
+        self.current_validators = (None, None)  # ETag, Last-Modified of the listing shown
+        # Page states for back/forward, sized from the settings
+        self.page_cache = PageCache()
+        self.page_revalidate_threads = set()
+        # Exact sizes and validators from HEAD requests, per file URL
+        self.head_cache = HeadMetadataCache()
+        self.enrich_thread = None
+        self.enrich_threads = set()  # stopped threads finish their requests in flight
+        self.head_row_map = (None, {})  # items list, URL -> row for it
+        # Background fetches for the image and text previews
+        self.preview_threads = set()
+        self.preview_url = None
+        # Pages shown as text when WebEngine is missing, fetched the same way
+        self.page_text_threads = set()
+        self.page_text_url = None
+        # Control data of .deb files, per URL and listing date or ETag
+        self.package_info_cache = HeadMetadataCache(max_entries=5000)
+        self.package_info_threads = {}  # URL -> thread reading it
+        self.enrich_timer = QTimer(self)
+        self.enrich_timer.setSingleShot(True)
+        self.enrich_timer.setInterval(250)
+        self.enrich_timer.timeout.connect(self.enrich_visible_rows)
+        self.tree_nodes = {}
+        self.tree_fetch_threads = {}
+        
+        # Startup timings, in seconds since the process started importing
+        self.startup_timings = {'imports': STARTUP_IMPORTS_DONE - STARTUP_STARTED}
+        self.startup_report = False
+        self.performance_dialog = None
+        self.start_page_pending = True
+        
+        # Runtime profiler and GUI stall detector (configured by apply_settings)
+        self.profiler = RuntimeProfiler(self.settings['profile_dir'])
+        self.stall_detector = None
         
         self.load_settings()
         self.load_custom_font()
         self.initUI()
         self.apply_settings(self.settings)
+        self.startup_timings['ui'] = time.perf_counter() - STARTUP_STARTED
+        
+        # Watched directories are polled in the background with conditional GETs
+        self.watch_statuses = {}
+        self.tray_icon = None
+        self.directory_watcher = DirectoryWatcher(self.create_listing_fetch,
+                                                  os.path.join(self.config_dir, 'watch_state.json'), self)
+        self.directory_watcher.new_entries.connect(self.watch_new_entries)
+        self.directory_watcher.polled.connect(self.watch_polled)
+        self.directory_watcher.set_watches(self.settings.get('watch_list', []))
+        
+        # Load the start page once the window has painted; the fallback
+        # covers windows that are never exposed (e.g. started minimized)
+        QTimer.singleShot(1000, self.load_start_page)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if 'first_paint' not in self.startup_timings:
+            self.startup_timings['first_paint'] = time.perf_counter() - STARTUP_STARTED
+            QTimer.singleShot(0, self.load_start_page)
+
+    def load_start_page(self):
+        """Load start page or default homepage (only once, after startup)"""
+        if not self.start_page_pending:
+            return
+        self.start_page_pending = False
         
-        # Load start page or default homepage
         start_page_url = self.get_start_page_url()
         if start_page_url:
             self.current_url = start_page_url
             self.url_edit.setText(start_page_url)
             if self.surf_mode:
+                self.ensure_web_view()
                 if self.webengine_available:
                     self.web_view.setUrl(QUrl(start_page_url))
                 else:
@@ -356,6 +5613,26 @@ class WebCrawler(QMainWindow):
             # Load default homepage
             self.load_directory(self.current_url)
 
+        # A listing fetched in the background records the time when it arrives
+        if not self.listing_fetches:
+            self.first_listing_done()
+
+    def first_listing_done(self):
+        """Record when the first listing was shown, for the startup report"""
+        if 'first_listing' in self.startup_timings:
+            return
+        self.startup_timings['first_listing'] = time.perf_counter() - STARTUP_STARTED
+        if self.startup_report:
+            self.print_startup_report()
+
+    def print_startup_report(self):
+        """Print how long each startup phase took"""
+        timings = self.startup_timings
+        phases = [('imports', 'imports'), ('ui', 'UI built'),
+                  ('first_paint', 'first paint'), ('first_listing', 'first listing')]
+        report = ' | '.join(f"{label} {timings[key] * 1000:.0f} ms" for key, label in phases if key in timings)
+        print(f"Startup: {report}")
+
     def load_settings(self):
         """Load settings from savefile.cfg"""
         try:
@@ -369,7 +5646,7 @@ class WebCrawler(QMainWindow):
     def save_settings(self):
         """Save settings to savefile.cfg"""
         try:
-            os.makedirs(self.app_dir, exist_ok=True)
+            os.makedirs(self.config_dir, exist_ok=True)
             with open(self.settings_file, 'w') as f:
                 json.dump(self.settings, f, indent=2)
         except Exception as e:
@@ -462,6 +5739,7 @@ class WebCrawler(QMainWindow):
         self.directory_tree.setHeaderLabel('Folders')
         self.directory_tree.setMaximumWidth(250)
         self.directory_tree.setMinimumWidth(200)
+        self.directory_tree.setUniformRowHeights(True)
         left_layout.addWidget(self.directory_tree)
         
         self.left_panel.setLayout(left_layout)
@@ -513,7 +5791,7 @@ class WebCrawler(QMainWindow):
         if download_icon:
             self.main_download_button.setIcon(download_icon)
         self.main_download_button.setEnabled(False)
-        self.main_download_button.clicked.connect(self.download_selected_files)
+        self.main_download_button.clicked.connect(lambda: self.download_selected_files())
         download_controls_layout.addWidget(self.main_download_button)
         
         self.download_settings_button = QPushButton()
@@ -537,27 +5815,40 @@ class WebCrawler(QMainWindow):
         file_view_container_layout = QVBoxLayout()
         file_view_container_layout.setContentsMargins(0, 0, 0, 0)
         
+        # All three views share one model, filter proxy and selection
+        self.file_model = FileItemModel(self.get_item_icon)
+        self.file_proxy_model = FileFilterProxyModel()
+        self.file_proxy_model.setSourceModel(self.file_model)
+        
         # Table view (details)
-        self.file_table = QTableWidget()
-        self.file_table.setColumnCount(4)
-        self.file_table.setHorizontalHeaderLabels(['Name', 'Size', 'Type', 'Modified'])
+        self.file_table = QTableView()
+        self.file_table.setModel(self.file_proxy_model)
         self.file_table.setFont(self.custom_font)
         self.file_table.hide()  # Hide by default - list view is default
+        self.file_selection_model = self.file_table.selectionModel()
         
         # List view (simple list) - now default
-        self.file_list = QListWidget()
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_proxy_model)
+        self.file_list.setSelectionModel(self.file_selection_model)
+        self.file_list.setUniformItemSizes(True)
+        self.file_list.setLayoutMode(QListView.LayoutMode.Batched)
         self.file_list.setFont(self.custom_font)
-        self.file_list.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)  # Enable multi-selection
+        self.file_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)  # Enable multi-selection
         # self.file_list.hide()  # Don't hide - this is the default view
         
         # Icon view (grid with large icons)
-        self.icon_view = QListWidget()
-        self.icon_view.setViewMode(QListWidget.ViewMode.IconMode)
-        self.icon_view.setResizeMode(QListWidget.ResizeMode.Adjust)
+        self.icon_view = QListView()
+        self.icon_view.setModel(self.file_proxy_model)
+        self.icon_view.setSelectionModel(self.file_selection_model)
+        self.icon_view.setViewMode(QListView.ViewMode.IconMode)
+        self.icon_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.icon_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.icon_view.setUniformItemSizes(True)
         self.icon_view.setGridSize(QSize(80, 80))
         self.icon_view.setIconSize(QSize(48, 48))
         self.icon_view.setFont(self.custom_font)
-        self.icon_view.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)  # Enable multi-selection
+        self.icon_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)  # Enable multi-selection
         self.icon_view.hide()  # Hidden by default
         
         file_view_container_layout.addWidget(self.file_table)
@@ -565,37 +5856,10 @@ class WebCrawler(QMainWindow):
         file_view_container_layout.addWidget(self.icon_view)
         self.file_view_container.setLayout(file_view_container_layout)
         
-        # Web browser view (if available) or fallback text view
+        # Web browser view is created when surf mode is first entered
         self.webengine_available = WEBENGINE_AVAILABLE
-        if self.webengine_available:
-            try:
-                self.web_view = QWebEngineView()
-                
-                # Configure WebEngine to appear more like a regular browser
-                profile = self.web_view.page().profile()
-                profile.setHttpUserAgent("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-                
-                # Enable cookies and persistent storage
-                profile.setPersistentCookiesPolicy(profile.PersistentCookiesPolicy.ForcePersistentCookies)
-                
-                self.web_view.urlChanged.connect(self.web_url_changed)
-                self.web_view.loadFinished.connect(self.web_load_finished)
-                print("WebEngine initialized successfully with browser-like settings")
-            except Exception as e:
-                print(f"WebEngine initialization failed: {e}")
-                # Fall back to text view
-                self.webengine_available = False
-                self.web_view = QTextEdit()
-                self.web_view.setReadOnly(True)
-                self.web_view.setFont(self.custom_font)
-        else:
-            # Fallback to simple text view for HTML content
-            self.web_view = QTextEdit()
-            self.web_view.setReadOnly(True)
-            self.web_view.setFont(self.custom_font)
-        
-        self.web_view.hide()
-        file_view_container_layout.addWidget(self.web_view)
+        self.web_view = None
+        self.file_view_container_layout = file_view_container_layout
         
         # Configure table
         header = self.file_table.horizontalHeader()
@@ -604,10 +5868,11 @@ class WebCrawler(QMainWindow):
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
         
-        self.file_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.file_table.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)  # Enable multi-selection
+        header.setSortIndicatorShown(True)
+        
+        self.file_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.file_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)  # Enable multi-selection
         self.file_table.setAlternatingRowColors(False)
-        self.file_table.setSortingEnabled(True)
         
         file_view_layout.addWidget(self.file_view_container)
         file_view_widget.setLayout(file_view_layout)
@@ -664,8 +5929,7 @@ class WebCrawler(QMainWindow):
         text_preview_label.setFont(QFont('SansSerif', 10, QFont.Weight.Bold))
         text_preview_layout.addWidget(text_preview_label)
         
-        self.text_preview = QTextEdit()
-        self.text_preview.setReadOnly(True)
+        self.text_preview = LargeTextView()
         self.text_preview.setFont(self.custom_font)
         # Set dark background with white text for preview
         preview_palette = QPalette()
@@ -746,22 +6010,23 @@ class WebCrawler(QMainWindow):
         # Connect signals
         self.go_button.clicked.connect(self.navigate_to_url)
         self.url_edit.returnPressed.connect(self.navigate_to_url)
-        self.file_table.itemDoubleClicked.connect(self.item_double_clicked)
-        self.file_table.itemSelectionChanged.connect(self.selection_changed)
-        self.file_table.itemSelectionChanged.connect(self.update_download_button_state)
-        self.file_list.itemDoubleClicked.connect(self.list_item_double_clicked)
-        self.file_list.itemSelectionChanged.connect(self.list_selection_changed)
-        self.file_list.itemSelectionChanged.connect(self.update_download_button_state)
-        self.icon_view.itemDoubleClicked.connect(self.icon_item_double_clicked)
-        self.icon_view.itemSelectionChanged.connect(self.icon_selection_changed)
-        self.icon_view.itemSelectionChanged.connect(self.update_download_button_state)
+        self.file_table.doubleClicked.connect(self.item_double_clicked)
+        self.file_list.doubleClicked.connect(self.item_double_clicked)
+        self.icon_view.doubleClicked.connect(self.item_double_clicked)
+        self.file_selection_model.selectionChanged.connect(self.selection_changed)
+        self.file_selection_model.selectionChanged.connect(self.update_download_button_state)
         self.download_button.clicked.connect(self.download_file)
         self.open_folder_button.clicked.connect(self.open_download_folder)
         self.directory_tree.itemClicked.connect(self.tree_item_clicked)
+        self.directory_tree.itemExpanded.connect(self.tree_item_expanded)
         self.view_combo.currentTextChanged.connect(self.change_view)
         self.sort_combo.currentTextChanged.connect(self.sort_files)
         self.sort_order_button.clicked.connect(self.toggle_sort_order)
         self.file_table.horizontalHeader().sectionClicked.connect(self.header_clicked)
+        # Fetch exact sizes for the rows that come into view
+        for view in (self.file_table, self.file_list, self.icon_view):
+            view.verticalScrollBar().valueChanged.connect(lambda value: self.enrich_timer.start())
+        self.file_proxy_model.modelReset.connect(self.enrich_timer.start)
         
         # Initialize surf mode
         self.update_surf_mode_icon()
@@ -769,6 +6034,47 @@ class WebCrawler(QMainWindow):
 
         self.update_navigation_buttons()
 
+    def ensure_web_view(self):
+        """Create the web browser view (if available) or fallback text view on first use"""
+        if self.web_view is not None:
+            return self.web_view
+        
+        if self.webengine_available:
+            try:
+                from PyQt6.QtWebEngineWidgets import QWebEngineView
+                self.web_view = QWebEngineView()
+                
+                # Configure WebEngine to appear more like a regular browser
+                profile = self.web_view.page().profile()
+                profile.setHttpUserAgent(BROWSER_HEADERS['User-Agent'])
+                
+                # Enable cookies and persistent storage
+                profile.setPersistentCookiesPolicy(profile.PersistentCookiesPolicy.ForcePersistentCookies)
+                
+                self.web_view.urlChanged.connect(self.web_url_changed)
+                self.web_view.loadFinished.connect(self.web_load_finished)
+                print("WebEngine initialized successfully with browser-like settings")
+            except Exception as e:
+                print(f"WebEngine initialization failed: {e}")
+                # Fall back to text view
+                self.webengine_available = False
+                self.web_view = self.create_text_web_view()
+        else:
+            # Fallback to simple text view for HTML content
+            self.web_view = self.create_text_web_view()
+        
+        self.web_view.hide()
+        self.file_view_container_layout.addWidget(self.web_view)
+        return self.web_view
+
+    def create_text_web_view(self):
+        """Create the plain text view used when WebEngine is unavailable"""
+        text_view = LargeTextView()
+        text_view.setFont(self.custom_font)
+        # Searches reuse the normalized buffer until the page changes
+        text_view.textChanged.connect(self.text_search_engine.invalidate)
+        return text_view
+
     def create_menu_bar(self):
         menubar = self.menuBar()
         
@@ -930,6 +6236,104 @@ class WebCrawler(QMainWindow):
         manage_bookmarks_menu_action.setShortcut('Ctrl+Shift+B')
         manage_bookmarks_menu_action.triggered.connect(self.manage_bookmarks)
         nav_menu.addAction(manage_bookmarks_menu_action)
+        
+        # Tools menu
+        tools_menu = menubar.addMenu('Tools')
+        
+        index_contents_action = QAction('Index Text Files Below Current Directory', self)
+        index_contents_action.triggered.connect(self.start_content_indexing)
+        tools_menu.addAction(index_contents_action)
+        
+        search_contents_action = QAction('Search File Contents...', self)
+        search_contents_action.setShortcut('Ctrl+Shift+F')
+        search_contents_action.triggered.connect(self.open_content_search)
+        tools_menu.addAction(search_contents_action)
+        
+        select_rule_action = QAction('Select by Rule...', self)
+        select_rule_action.setShortcut('Ctrl+Shift+S')
+        select_rule_action.triggered.connect(self.open_selection_rule)
+        tools_menu.addAction(select_rule_action)
+        
+        export_catalog_action = QAction('Export Catalog Below Current Directory...', self)
+        export_catalog_action.triggered.connect(self.start_catalog_export)
+        tools_menu.addAction(export_catalog_action)
+        
+        snapshot_action = QAction('Take Snapshot Below Current Directory', self)
+        snapshot_action.triggered.connect(self.start_snapshot)
+        tools_menu.addAction(snapshot_action)
+        
+        compare_snapshots_action = QAction('Compare Snapshots...', self)
+        compare_snapshots_action.triggered.connect(self.open_snapshot_diff)
+        tools_menu.addAction(compare_snapshots_action)
+        
+        watch_action = QAction('Watched Directories...', self)
+        watch_action.triggered.connect(self.open_watch_list)
+        tools_menu.addAction(watch_action)
+        
+        extract_action = QAction('Download and Extract Selected', self)
+        extract_action.setShortcut('Ctrl+Shift+E')
+        extract_action.triggered.connect(self.download_and_extract_selected)
+        tools_menu.addAction(extract_action)
+        
+        enrich_all_action = QAction('Fetch Exact Sizes for All Files', self)
+        enrich_all_action.triggered.connect(self.enrich_all_rows)
+        tools_menu.addAction(enrich_all_action)
+        
+        tools_menu.addSeparator()
+        
+        self.stop_crawl_action = QAction('Stop Crawl', self)
+        self.stop_crawl_action.setEnabled(False)
+        self.stop_crawl_action.triggered.connect(self.stop_crawl)
+        tools_menu.addAction(self.stop_crawl_action)
+        
+        tools_menu.addSeparator()
+        
+        self.record_performance_action = QAction('Record Performance Timings', self)
+        self.record_performance_action.setCheckable(True)
+        self.record_performance_action.toggled.connect(self.set_performance_recording)
+        tools_menu.addAction(self.record_performance_action)
+        
+        performance_action = QAction('Performance...', self)
+        performance_action.triggered.connect(self.open_performance_dialog)
+        tools_menu.addAction(performance_action)
+        
+        profiler_menu = tools_menu.addMenu('Profiler')
+        
+        self.profile_action = QAction('Profile Until Stopped', self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.toggle_profiling)
+        profiler_menu.addAction(self.profile_action)
+        
+        profile_load_action = QAction('Profile Next Directory Load', self)
+        profile_load_action.triggered.connect(lambda: self.arm_profiler('load_directory'))
+        profiler_menu.addAction(profile_load_action)
+        
+        profile_populate_action = QAction('Profile Next View Update', self)
+        profile_populate_action.triggered.connect(lambda: self.arm_profiler('populate_file_views'))
+        profiler_menu.addAction(profile_populate_action)
+        
+        profiler_menu.addSeparator()
+        
+        self.profile_mode_actions = {}
+        profile_mode_group = QActionGroup(self)
+        for mode, label in [('cprofile', 'cProfile (.pstats)'), ('sampling', 'Sampling (speedscope)')]:
+            action = QAction(label, self)
+            action.setCheckable(True)
+            action.triggered.connect(lambda checked, mode=mode: self.set_profile_mode(mode))
+            profile_mode_group.addAction(action)
+            profiler_menu.addAction(action)
+            self.profile_mode_actions[mode] = action
+        
+        profile_dir_action = QAction('Output Directory...', self)
+        profile_dir_action.triggered.connect(self.choose_profile_dir)
+        profiler_menu.addAction(profile_dir_action)
+        
+        profiler_menu.addSeparator()
+        
+        self.detect_stalls_action = QAction('Log UI Stalls', self)
+        self.detect_stalls_action.setCheckable(True)
+        self.detect_stalls_action.toggled.connect(self.set_stall_detection)
+        profiler_menu.addAction(self.detect_stalls_action)
 
     def create_toolbar(self):
         self.toolbar = self.addToolBar('Navigation')
@@ -1006,8 +6410,30 @@ class WebCrawler(QMainWindow):
         self.search_field.setPlaceholderText('Search...')
         self.search_field.returnPressed.connect(self.perform_search)
         self.search_field.textChanged.connect(self.search_text_changed)
-        self.search_field.hide()
-        self.toolbar.addWidget(self.search_field)
+        self.search_field_action = self.toolbar.addWidget(self.search_field)
+        self.search_field_action.setVisible(False)
+        
+        # Search options (initially hidden with the search field)
+        self.search_options = QWidget()
+        search_options_layout = QHBoxLayout()
+        search_options_layout.setContentsMargins(0, 0, 0, 0)
+        self.search_mode_combo = QComboBox()
+        self.search_mode_combo.addItems(FileNameMatcher.MODES)
+        self.search_mode_combo.setToolTip('Match names by substring, fuzzy subsequence or regular expression')
+        self.search_mode_combo.currentTextChanged.connect(self.search_mode_changed)
+        search_options_layout.addWidget(self.search_mode_combo)
+        self.search_filter_check = QCheckBox('Filter')
+        self.search_filter_check.setToolTip('Hide entries that do not match')
+        self.search_filter_check.toggled.connect(self.search_filter_toggled)
+        search_options_layout.addWidget(self.search_filter_check)
+        self.search_whole_word_check = QCheckBox('Whole word')
+        self.search_whole_word_check.setToolTip('Match whole words only when searching page text')
+        self.search_whole_word_check.toggled.connect(self.search_whole_word_toggled)
+        search_options_layout.addWidget(self.search_whole_word_check)
+        self.search_options.setLayout(search_options_layout)
+        # Toolbar widgets are shown and hidden through their actions
+        self.search_options_action = self.toolbar.addWidget(self.search_options)
+        self.search_options_action.setVisible(False)
         
         self.toolbar.addSeparator()
         
@@ -1034,85 +6460,294 @@ class WebCrawler(QMainWindow):
         self.toolbar.addAction(self.surf_mode_action)
 
     def add_to_history(self, url):
-        if self.history_index < len(self.history) - 1:
-            self.history = self.history[:self.history_index + 1]
+        """Record url, normally the page being left for a new one"""
+        # Going somewhere new drops the forward entries and their cached states
+        del self.history[self.history_index + 1:]
+        self.page_cache.discard_after(self.history_index)
         
-        self.history.append(url)
+        if not self.history or self.history[-1] != url:
+            self.history.append(url)
         self.history_index = len(self.history) - 1
-        self.update_navigation_buttons()
+        self.save_page_state()
+        # The new page is only recorded when it is left, so the page
+        # just recorded can always be gone back to
+        self.back_action.setEnabled(True)
+        self.forward_action.setEnabled(False)
+
+    def record_current_page(self):
+        """Put the page shown into the history if it is not there yet, saving its state"""
+        if self.history_index == len(self.history) - 1 and (not self.history or self.history[-1] != self.current_url):
+            self.history.append(self.current_url)
+            self.history_index = len(self.history) - 1
+        self.save_page_state()
 
     def update_navigation_buttons(self):
         self.back_action.setEnabled(self.history_index > 0)
         self.forward_action.setEnabled(self.history_index < len(self.history) - 1)
 
+    # Back/forward page cache
+    def save_page_state(self):
+        """Keep the listing shown, its sort, scroll offset and selection for back/forward"""
+        if (self.surf_mode or not self.current_items or self.history_index < 0
+                or self.history[self.history_index] != self.current_url):
+            return
+        view = self.visible_file_view()
+        current = self.file_selection_model.currentIndex()
+        self.page_cache.put(self.history_index, {
+            'url': self.current_url,
+            'items': self.current_items,
+            'names': self.name_matcher.names,
+            'validators': self.current_validators,
+            'sort': (self.sort_combo.currentText(), self.sort_order),
+            'view': view,
+            'scroll': (view.horizontalScrollBar().value(), view.verticalScrollBar().value()),
+            'selected': {item['url'] for item in self.get_selected_items()},
+            'current': (self.file_model.items[self.file_proxy_model.source_row(current.row())]['url']
+                        if current.isValid() else None),
+        })
+
+    def visible_file_view(self):
+        for view in (self.file_list, self.icon_view):
+            if view.isVisible():
+                return view
+        return self.file_table
+
+    def restore_page_state(self, state):
+        """Show a page from the back/forward cache, then revalidate it in the background"""
+        with perf_recorder.span('listing.restore', url=state['url'], items=len(state['items'])):
+            self.current_url = state['url']
+            self.url_edit.setText(self.current_url)
+            self.current_items = state['items']
+            self.current_validators = state['validators']
+            # Entries kept in the sort they were shown in need no re-sort
+            sorted_already = state['sort'] == (self.sort_combo.currentText(), self.sort_order)
+            self.populate_file_views(sort=not sorted_already, names=state['names'] if sorted_already else None)
+            self.update_directory_tree()
+            self.apply_page_selection(state)
+        self.status_bar.showMessage(f"Loaded {len(self.current_items)} items from the page cache "
+                                    f"({self.page_cache.usage()})")
+        self.revalidate_page(state)
+
+    def apply_page_selection(self, state):
+        """Reselect a saved page's entries and scroll back to where it was"""
+        rows = [row for row, item in enumerate(self.current_items) if item['url'] in state['selected']]
+        self.select_source_rows(rows, scroll=False)
+        if state['current'] is not None:
+            for row in rows or range(len(self.current_items)):
+                if self.current_items[row]['url'] == state['current']:
+                    index = self.file_proxy_model.mapFromSource(self.file_model.index(row, 0))
+                    self.file_selection_model.setCurrentIndex(index, QItemSelectionModel.SelectionFlag.NoUpdate)
+                    break
+        
+        view = state['view']
+        if view.isVisible():
+            # Lay the rows out now so the scroll ranges are known
+            view.doItemsLayout()
+            horizontal, vertical = state['scroll']
+            view.horizontalScrollBar().setValue(horizontal)
+            view.verticalScrollBar().setValue(vertical)
+
+    def revalidate_page(self, state):
+        """Conditional GET of a restored page, updating it only if the listing changed"""
+        if split_archive_url(state['url']):
+            # Comes from the archive's own index, which ranged reads check with If-Range
+            return
+        etag, last_modified = state['validators']
+        thread = self.create_listing_fetch(state['url'], etag, last_modified, kind='listing')
+        # Results for a page no longer shown are dropped in page_revalidated
+        thread.listing_ready.connect(self.page_revalidated)
+        thread.finished.connect(lambda thread=thread: self.page_revalidate_threads.discard(thread))
+        self.page_revalidate_threads.add(thread)
+        thread.start()
+
+    def page_revalidated(self, url, items, headers):
+        if items is None or self.surf_mode or url != self.current_url:
+            return
+        self.listing_cache.put(url, items, headers)
+        # Keep the selection and scroll offset across the update
+        self.save_page_state()
+        state = self.page_cache.get(self.history_index, url)
+        self.current_items = items
+        self.current_validators = (headers.get('ETag'), headers.get('Last-Modified'))
+        self.populate_file_views()
+        self.update_directory_tree()
+        if state is not None:
+            self.apply_page_selection(state)
+        self.status_bar.showMessage(f'Loaded {len(self.current_items)} items (updated since last visit)')
+
+    # Exact sizes and metadata from HEAD requests
+    def visible_source_rows(self):
+        """File model rows painted in the visible view"""
+        view = self.visible_file_view()
+        proxy = self.file_proxy_model
+        height = view.viewport().height()
+        
+        # Rows are laid out in order, and rows a batched layout has not
+        # reached yet have no rect, so binary search for the first one shown
+        def at_or_after_top(row):
+            rect = view.visualRect(proxy.index(row, 0))
+            return not rect.isValid() or rect.bottom() >= 0
+        low, high = 0, proxy.rowCount()
+        while low < high:
+            middle = (low + high) // 2
+            if at_or_after_top(middle):
+                high = middle
+            else:
+                low = middle + 1
+        
+        rows = []
+        for row in range(low, proxy.rowCount()):
+            rect = view.visualRect(proxy.index(row, 0))
+            if not rect.isValid() or rect.top() >= height:
+                break
+            rows.append(proxy.source_row(row))
+        return rows
+
+    def enrich_visible_rows(self):
+        if self.surf_mode or not self.settings.get('enrich_visible', False) or not self.current_items:
+            return
+        self.enrich_items([self.current_items[row] for row in self.visible_source_rows()])
+
+    def enrich_all_rows(self):
+        self.enrich_items(self.current_items, show_progress=True)
+
+    def enrich_items(self, items, show_progress=False):
+        """Fill exact sizes into items from the cache, sending HEAD requests for the rest"""
+        cached = []
+        entries = []
+        for item in items:
+            if item['type'] != 'file' or 'content_type' in item or item.get('archive'):
+                continue
+            metadata = self.head_cache.get(item['url'], item['modified'])
+            if metadata is not None:
+                cached.append((item['url'], item['modified'], metadata))
+            else:
+                entries.append((item['url'], item['modified']))
+        if cached:
+            self.head_batch_ready(cached)
+        if not entries:
+            return
+        
+        # Newly visible rows matter more than ones scrolled past
+        if self.enrich_thread is not None and self.enrich_thread.isRunning():
+            self.enrich_thread.stop()
+        thread = HeadEnrichThread(entries, engine=self.get_http_engine(),
+                                  requests_per_second=self.settings.get('enrich_rate', 10))
+        thread.batch_ready.connect(self.head_batch_ready)
+        thread.finished.connect(lambda success, message, thread=thread: self.head_enrich_finished(thread, message))
+        if show_progress:
+            self.status_bar.showMessage(f'Fetching exact sizes for {len(entries)} files...')
+        self.enrich_threads.add(thread)
+        self.enrich_thread = thread
+        thread.start()
+
+    def head_batch_ready(self, batch):
+        """Store HEAD results and update the rows of the listing shown"""
+        items = self.file_model.items
+        rows = []
+        for url, modified, metadata in batch:
+            self.head_cache.put(url, modified, metadata)
+            row = self.head_row_map[1].get(url)
+            # Rebuild the lookup after the listing was replaced or re-sorted
+            if self.head_row_map[0] is not items or (row is not None and items[row]['url'] != url):
+                self.head_row_map = (items, {item['url']: row for row, item in enumerate(items)})
+                row = self.head_row_map[1].get(url)
+            if row is not None and items[row]['modified'] == modified:
+                apply_head_metadata(items[row], metadata)
+                rows.append(row)
+        
+        # One dataChanged per run of adjacent rows
+        rows.sort()
+        last_column = self.file_model.columnCount() - 1
+        start = 0
+        for position in range(1, len(rows) + 1):
+            if position == len(rows) or rows[position] != rows[position - 1] + 1:
+                self.file_model.dataChanged.emit(self.file_model.index(rows[start], 0),
+                                                 self.file_model.index(rows[position - 1], last_column))
+                start = position
+        
+        selected = self.get_selected_items() if rows else []
+        if selected and 'content_type' in selected[0]:
+            self.info_text.setPlainText(self.info_panel_text(selected[0]))
+
+    def head_enrich_finished(self, thread, message):
+        self.enrich_threads.discard(thread)
+        if thread is self.enrich_thread:
+            self.enrich_thread = None
+        if message:
+            self.status_bar.showMessage(message)
+
     def load_directory(self, url):
         self.status_bar.showMessage('Loading...')
-        self.file_table.setRowCount(0)
         self.info_text.clear()
         self.current_items = []
-        
+        self.file_model.set_items(self.current_items)
+        self.listing_url = url
+        if split_archive_url(url):
+            self.load_archive_directory(url)
+            return
+
+        # Fetched and parsed in the background; directory_loaded shows it
+        fetch = self.create_listing_fetch(url, kind='listing')
+        fetch.listing_ready.connect(self.directory_loaded)
+        fetch.failed.connect(self.directory_failed)
+        fetch.finished.connect(lambda fetch=fetch: self.listing_fetches.discard(fetch))
+        self.listing_fetches.add(fetch)
+        self.listing_started = time.perf_counter()
+        fetch.start()
+
+    @profiled('load_directory')
+    def directory_loaded(self, url, items, headers):
+        # A listing asked for before the one now wanted
+        if url != self.listing_url or items is None:
+            return
+        started = self.listing_started
+        perf_recorder.record('listing.fetch', started, time.perf_counter() - started, {'url': url})
+        self.current_items = items
+        self.listing_cache.put(url, self.current_items, headers)
+        self.current_validators = (headers.get('ETag'), headers.get('Last-Modified'))
+
+        self.current_url = url
+        self.url_edit.setText(url)
+        with perf_recorder.span('listing.populate', items=len(self.current_items)):
+            self.populate_file_views()
+        with perf_recorder.span('listing.tree'):
+            self.update_directory_tree()
+        perf_recorder.record('listing.load', started, time.perf_counter() - started, {'url': url})
+        self.status_bar.showMessage(f'Loaded {len(self.current_items)} items')
+        self.first_listing_done()
+
+    def directory_failed(self, url, message):
+        if url != self.listing_url:
+            return
+        self.status_bar.showMessage(f'Error: {message}')
+        self.first_listing_done()
+        QMessageBox.warning(self, 'Error', f'Failed to load directory:\n{message}')
+
+    def load_archive_directory(self, url):
+        """Show a directory inside a remote archive, read with ranged requests"""
+        archive_url, inner_path = split_archive_url(url)
+        archive_name = unquote(os.path.basename(urlparse(archive_url).path))
         try:
-            # Use browser-like headers to avoid being flagged as a bot
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all links in the directory listing
-            links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link['href']
-                text = link.get_text().strip()
-                
-                # Skip parent directory link, sorting links, and empty links
-                if href in ['/', '?C=N;O=D', '?C=M;O=A', '?C=S;O=A', '?C=D;O=A'] or not text:
-                    continue
-                
-                # Get additional info from the table row
-                row = link.find_parent('tr')
-                size = ""
-                modified = ""
-                if row:
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:
-                        modified = cells[2].get_text().strip()
-                        size = cells[3].get_text().strip()
-                
-                # Determine if it's a directory or web-navigable file
-                is_directory = href.endswith('/') or '[DIR]' in str(row)
-                is_web_file = not is_directory and self.is_web_navigable_file(text)
-                
-                item_data = {
-                    'type': 'directory' if (is_directory or is_web_file) else 'file',
-                    'href': href,
-                    'name': text,
-                    'size': size if not (is_directory or is_web_file) else '',
-                    'modified': modified,
-                    'is_web_file': is_web_file
-                }
-                
-                self.current_items.append(item_data)
+            with perf_recorder.span('listing.archive', url=url) as span:
+                archive = REMOTE_ARCHIVES.open(archive_url)
+                items = archive.listing(inner_path)
+                span.set(requests=archive.file.requests, bytes=archive.file.bytes_fetched)
+            if items is None:
+                raise ValueError(f'{archive_name} has no directory {inner_path}')
             
+            self.current_items = items
+            self.current_validators = (None, None)
             self.current_url = url
             self.url_edit.setText(url)
             self.populate_file_views()
             self.update_directory_tree()
-            self.status_bar.showMessage(f'Loaded {len(self.current_items)} items')
-            
-        except requests.RequestException as e:
+            self.status_bar.showMessage(f'Loaded {len(items)} items from {archive_name} '
+                                        f'({archive.transfer_summary()} so far)')
+        except (requests.RequestException, ValueError, OSError) as e:
+            HTTP_ERRORS.inc(kind='range', error=type(e).__name__)
             self.status_bar.showMessage(f'Error: {str(e)}')
-            QMessageBox.warning(self, 'Error', f'Failed to load directory:\n{str(e)}')
+            QMessageBox.warning(self, 'Error', f'Failed to open archive:\n{str(e)}')
 
     def get_file_icon(self, filename, is_directory=False, is_web_file=False):
         """Get appropriate icon for file type"""
@@ -1188,80 +6823,52 @@ class WebCrawler(QMainWindow):
         
         return None
 
-    def populate_file_views(self):
-        """Populate all file views with current items"""
-        self.populate_file_table()
-        self.populate_file_list()
-        self.populate_icon_view()
+    def get_item_icon(self, item):
+        """Get the icon for a directory entry, cached per file type"""
+        is_directory = item['type'] == 'directory'
+        is_web_file = item.get('is_web_file', False)
+        if is_directory or is_web_file:
+            key = (is_directory, is_web_file, '', False)
+        else:
+            lower_name = item['name'].lower()
+            key = (False, False, os.path.splitext(lower_name)[1],
+                   lower_name.endswith(('.tar.gz', '.tar.xz', '.tar.lzma')))
+        
+        if key not in self.icon_cache:
+            self.icon_cache[key] = self.get_file_icon(item['name'], is_directory, is_web_file)
+        return self.icon_cache[key]
+
+    @profiled('populate_file_views')
+    def populate_file_views(self, sort=True, names=None):
+        """Populate all file views with current items
 
-    def populate_file_table(self):
-        # Sort items
-        self.sort_items()
+        names takes the matcher's names for items that are already sorted,
+        as kept by the back/forward page cache.
+        """
+        if sort:
+            self.sort_items()
+        self.file_model.set_items(self.current_items)
+        if names is not None:
+            self.name_matcher.names = names
+            self.name_matcher.reset()
+        else:
+            self.name_matcher.set_names([item['name'] for item in self.current_items])
         
-        self.file_table.setRowCount(len(self.current_items))
+        columns = ['Name', 'Size', 'Type', 'Modified']
+        sort_key = self.sort_combo.currentText()
+        if sort_key in columns:
+            self.file_table.horizontalHeader().setSortIndicator(columns.index(sort_key), self.sort_order)
         
-        for row, item in enumerate(self.current_items):
-            # Name column with icon
-            name_item = QTableWidgetItem()
-            
-            # Get appropriate icon
-            is_web_file = item.get('is_web_file', False)
-            icon = self.get_file_icon(item['name'], item['type'] == 'directory', is_web_file)
-            if icon:
-                name_item.setIcon(icon)
-            
-            name_item.setText(item['name'])
-            name_item.setData(Qt.ItemDataRole.UserRole, item)
-            self.file_table.setItem(row, 0, name_item)
-            
-            # Size column
-            size_item = QTableWidgetItem(item['size'])
-            self.file_table.setItem(row, 1, size_item)
-            
-            # Type column
-            type_item = QTableWidgetItem(item['type'].title())
-            self.file_table.setItem(row, 2, type_item)
-            
-            # Modified column
-            modified_item = QTableWidgetItem(item['modified'])
-            self.file_table.setItem(row, 3, modified_item)
-
-    def populate_file_list(self):
-        """Populate the simple list view"""
-        self.sort_items()
-        self.file_list.clear()
-        
-        for item in self.current_items:
-            list_item = QListWidgetItem()
-            is_web_file = item.get('is_web_file', False)
-            icon = self.get_file_icon(item['name'], item['type'] == 'directory', is_web_file)
-            if icon:
-                list_item.setIcon(icon)
-            list_item.setText(item['name'])
-            list_item.setData(Qt.ItemDataRole.UserRole, item)
-            self.file_list.addItem(list_item)
-    
-    def populate_icon_view(self):
-        """Populate the icon grid view"""
-        self.sort_items()
-        self.icon_view.clear()
-        
-        for item in self.current_items:
-            icon_item = QListWidgetItem()
-            is_web_file = item.get('is_web_file', False)
-            icon = self.get_file_icon(item['name'], item['type'] == 'directory', is_web_file)
-            if icon:
-                icon_item.setIcon(icon)
-            icon_item.setText(item['name'])
-            icon_item.setData(Qt.ItemDataRole.UserRole, item)
-            self.icon_view.addItem(icon_item)
+        # Keep a live filter applied across reloads and re-sorts
+        if self.is_search_filter_active() and self.search_field.text():
+            self.apply_search_filter(self.search_field.text())
 
     def sort_items(self):
         sort_key_map = {
             'Name': lambda x: x['name'].lower(),
-            'Size': lambda x: self.parse_size(x['size']),
+            'Size': lambda x: x['size_bytes'] or 0,
             'Type': lambda x: (x['type'] == 'file', x['name'].lower()),  # Directories first
-            'Modified': lambda x: x['modified']
+            'Modified': lambda x: x['mtime'] or 0
         }
         
         sort_key = self.sort_combo.currentText()
@@ -1270,49 +6877,161 @@ class WebCrawler(QMainWindow):
             self.current_items.sort(key=sort_key_map[sort_key], reverse=reverse)
 
     def parse_size(self, size_str):
-        if not size_str or size_str == '-':
-            return 0
-        
-        # Parse size strings like "1.2M", "345K", "2.1G"
-        size_str = size_str.strip()
-        if size_str[-1].upper() in 'KMGT':
-            multipliers = {'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
-            try:
-                return float(size_str[:-1]) * multipliers[size_str[-1].upper()]
-            except:
-                return 0
-        try:
-            return float(size_str)
-        except:
-            return 0
+        return parse_size(size_str)
 
     def update_directory_tree(self):
-        # Simple tree update - could be enhanced to show full tree structure
-        self.directory_tree.clear()
-        
-        # Add current path components
-        path_parts = self.current_url.replace(self.base_url, '').strip('/').split('/')
-        if path_parts == ['']:
-            path_parts = []
-        
-        root_item = QTreeWidgetItem(self.directory_tree)
-        root_item.setText(0, 'FILES')
-        root_item.setData(0, Qt.ItemDataRole.UserRole, self.base_url)
+        """Reveal the current directory in the lazily loaded tree"""
+        root_item = self.ensure_tree_root()
+        page_url = self.current_url
+        archive = split_archive_url(page_url)
+        if archive:
+            # Inside a remote archive, reveal the directory holding it
+            page_url = urljoin(archive[0], '.')
+        if not page_url.startswith(self.base_url):
+            self.directory_tree.clearSelection()
+            return
         
+        # Walk down the path, creating only nodes that are not loaded yet
+        path_parts = page_url[len(self.base_url):].strip('/').split('/')
         current_item = root_item
         current_url = self.base_url
-        
         for part in path_parts:
             if part:
                 current_url = urljoin(current_url, part + '/')
-                child_item = QTreeWidgetItem(current_item)
-                child_item.setText(0, part)
-                child_item.setData(0, Qt.ItemDataRole.UserRole, current_url)
-                current_item = child_item
+                current_item = self.ensure_tree_node(current_item, current_url, unquote(part))
+        
+        # The listing just loaded doubles as the children of its node
+        if current_item.data(0, Qt.ItemDataRole.UserRole) == self.current_url:
+            self.populate_tree_node(current_item, self.current_items)
+        
+        # Expand the ancestors but leave every other node as the user left it
+        parent = current_item.parent()
+        while parent:
+            parent.setExpanded(True)
+            parent = parent.parent()
+        self.directory_tree.setCurrentItem(current_item)
+        self.directory_tree.scrollToItem(current_item)
+
+    def ensure_tree_root(self):
+        root_item = self.tree_nodes.get(self.base_url)
+        if root_item is None:
+            root_item = QTreeWidgetItem(self.directory_tree)
+            root_item.setText(0, 'FILES')
+            root_item.setData(0, Qt.ItemDataRole.UserRole, self.base_url)
+            root_item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            self.tree_nodes[self.base_url] = root_item
+        return root_item
+
+    def ensure_tree_node(self, parent_item, url, name):
+        """Get the node for url, adding an unloaded node under parent_item if missing"""
+        item = self.tree_nodes.get(url)
+        if item is None:
+            item = self.create_tree_node(url, name)
+            parent_item.addChild(item)
+        return item
+
+    def create_tree_node(self, url, name):
+        item = QTreeWidgetItem()
+        item.setText(0, name)
+        item.setData(0, Qt.ItemDataRole.UserRole, url)
+        # Children are fetched when the node is first expanded
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        self.tree_nodes[url] = item
+        return item
+
+    def populate_tree_node(self, item, items):
+        """Merge a listing into a node's children, keeping existing subtrees"""
+        url = item.data(0, Qt.ItemDataRole.UserRole)
+        child_dirs = OrderedDict()
+        for entry in items:
+            child_url = entry.get('url') or urljoin(url, entry['href'])
+            if (entry['type'] == 'directory' and not entry.get('is_web_file')
+                    and child_url.startswith(url) and child_url != url):
+                child_dirs[child_url] = entry['name'].rstrip('/')
+        
+        self.directory_tree.setUpdatesEnabled(False)
+        try:
+            # Drop placeholders and directories that disappeared
+            for index in reversed(range(item.childCount())):
+                child = item.child(index)
+                child_url = child.data(0, Qt.ItemDataRole.UserRole)
+                if child_url not in child_dirs:
+                    self.forget_tree_nodes(child)
+                    item.removeChild(child)
+            
+            new_children = [self.create_tree_node(child_url, name)
+                            for child_url, name in child_dirs.items()
+                            if child_url not in self.tree_nodes]
+            item.addChildren(new_children)
+            item.sortChildren(0, Qt.SortOrder.AscendingOrder)
+        finally:
+            self.directory_tree.setUpdatesEnabled(True)
+        
+        item.setData(0, self.TREE_LOADED_ROLE, True)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+
+    def get_http_engine(self):
+        """The shared asyncio engine when selected in the settings, else None (threads)"""
+        if self.settings.get('http_engine') != 'asyncio' or not HTTPX_AVAILABLE:
+            return None
+        if self.http_engine is None:
+            self.http_engine = AsyncHttpEngine(http2=self.settings.get('http2', True)).start()
+        return self.http_engine
+
+    def create_listing_fetch(self, url, etag=None, last_modified=None, kind='tree'):
+        """Background listing fetch: a QThread, or a request on the asyncio engine"""
+        engine = self.get_http_engine()
+        if engine is not None:
+            return AsyncListingFetch(engine, url, etag, last_modified, kind)
+        return ListingFetchThread(url, etag, last_modified, kind)
+
+    def forget_tree_nodes(self, item):
+        """Remove a node and its descendants from the URL lookup"""
+        self.tree_nodes.pop(item.data(0, Qt.ItemDataRole.UserRole), None)
+        for index in range(item.childCount()):
+            self.forget_tree_nodes(item.child(index))
+
+    def tree_item_expanded(self, item):
+        """Load a node's children on first expansion"""
+        url = item.data(0, Qt.ItemDataRole.UserRole)
+        if not url or item.data(0, self.TREE_LOADED_ROLE):
+            return
+        
+        cached = self.listing_cache.get(url)
+        if cached is not None:
+            self.populate_tree_node(item, cached['items'])
+            return
         
-        self.directory_tree.expandAll()
-        if current_item:
-            self.directory_tree.setCurrentItem(current_item)
+        if url in self.tree_fetch_threads:
+            return
+        if item.childCount() == 0:
+            placeholder = QTreeWidgetItem(item)
+            placeholder.setText(0, 'Loading...')
+            placeholder.setFlags(Qt.ItemFlag.NoItemFlags)
+        
+        thread = self.create_listing_fetch(url)
+        thread.listing_ready.connect(self.tree_listing_ready)
+        thread.failed.connect(self.tree_listing_failed)
+        thread.finished.connect(lambda url=url: self.tree_fetch_threads.pop(url, None))
+        self.tree_fetch_threads[url] = thread
+        thread.start()
+
+    def tree_listing_ready(self, url, items, headers):
+        if items is None:
+            return
+        self.listing_cache.put(url, items, headers)
+        item = self.tree_nodes.get(url)
+        if item is not None:
+            self.populate_tree_node(item, items)
+
+    def tree_listing_failed(self, url, message):
+        item = self.tree_nodes.get(url)
+        if item is not None:
+            for index in reversed(range(item.childCount())):
+                if item.child(index).data(0, Qt.ItemDataRole.UserRole) is None:
+                    item.removeChild(item.child(index))
+            item.setExpanded(False)
+        self.status_bar.showMessage(f'Error loading {unquote(url)}: {message}')
 
     # Settings and UI control methods
     def open_settings(self):
@@ -1331,6 +7050,9 @@ class WebCrawler(QMainWindow):
         self.file_table.setFont(self.custom_font)
         self.file_list.setFont(self.custom_font)
         self.icon_view.setFont(self.custom_font)
+        self.text_preview.setFont(self.custom_font)
+        if isinstance(self.web_view, LargeTextView):
+            self.web_view.setFont(self.custom_font)
         
         # Update UI visibility
         self.left_panel.setVisible(settings['show_tree'])
@@ -1359,6 +7081,34 @@ class WebCrawler(QMainWindow):
                 self.enable_text_preview()
             else:
                 self.disable_text_preview()
+        
+        # Restore search options
+        if 'search_mode' in settings:
+            self.search_mode_combo.setCurrentText(settings['search_mode'])
+        if 'search_filter' in settings:
+            self.search_filter_check.setChecked(settings['search_filter'])
+        if 'search_whole_word' in settings:
+            self.search_whole_word_check.setChecked(settings['search_whole_word'])
+        
+        # Timing spans stay no-ops unless recording was switched on here
+        # or for this session with --record-performance
+        if 'record_performance' in settings:
+            enabled = settings['record_performance'] or perf_recorder.enabled
+            self.record_performance_action.blockSignals(True)
+            self.record_performance_action.setChecked(enabled)
+            self.record_performance_action.blockSignals(False)
+            perf_recorder.enabled = enabled
+        
+        if 'page_cache_mb' in settings:
+            self.page_cache.resize(settings['page_cache_mb'] * 1024 * 1024)
+        
+        # Profiler output and GUI stall logging
+        if 'profile_dir' in settings:
+            self.profiler.output_dir = settings['profile_dir']
+        if 'profile_mode' in settings:
+            self.set_profile_mode(settings['profile_mode'])
+        if 'detect_stalls' in settings:
+            self.detect_stalls_action.setChecked(settings['detect_stalls'])
 
     def toggle_image_preview(self):
         """Toggle image preview mode"""
@@ -1395,52 +7145,64 @@ class WebCrawler(QMainWindow):
         self.text_preview_action.setChecked(True)
         self.text_preview_panel.show()
         # Split view: browser on left, text preview on right
-        self.main_splitter.setSizes([250, 475, 475])
-    
-    def disable_text_preview(self):
-        """Disable text preview panel"""
-        self.text_preview_action.setChecked(False)
-        self.text_preview_panel.hide()
-        self.main_splitter.setSizes([250, 950, 0])
-    
-    def show_image_preview(self, url):
-        """Show image preview overlay"""
-        if not self.settings.get('show_image_preview', False):
-            return
-        
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            }
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
-            pixmap = QPixmap()
-            if pixmap.loadFromData(response.content):
-                # Calculate overlay size (20% of main window)
-                overlay_width = int(self.width() * 0.2)
-                overlay_height = int(self.height() * 0.2)
-                
-                # Scale image to fit while maintaining aspect ratio
-                scaled_pixmap = pixmap.scaled(
-                    overlay_width - 40, overlay_height - 60,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                
-                self.image_label.setPixmap(scaled_pixmap)
-                
-                # Position overlay in lower right corner
-                x = self.width() - overlay_width - 20
-                y = self.height() - overlay_height - 60
-                self.image_preview_overlay.setGeometry(x, y, overlay_width, overlay_height)
-                self.image_preview_overlay.show()
-                
-        except Exception as e:
-            print(f"Error loading image: {e}")
+        self.main_splitter.setSizes([250, 475, 475])
+    
+    def disable_text_preview(self):
+        """Disable text preview panel"""
+        self.text_preview_action.setChecked(False)
+        self.text_preview_panel.hide()
+        self.main_splitter.setSizes([250, 950, 0])
     
+    def show_image_preview(self, url):
+        """Show image preview overlay once the image is fetched in the background"""
+        if not self.settings.get('show_image_preview', False):
+            return
+
+        self.stop_previews()
+        thread = PreviewFetchThread(url, self.get_http_engine())
+        thread.content_ready.connect(self.image_preview_ready)
+        thread.finished.connect(lambda success, message, thread=thread: self.preview_finished(thread, message))
+        self.preview_threads.add(thread)
+        self.preview_url = url
+        thread.start()
+
+    def image_preview_ready(self, url, content):
+        # Another file may have been selected meanwhile
+        if url != self.preview_url:
+            return
+        pixmap = QPixmap()
+        with perf_recorder.span('preview.image.decode', bytes=len(content)):
+            loaded = pixmap.loadFromData(content)
+        if loaded:
+            # Calculate overlay size (20% of main window)
+            overlay_width = int(self.width() * 0.2)
+            overlay_height = int(self.height() * 0.2)
+
+            # Scale image to fit while maintaining aspect ratio
+            scaled_pixmap = pixmap.scaled(
+                overlay_width - 40, overlay_height - 60,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+
+            self.image_label.setPixmap(scaled_pixmap)
+
+            # Position overlay in lower right corner
+            x = self.width() - overlay_width - 20
+            y = self.height() - overlay_height - 60
+            self.image_preview_overlay.setGeometry(x, y, overlay_width, overlay_height)
+            self.image_preview_overlay.show()
+
+    def preview_finished(self, thread, message):
+        self.preview_threads.discard(thread)
+        # Text previews show their errors in the panel
+        if isinstance(thread, TextPreviewThread) or message in ('', 'Stopped'):
+            return
+        print(f"Error loading image: {message}")
+
     def hide_image_preview(self):
         """Hide image preview overlay"""
+        self.stop_previews()
         self.image_preview_overlay.hide()
     
     def show_text_preview(self, url):
@@ -1448,28 +7210,33 @@ class WebCrawler(QMainWindow):
         if not self.settings.get('show_text_preview', False):
             return
         
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            }
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
-            # Try to decode as text
-            text_content = response.content.decode('utf-8', errors='replace')
-            
-            # Limit preview size for performance
-            if len(text_content) > 100000:  # 100KB limit
-                text_content = text_content[:100000] + "\n\n[Preview truncated - file too large]"
-            
-            self.text_preview.setPlainText(text_content)
-            
-        except Exception as e:
-            self.text_preview.setPlainText(f"Error loading text file: {str(e)}")
+        compression = compressed_text_kind(unquote(url.rsplit('/', 1)[-1]))
+        self.stop_previews()
+        self.text_preview.setPlainText('Decompressing preview...' if compression else 'Loading preview...')
+        thread = TextPreviewThread(url, compression, self.get_http_engine())
+        thread.text_ready.connect(self.text_preview_ready)
+        thread.finished.connect(lambda success, message, thread=thread: self.preview_finished(thread, message))
+        self.preview_threads.add(thread)
+        self.preview_url = url
+        thread.start()
+    
+    def text_preview_ready(self, url, text):
+        # Another file may have been selected meanwhile
+        if url != self.preview_url:
+            return
+        with perf_recorder.span('preview.text.display', chars=len(text)):
+            self.text_preview.setPlainText(text)
+    
+    def stop_previews(self):
+        """Stop the transfers of earlier selections' previews, which are of no use any more"""
+        for thread in self.preview_threads:
+            thread.stop()
     
     def clear_text_preview(self):
         """Clear text preview panel"""
+        self.stop_previews()
         self.text_preview.clear()
+        self.preview_url = None
     
     def is_image_file(self, filename):
         """Check if file is an image"""
@@ -1478,13 +7245,8 @@ class WebCrawler(QMainWindow):
         return ext in image_extensions
     
     def is_text_file(self, filename):
-        """Check if file is a text file"""
-        text_extensions = {'.txt', '.py', '.js', '.html', '.htm', '.css', '.json', '.xml', '.yaml', '.yml', 
-                          '.md', '.rst', '.log', '.cfg', '.conf', '.ini', '.sh', '.bash', '.bat', '.ps1',
-                          '.c', '.cpp', '.h', '.hpp', '.java', '.php', '.rb', '.go', '.rs', '.swift',
-                          '.sql', '.csv', '.tsv', '.rtf'}
-        _, ext = os.path.splitext(filename.lower())
-        return ext in text_extensions
+        """Check if file is a text file, including compressed text like x.log.gz"""
+        return is_text_filename(filename) or compressed_text_kind(filename) is not None
     
     def resizeEvent(self, event):
         """Handle window resize - reposition image preview"""
@@ -1740,18 +7502,398 @@ class WebCrawler(QMainWindow):
         else:
             self.load_directory(url)
 
+    # Crawling and content index
+    def open_content_index(self):
+        """Open (creating if needed) the local full-text index"""
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            return ContentIndex(self.content_index_file)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.warning(self, 'Content Index', f'Cannot open content index:\n{str(e)}')
+            return None
+
+    def start_crawl(self, crawler, description):
+        """Run a DirectoryCrawler in the background, one crawl at a time"""
+        if self.crawl_thread and self.crawl_thread.isRunning():
+            QMessageBox.information(self, 'Crawl Running', 'Another crawl is still running.')
+            return False
+        if split_archive_url(crawler.start_url):
+            QMessageBox.information(self, 'Crawl', 'Crawls run on the server directories, not inside an archive.')
+            return False
+        
+        self.crawl_description = description
+        self.crawl_thread = CrawlThread(crawler)
+        self.crawl_thread.progress.connect(self.crawl_progress)
+        self.crawl_thread.finished.connect(self.crawl_finished)
+        self.crawl_thread.start()
+        self.stop_crawl_action.setEnabled(True)
+        self.status_bar.showMessage(f'{description}: starting at {crawler.start_url}')
+        return True
+
+    def create_crawler(self, checkpoint_key=None, revalidate=True):
+        """DirectoryCrawler for the current directory, checkpointed under checkpoint_key"""
+        visited = VISITED_SET_TYPES.get(self.settings.get('crawl_visited_set', 'exact'), set)()
+        checkpoint = None
+        resume = True
+        if checkpoint_key and self.settings.get('crawl_checkpoints', True):
+            # Imported on first use to keep it off the startup path
+            import hashlib
+            digest = hashlib.sha1(checkpoint_key.encode('utf-8')).hexdigest()[:16]
+            try:
+                os.makedirs(self.crawl_checkpoint_dir, exist_ok=True)
+                checkpoint = CrawlCheckpoint(os.path.join(self.crawl_checkpoint_dir, f'{digest}.log'),
+                                             revalidate=revalidate)
+            except OSError as e:
+                QMessageBox.warning(self, 'Crawl', f'Cannot open crawl checkpoint:\n{str(e)}')
+                return None
+            if checkpoint.resumable:
+                reply = QMessageBox.question(
+                    self, 'Resume Crawl',
+                    f'An earlier crawl of this directory stopped with {len(checkpoint.pending)} '
+                    f'directories left.\n\nResume it? (No starts over)',
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                resume = reply == QMessageBox.StandardButton.Yes
+        
+        return DirectoryCrawler(self.current_url, create_session(), engine=self.get_http_engine(),
+                                concurrency=self.settings.get('crawl_concurrency', 16),
+                                checkpoint=checkpoint, visited=visited, resume=resume)
+
+    def start_content_indexing(self):
+        """Crawl below the current directory, indexing text files"""
+        content_index = self.open_content_index()
+        if content_index is None:
+            return
+        
+        crawler = self.create_crawler(f'index {self.current_url}')
+        if crawler is None:
+            content_index.close()
+            return
+        self.content_indexer = ContentIndexer(
+            content_index,
+            crawler.session,
+            max_file_size=self.settings.get('index_max_file_size_kb', 1024) * 1024,
+            bandwidth_limit=self.settings.get('index_bandwidth_limit_kbps', 0) * 1024
+        )
+        crawler.add_sink(self.content_indexer)
+        self.start_crawl(crawler, 'Indexing')
+
+    def start_catalog_export(self):
+        """Crawl below the current directory, writing every entry to a catalog file"""
+        filters = ['SQLite database (*.db)', 'JSON Lines (*.jsonl)']
+        if PYARROW_AVAILABLE:
+            filters.append('Parquet (*.parquet)')
+        name = unquote(self.current_url.rstrip('/').rsplit('/', 1)[-1]) or 'catalog'
+        filepath, selected_filter = QFileDialog.getSaveFileName(
+            self, 'Export Catalog',
+            os.path.join(self.settings.get('default_download_path', os.path.expanduser('~')), f'{name}.db'),
+            ';;'.join(filters))
+        if not filepath:
+            return
+        if CatalogWriter.format_for_path(filepath) is None:
+            # Take the extension from the chosen filter
+            filepath += re.search(r'\*(\.\w+)', selected_filter).group(1)
+        
+        # Parquet files cannot be appended to, so those exports always start over
+        checkpoint_key = None if filepath.lower().endswith('.parquet') else f'catalog {filepath}'
+        # Every export is a full inventory, so don't skip unchanged directories
+        crawler = self.create_crawler(checkpoint_key, revalidate=False)
+        if crawler is None:
+            return
+        resuming = crawler.checkpoint is not None and crawler.resume and crawler.checkpoint.resumable
+        try:
+            crawler.add_sink(CatalogWriter(filepath, self.current_url, append=resuming))
+        except (ValueError, OSError, sqlite3.Error) as e:
+            QMessageBox.warning(self, 'Export Catalog', f'Cannot write catalog:\n{str(e)}')
+            return
+        self.start_crawl(crawler, 'Exporting catalog')
+
+    def start_snapshot(self):
+        """Crawl below the current directory, saving a snapshot to compare later ones with"""
+        try:
+            filepath = self.snapshot_store.new_path(self.current_url)
+        except OSError as e:
+            QMessageBox.warning(self, 'Snapshot', f'Cannot create snapshot:\n{str(e)}')
+            return
+        # A snapshot must see every listing, so it never resumes or revalidates
+        crawler = self.create_crawler()
+        crawler.add_sink(SnapshotWriter(filepath, self.current_url))
+        self.start_crawl(crawler, 'Snapshot')
+
+    # Rule-based selection
+    def open_selection_rule(self):
+        """Select or download the entries matching a rule, here or below this directory"""
+        # Leave out the parent directory link
+        items = [item for item in self.file_model.items
+                 if item['url'].startswith(self.current_url) and item['url'] != self.current_url]
+        dialog = SelectionRuleDialog(items, self.settings.get('selection_rule', ''), self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        self.settings['selection_rule'] = dialog.rule.text
+        self.save_settings()
+        
+        rule = dialog.rule
+        if dialog.action == 'select':
+            self.select_matching_rows(rule)
+        elif dialog.action == 'download':
+            matches = [item for item in items if item['type'] == 'file' and rule.matches(item)]
+            if not matches:
+                self.status_bar.showMessage('No files match the rule')
+                return
+            self.enqueue_downloads([(item['url'], unquote(item['name'])) for item in matches])
+        else:
+            crawler = self.create_crawler()
+            crawler.add_sink(DownloadCollector(self.current_url, rule=rule))
+            self.start_crawl(crawler, 'Collecting matches')
+
+    def select_matching_rows(self, rule):
+        """Replace the selection with the rows whose entries match rule"""
+        items = self.file_model.items
+        count = self.select_source_rows(
+            [row for row in rule.select(items)
+             if items[row]['url'].startswith(self.current_url) and items[row]['url'] != self.current_url])
+        self.status_bar.showMessage(f'{count} entries selected')
+
+    def select_source_rows(self, source_rows, scroll=True):
+        """Replace the selection with the given file model rows that are shown; returns how many"""
+        proxy_row = self.file_proxy_model.proxy_row
+        proxy_rows = sorted(row for row in map(proxy_row, source_rows) if row is not None)
+        
+        # One range per run of adjacent rows, so selecting 100k rows stays cheap
+        selection = QItemSelection()
+        last_column = self.file_proxy_model.columnCount() - 1
+        start = previous = None
+        for row in proxy_rows + [None]:
+            if start is not None and row != previous + 1:
+                selection.select(self.file_proxy_model.index(start, 0),
+                                 self.file_proxy_model.index(previous, last_column))
+                start = None
+            if start is None:
+                start = row
+            previous = row
+        self.file_selection_model.select(
+            selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+        if proxy_rows and scroll:
+            first = self.file_proxy_model.index(proxy_rows[0], 0)
+            for view in (self.file_table, self.file_list, self.icon_view):
+                if view.isVisible():
+                    view.scrollTo(first)
+        return len(proxy_rows)
+
+    def open_snapshot_diff(self):
+        snapshots = self.snapshot_store.list(self.current_url)
+        if len(snapshots) < 2:
+            QMessageBox.information(self, 'Compare Snapshots',
+                                    f'{len(snapshots)} snapshot(s) of this directory so far.\n'
+                                    'Take at least two with Tools > Take Snapshot Below Current Directory.')
+            return
+        dialog = SnapshotDiffDialog(snapshots, self)
+        dialog.exec()
+
+    # Watched directories
+    def open_watch_list(self):
+        dialog = WatchListDialog(self.settings.get('watch_list', []), self.current_url,
+                                 self.watch_statuses, self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.settings['watch_list'] = dialog.watches
+            self.save_settings()
+            self.directory_watcher.set_watches(dialog.watches)
+
+    def watch_polled(self, url, status):
+        self.watch_statuses[url] = f"{time.strftime('%H:%M')} {status}"
+
+    def watch_new_entries(self, watch, items):
+        """Announce new entries in a watched directory, downloading matches if asked to"""
+        # Imported on first use to keep it off the startup path
+        import fnmatch
+        url = watch['url']
+        names = ', '.join(item['name'] for item in items[:5]) + (' ...' if len(items) > 5 else '')
+        message = f"{len(items)} new in {unquote(url)}: {names}"
+        
+        if watch.get('auto_download'):
+            pattern = watch.get('pattern') or '*'
+            matches = [item for item in items
+                       if item['type'] == 'file' and fnmatch.fnmatch(item['name'], pattern)]
+            if matches:
+                self.enqueue_downloads([(item['url'], unquote(item['name'])) for item in matches], quiet=True)
+                message += f" | downloading {len(matches)}"
+        self.notify('New files on the mirror', message)
+
+    def notify(self, title, message):
+        """Show a desktop notification where a system tray exists, and always in the status bar"""
+        self.status_bar.showMessage(message)
+        # Imported on first use to keep it off the startup path
+        from PyQt6.QtWidgets import QSystemTrayIcon
+        if self.tray_icon is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray_icon = QSystemTrayIcon(self.windowIcon(), self)
+            self.tray_icon.show()
+        if self.tray_icon is not None:
+            self.tray_icon.showMessage(title, message)
+        QApplication.alert(self)
+
+    def stop_crawl(self):
+        if self.crawl_thread and self.crawl_thread.isRunning():
+            self.crawl_thread.crawler.stop()
+            self.status_bar.showMessage('Stopping crawl...')
+
+    def crawl_progress(self, directories, queued, url):
+        self.status_bar.showMessage(
+            f'{self.crawl_description}: {directories} directories, {queued} queued | {unquote(url)}'
+        )
+
+    def crawl_finished(self, success, message):
+        self.stop_crawl_action.setEnabled(False)
+        crawler = self.crawl_thread.crawler
+        for sink in crawler.sinks:
+            if isinstance(sink, ContentIndexer):
+                message += (f" | {sink.indexed} files indexed, {sink.unchanged} unchanged,"
+                            f" {sink.skipped} skipped, {sink.removed} removed")
+            elif isinstance(sink, CatalogWriter):
+                message += f" | {sink.written} entries written to {sink.filepath}"
+            elif isinstance(sink, SnapshotWriter):
+                reason = discard_partial_snapshot(crawler, sink, success)
+                if reason:
+                    message += f" | snapshot discarded, {reason}"
+                else:
+                    message += f" | snapshot of {sink.written} entries saved"
+            elif isinstance(sink, DownloadCollector):
+                message += f" | {len(sink.items)} matching files"
+        self.status_bar.showMessage(message)
+        collectors = [sink for sink in crawler.sinks if isinstance(sink, DownloadCollector)]
+        if success and not crawler.stop_requested and collectors and collectors[0].items:
+            self.enqueue_downloads(collectors[0].items)
+        if not success:
+            QMessageBox.warning(self, 'Crawl Failed', message)
+
+    def open_content_search(self):
+        """Open the full-text search dialog"""
+        content_index = self.open_content_index()
+        if content_index is None:
+            return
+        dialog = ContentSearchDialog(content_index, self)
+        dialog.exec()
+        content_index.close()
+
+    def set_performance_recording(self, enabled):
+        """Switch timing spans on or off and remember the choice"""
+        perf_recorder.enabled = enabled
+        if self.record_performance_action.isChecked() != enabled:
+            self.record_performance_action.setChecked(enabled)
+        if self.settings.get('record_performance') != enabled:
+            self.settings['record_performance'] = enabled
+            self.save_settings()
+        if self.performance_dialog and self.performance_dialog.record_check.isChecked() != enabled:
+            self.performance_dialog.record_check.setChecked(enabled)
+
+    def open_performance_dialog(self):
+        """Show the timing histograms next to the main window"""
+        if self.performance_dialog is None:
+            self.performance_dialog = PerformanceDialog(perf_recorder, self)
+            self.performance_dialog.finished.connect(self.performance_dialog_closed)
+        self.performance_dialog.show()
+        self.performance_dialog.raise_()
+
+    def performance_dialog_closed(self, result):
+        self.performance_dialog.deleteLater()
+        self.performance_dialog = None
+
+    def toggle_profiling(self, enabled):
+        """Start or stop profiling the GUI thread from the menu"""
+        if enabled:
+            if not self.profiler.start('manual'):
+                self.status_bar.showMessage('Profiler is already running')
+                self.profile_action.setChecked(False)
+                return
+            self.status_bar.showMessage(f'Profiling ({self.profiler.mode})...')
+        elif self.profiler.running:
+            self.finish_profile()
+
+    def arm_profiler(self, name):
+        """Profile only the next call of a load_directory/populate_file_views"""
+        self.profiler.arm(name)
+        self.status_bar.showMessage(f'Profiler armed for the next {name} call')
+
+    def set_profile_mode(self, mode):
+        if mode not in RuntimeProfiler.MODES:
+            mode = 'cprofile'
+        self.profiler.mode = mode
+        self.profile_mode_actions[mode].setChecked(True)
+        if self.settings.get('profile_mode') != mode:
+            self.settings['profile_mode'] = mode
+            self.save_settings()
+
+    def choose_profile_dir(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Profile Output Directory', self.profiler.output_dir)
+        if directory:
+            self.profiler.output_dir = directory
+            self.settings['profile_dir'] = directory
+            self.save_settings()
+
+    def finish_profile(self):
+        """Stop the profiler and report the file, logging a failed write instead of raising it"""
+        try:
+            filepath = self.profiler.stop()
+        except Exception as e:
+            filepath = None
+            print(f"Error writing profile: {e}")
+            self.status_bar.showMessage(f'Error writing profile: {e}')
+        self.profile_written(filepath)
+
+    def profile_written(self, filepath):
+        """Report where a finished profile was saved"""
+        if self.profile_action.isChecked():
+            self.profile_action.blockSignals(True)
+            self.profile_action.setChecked(False)
+            self.profile_action.blockSignals(False)
+        if filepath:
+            print(f"Profile written to {filepath}")
+            self.status_bar.showMessage(f'Profile written to {filepath}')
+
+    def set_stall_detection(self, enabled, threshold_ms=None, persist=True):
+        """Log the GUI thread's stack whenever the event loop stalls"""
+        if self.stall_detector:
+            self.stall_detector.stop()
+            self.stall_detector = None
+        if enabled:
+            threshold_ms = threshold_ms or self.settings.get('stall_threshold_ms', 200)
+            log_path = os.path.join(self.profiler.output_dir, 'stalls.log')
+            try:
+                os.makedirs(self.profiler.output_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Error creating profile directory: {e}")
+                log_path = None
+            self.stall_detector = StallDetector(threshold_ms, log_path)
+            self.stall_detector.start()
+        if self.detect_stalls_action.isChecked() != enabled:
+            self.detect_stalls_action.blockSignals(True)
+            self.detect_stalls_action.setChecked(enabled)
+            self.detect_stalls_action.blockSignals(False)
+        if persist and self.settings.get('detect_stalls') != enabled:
+            self.settings['detect_stalls'] = enabled
+            self.save_settings()
+
+    def open_in_text_preview(self, url):
+        """Show a remote text file in the text preview panel"""
+        if not self.settings.get('show_text_preview', False):
+            self.settings['show_text_preview'] = True
+            self.enable_text_preview()
+            self.save_settings()
+        self.show_text_preview(url)
+
     # Search functionality
     def toggle_search(self):
         """Toggle search field visibility"""
         print(f"Toggle search called - current visibility: {self.search_field.isVisible()}")  # Debug
         try:
             if self.search_field.isVisible():
-                self.search_field.hide()
+                self.search_field_action.setVisible(False)
+                self.search_options_action.setVisible(False)
                 self.search_active = False
                 self.clear_search_highlighting()
+                self.clear_search_filter()
                 print("Search field hidden")  # Debug
             else:
-                self.search_field.show()
+                self.search_field_action.setVisible(True)
+                self.search_options_action.setVisible(True)
                 self.search_field.setFocus()
                 self.search_active = True
                 print("Search field shown and focused")  # Debug
@@ -1760,13 +7902,69 @@ class WebCrawler(QMainWindow):
 
     def search_text_changed(self, text):
         """Handle search text changes for real-time search"""
-        if len(text) >= 2:  # Start searching after 2 characters
+        if self.is_search_filter_active():
+            # Filtering refines the previous result set, so run it on every keystroke
+            self.apply_search_filter(text)
+        elif len(text) >= 2:  # Start searching after 2 characters
             self.perform_search()
         elif len(text) == 0:
             self.clear_search_highlighting()
 
+    def search_mode_changed(self, mode):
+        """Re-run the current search with the new matching mode"""
+        self.settings['search_mode'] = mode
+        self.name_matcher.reset()
+        if self.is_search_filter_active():
+            self.apply_search_filter(self.search_field.text())
+        elif len(self.search_field.text()) >= 2:
+            self.perform_search()
+
+    def search_filter_toggled(self, enabled):
+        """Switch between selecting matches and hiding non-matching entries"""
+        self.settings['search_filter'] = enabled
+        if self.is_search_filter_active():
+            self.clear_search_highlighting()
+            self.apply_search_filter(self.search_field.text())
+        else:
+            self.clear_search_filter()
+
+    def search_whole_word_toggled(self, enabled):
+        """Re-run a page text search with the whole word option changed"""
+        self.settings['search_whole_word'] = enabled
+        if self.surf_mode and len(self.search_field.text()) >= 2:
+            self.perform_search()
+
+    def is_search_filter_active(self):
+        """Check if the live filter applies to the file views"""
+        return self.search_filter_check.isChecked() and not self.surf_mode
+
+    def apply_search_filter(self, text):
+        """Hide entries whose names do not match the search text"""
+        if not text:
+            self.clear_search_filter()
+            return
+        
+        try:
+            rows = self.name_matcher.match(text, self.search_mode_combo.currentText())
+        except re.error as e:
+            self.status_bar.showMessage(f'Invalid regular expression: {e}')
+            return
+        
+        self.file_proxy_model.set_filter_rows(rows)
+        self.status_bar.showMessage(f'{len(rows)} of {len(self.current_items)} items match')
+
+    def clear_search_filter(self):
+        """Show all entries again"""
+        if self.file_proxy_model.is_filtered():
+            self.file_proxy_model.set_filter_rows(None)
+        self.name_matcher.reset()
+
     def perform_search(self):
         """Perform search in current view"""
+        if self.is_search_filter_active():
+            self.apply_search_filter(self.search_field.text())
+            return
+        
         search_text = self.search_field.text().lower()
         if not search_text:
             return
@@ -1782,26 +7980,29 @@ class WebCrawler(QMainWindow):
                 self.status_bar.showMessage(f"Searching for: {search_text}")
             else:
                 # For text view, highlight matching text
-                self.search_in_text_view(search_text)
+                self.search_in_text_view(self.search_field.text())
         else:
             # Search in file manager views
-            self.search_in_file_views(search_text)
+            self.search_in_file_views(self.search_field.text())
 
     def search_in_text_view(self, search_text):
         """Search in text view (fallback web view)"""
-        if hasattr(self.web_view, 'toPlainText'):
-            content = self.web_view.toPlainText()
-            cursor = self.web_view.textCursor()
+        if hasattr(self.web_view, 'set_highlights'):
+            # The engine keeps the page text until the view content changes
+            if not self.text_search_engine.has_text():
+                self.text_search_engine.set_text(self.web_view.toPlainText())
             
-            # Find all occurrences
-            index = 0
-            while True:
-                index = content.lower().find(search_text, index)
-                if index == -1:
-                    break
-                self.search_results.append(index)
-                index += len(search_text)
+            try:
+                self.search_results = self.text_search_engine.find_all(
+                    search_text,
+                    regex=self.search_mode_combo.currentText() == 'Regex',
+                    whole_word=self.search_whole_word_check.isChecked()
+                )
+            except re.error as e:
+                self.status_bar.showMessage(f'Invalid regular expression: {e}')
+                return
             
+            self.highlight_all_search_results()
             if self.search_results:
                 self.current_search_index = 0
                 self.highlight_search_result()
@@ -1809,14 +8010,17 @@ class WebCrawler(QMainWindow):
             else:
                 self.status_bar.showMessage('No matches found')
 
+    def highlight_all_search_results(self):
+        """Mark every text view match at once; the view only paints those on screen"""
+        self.web_view.set_highlights(self.search_results)
+
     def search_in_file_views(self, search_text):
         """Search in file manager views"""
-        matching_items = []
-        
-        # Search through current items
-        for i, item in enumerate(self.current_items):
-            if search_text in item['name'].lower():
-                matching_items.append(i)
+        try:
+            matching_items = self.name_matcher.match(search_text, self.search_mode_combo.currentText())
+        except re.error as e:
+            self.status_bar.showMessage(f'Invalid regular expression: {e}')
+            return
         
         self.search_results = matching_items
         
@@ -1832,11 +8036,9 @@ class WebCrawler(QMainWindow):
         if not self.search_results or self.current_search_index < 0:
             return
         
-        if hasattr(self.web_view, 'textCursor'):
-            cursor = self.web_view.textCursor()
-            cursor.setPosition(self.search_results[self.current_search_index])
-            cursor.movePosition(cursor.MoveOperation.Right, cursor.MoveMode.KeepAnchor, len(self.search_field.text()))
-            self.web_view.setTextCursor(cursor)
+        if hasattr(self.web_view, 'show_range'):
+            start, end = self.search_results[self.current_search_index]
+            self.web_view.show_range(start, end)
 
     def highlight_file_search_result(self):
         """Highlight current search result in file views"""
@@ -1844,22 +8046,20 @@ class WebCrawler(QMainWindow):
             return
         
         item_index = self.search_results[self.current_search_index]
+        index = self.file_proxy_model.mapFromSource(self.file_model.index(item_index, 0))
+        if not index.isValid():
+            return
+        
+        # Replace the selection shared by all views
+        self.file_selection_model.setCurrentIndex(
+            index,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows
+        )
         
-        # Clear previous selections
-        self.file_table.clearSelection()
-        self.file_list.clearSelection()
-        self.icon_view.clearSelection()
-        
-        # Highlight in appropriate view
-        if self.file_table.isVisible():
-            self.file_table.selectRow(item_index)
-            self.file_table.scrollToItem(self.file_table.item(item_index, 0))
-        elif self.file_list.isVisible():
-            self.file_list.setCurrentRow(item_index)
-            self.file_list.scrollToItem(self.file_list.item(item_index))
-        elif self.icon_view.isVisible():
-            self.icon_view.setCurrentRow(item_index)
-            self.icon_view.scrollToItem(self.icon_view.item(item_index))
+        # Scroll the visible view to it
+        for view in (self.file_table, self.file_list, self.icon_view):
+            if view.isVisible():
+                view.scrollTo(index)
 
     def clear_search_highlighting(self):
         """Clear search highlighting"""
@@ -1867,13 +8067,15 @@ class WebCrawler(QMainWindow):
         self.current_search_index = -1
         
         if self.surf_mode:
-            if self.webengine_available:
+            if self.web_view is None:
+                pass
+            elif self.webengine_available:
                 self.web_view.findText("")  # Clear WebEngine search
+            elif hasattr(self.web_view, 'set_highlights'):
+                self.web_view.set_highlights([])
         else:
             # Clear file view selections
-            self.file_table.clearSelection()
-            self.file_list.clearSelection()
-            self.icon_view.clearSelection()
+            self.file_selection_model.clearSelection()
     
     def enter_surf_mode(self):
         """Enter web browser mode"""
@@ -1884,6 +8086,7 @@ class WebCrawler(QMainWindow):
             self.icon_view.hide()
             
             # Show web browser
+            self.ensure_web_view()
             self.web_view.show()
             
             # Load current URL in web view with error handling
@@ -1918,7 +8121,8 @@ class WebCrawler(QMainWindow):
     def exit_surf_mode(self):
         """Exit web browser mode and return to file manager"""
         # Hide web browser
-        self.web_view.hide()
+        if self.web_view is not None:
+            self.web_view.hide()
         
         # Show appropriate file manager view based on current view mode
         if self.view_mode == 'details':
@@ -1935,40 +8139,36 @@ class WebCrawler(QMainWindow):
         self.load_directory(self.current_url)
 
     def load_html_as_text(self, url):
-        """Load HTML content as text for fallback mode"""
-        try:
-            if url and url.startswith(('http://', 'https://')):
-                # Use browser-like headers to avoid being flagged as a bot
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Accept-Encoding': 'gzip, deflate',
-                    'DNT': '1',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                }
-                
-                response = requests.get(url, timeout=10, headers=headers)
-                response.raise_for_status()
-                if hasattr(self.web_view, 'setPlainText'):
-                    self.web_view.setPlainText(response.text)
-                else:
-                    # Fallback if web_view doesn't have setPlainText
-                    self.web_view.setHtml(f"<pre>{response.text}</pre>")
-            else:
-                if hasattr(self.web_view, 'setPlainText'):
-                    self.web_view.setPlainText("Invalid URL or empty content")
-                else:
-                    self.web_view.setHtml("<p>Invalid URL or empty content</p>")
-        except Exception as e:
-            error_msg = f"Error loading content: {str(e)}"
-            print(error_msg)
-            if hasattr(self.web_view, 'setPlainText'):
-                self.web_view.setPlainText(error_msg)
-            else:
-                self.web_view.setHtml(f"<p>{error_msg}</p>")
+        """Load HTML content as text for fallback mode, fetched and decoded in the background"""
+        self.ensure_web_view()
+        for thread in self.page_text_threads:
+            thread.stop()
+        self.page_text_url = url
+        if not (url and url.startswith(('http://', 'https://'))):
+            self.show_page_text(url, "Invalid URL or empty content")
+            return
+        thread = TextPreviewThread(url, engine=self.get_http_engine(), label='content', span='preview.page')
+        thread.text_ready.connect(self.show_page_text)
+        thread.finished.connect(lambda success, message, thread=thread: self.page_text_finished(thread, success, message))
+        self.page_text_threads.add(thread)
+        thread.start()
     
+    def page_text_finished(self, thread, success, message):
+        self.page_text_threads.discard(thread)
+        if not success and message != 'Stopped':
+            print(f"Error loading content: {message}")
+    
+    def show_page_text(self, url, text):
+        # Another page may have been opened meanwhile
+        if url != self.page_text_url:
+            return
+        if hasattr(self.web_view, 'setPlainText'):
+            with perf_recorder.span('preview.page.display', chars=len(text)):
+                self.web_view.setPlainText(text)
+        else:
+            # Fallback if web_view doesn't have setPlainText
+            self.web_view.setHtml(f"<pre>{text}</pre>")
+
     def web_url_changed(self, url):
         """Handle URL changes in web view (WebEngine only)"""
         if self.surf_mode and self.webengine_available:
@@ -2009,6 +8209,7 @@ class WebCrawler(QMainWindow):
             self.icon_view.show()
             self.view_combo.setCurrentText('Icons')
         
+        self.enrich_timer.start()
         self.save_settings()
     
     def toggle_tree_panel(self):
@@ -2049,34 +8250,19 @@ class WebCrawler(QMainWindow):
         has_files_selected = self.get_selected_files() is not None
         self.main_download_button.setEnabled(has_files_selected)
     
+    def get_selected_items(self):
+        """Get the entries selected in the file views, in view order"""
+        # Walk the selection ranges rather than one index per selected cell
+        rows = set()
+        for selection_range in self.file_selection_model.selection():
+            rows.update(range(selection_range.top(), selection_range.bottom() + 1))
+        source_row = self.file_proxy_model.source_row
+        items = self.file_model.items
+        return [items[source_row(row)] for row in sorted(rows)]
+    
     def get_selected_files(self):
         """Get list of selected file items"""
-        selected_files = []
-        
-        if self.file_table.isVisible():
-            selected_rows = set()
-            for item in self.file_table.selectedItems():
-                selected_rows.add(item.row())
-            
-            for row in selected_rows:
-                name_item = self.file_table.item(row, 0)
-                if name_item:
-                    data = name_item.data(Qt.ItemDataRole.UserRole)
-                    if data and data['type'] == 'file':
-                        selected_files.append(data)
-                        
-        elif self.file_list.isVisible():
-            for item in self.file_list.selectedItems():
-                data = item.data(Qt.ItemDataRole.UserRole)
-                if data and data['type'] == 'file':
-                    selected_files.append(data)
-                    
-        elif self.icon_view.isVisible():
-            for item in self.icon_view.selectedItems():
-                data = item.data(Qt.ItemDataRole.UserRole)
-                if data and data['type'] == 'file':
-                    selected_files.append(data)
-        
+        selected_files = [data for data in self.get_selected_items() if data and data['type'] == 'file']
         return selected_files if selected_files else None
     
     def open_download_settings(self):
@@ -2105,6 +8291,19 @@ class WebCrawler(QMainWindow):
         browse_button.clicked.connect(browse_path)
         path_layout.addWidget(browse_button, 0, 2)
         
+        # How often downloaded data is forced to disk
+        path_layout.addWidget(QLabel('Sync to Disk:'), 1, 0)
+        fsync_combo = QComboBox()
+        for policy, label in FSYNC_POLICIES.items():
+            fsync_combo.addItem(label, policy)
+        fsync_combo.setCurrentIndex(max(0, fsync_combo.findData(self.settings.get('download_fsync', 'never'))))
+        path_layout.addWidget(fsync_combo, 1, 1, 1, 2)
+        
+        extract_check = QCheckBox('Extract .tar.gz, .tar.xz, .gz, .xz and .bz2 files while downloading')
+        extract_check.setToolTip('Archives are unpacked into a folder named after them instead of being saved')
+        extract_check.setChecked(self.settings.get('download_extract', False))
+        path_layout.addWidget(extract_check, 2, 0, 1, 3)
+        
         layout.addLayout(path_layout)
         
         # Buttons
@@ -2113,6 +8312,8 @@ class WebCrawler(QMainWindow):
         ok_button = QPushButton('OK')
         def accept_settings():
             self.settings['default_download_path'] = path_edit.text()
+            self.settings['download_fsync'] = fsync_combo.currentData()
+            self.settings['download_extract'] = extract_check.isChecked()
             self.save_settings()
             dialog.accept()
         ok_button.clicked.connect(accept_settings)
@@ -2126,24 +8327,49 @@ class WebCrawler(QMainWindow):
         dialog.setLayout(layout)
         dialog.exec()
     
-    def download_selected_files(self):
-        """Download all selected files"""
+    def download_selected_files(self, extract=None):
+        """Download all selected files, extracting archives if extract (default: the setting)"""
         selected_files = self.get_selected_files()
         if not selected_files:
             return
-        
-        download_path = self.settings.get('default_download_path', 
-                                        os.path.join(os.path.expanduser('~'), 'Downloads'))
-        
-        # Ensure download directory exists
-        os.makedirs(download_path, exist_ok=True)
+        if extract is None:
+            extract = self.settings.get('download_extract', False)
         
         # Prepare download items
         download_items = []
+        checksum_urls = {}
         for file_data in selected_files:
             url = urljoin(self.current_url, file_data['href'])
             filename = unquote(file_data['name'])
             download_items.append((url, filename))
+            if extract and stream_extract_kind(filename):
+                checksum_url = checksum_url_for(self.current_items, file_data['name'])
+                if checksum_url:
+                    checksum_urls[url] = checksum_url
+        self.enqueue_downloads(download_items, extract=extract, checksum_urls=checksum_urls)
+    
+    def download_and_extract_selected(self):
+        self.download_selected_files(extract=True)
+    
+    def enqueue_downloads(self, download_items, quiet=False, extract=False, checksum_urls=None):
+        """Download (url, relative path) items, after any batch already running
+
+        quiet batches (e.g. from watched directories) report in the status
+        bar only, instead of a message box. With extract, streamable archives
+        are unpacked as they arrive, verified against checksum_urls (url ->
+        SHA-256 file) where given.
+        """
+        if self.downloads_running:
+            self.download_queue.append((download_items, quiet, extract, checksum_urls))
+            DOWNLOAD_QUEUE.inc(len(download_items))
+            self.status_bar.showMessage(f'Queued {len(download_items)} file(s) after the current downloads')
+            return
+        
+        download_path = self.settings.get('default_download_path', 
+                                        os.path.join(os.path.expanduser('~'), 'Downloads'))
+        
+        # Ensure download directory exists
+        os.makedirs(download_path, exist_ok=True)
         
         # Show status bar if hidden
         if not self.status_bar.isVisible():
@@ -2153,7 +8379,13 @@ class WebCrawler(QMainWindow):
             self.save_settings()
         
         # Start multi-file download
-        self.multi_download_manager = MultiDownloadManager(download_items, download_path)
+        self.downloads_running = True
+        self.download_batch_quiet = quiet
+        self.multi_download_manager = MultiDownloadManager(
+            download_items, download_path, engine=self.get_http_engine(),
+            concurrency=self.settings.get('download_concurrency', 4),
+            fsync_policy=self.settings.get('download_fsync', 'never'),
+            extract=extract, checksum_urls=checksum_urls)
         self.multi_download_manager.file_progress.connect(self.update_file_progress)
         self.multi_download_manager.overall_progress.connect(self.update_overall_progress)
         self.multi_download_manager.finished.connect(self.multi_download_finished)
@@ -2179,11 +8411,20 @@ class WebCrawler(QMainWindow):
         """Handle completion of multi-file download"""
         self.main_download_button.setEnabled(True)
         self.status_bar.showMessage(message)
+        quiet = self.download_batch_quiet
+        self.downloads_running = False
         
-        if success:
-            QMessageBox.information(self, 'Download Complete', message)
-        else:
-            QMessageBox.warning(self, 'Download Failed', message)
+        # Start the next queued batch; its own completion is reported later
+        if self.download_queue:
+            download_items, next_quiet, extract, checksum_urls = self.download_queue.popleft()
+            DOWNLOAD_QUEUE.dec(len(download_items))
+            self.enqueue_downloads(download_items, next_quiet, extract, checksum_urls)
+        
+        if not quiet:
+            if success:
+                QMessageBox.information(self, 'Download Complete', message)
+            else:
+                QMessageBox.warning(self, 'Download Failed', message)
         
         # Re-enable download button based on current selection
         self.update_download_button_state()
@@ -2191,9 +8432,8 @@ class WebCrawler(QMainWindow):
     # File type detection
     def is_web_navigable_file(self, filename):
         """Check if file should be treated as navigable web content"""
-        web_extensions = {'.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.cgi'}
         _, ext = os.path.splitext(filename.lower())
-        return ext in web_extensions
+        return ext in WEB_EXTENSIONS
 
     def is_html_file(self, filename):
         """Check if file is an HTML file"""
@@ -2218,34 +8458,33 @@ class WebCrawler(QMainWindow):
                 self.load_directory(url)
 
     def go_back(self):
+        self.record_current_page()
         if self.history_index > 0:
             self.history_index -= 1
-            url = self.history[self.history_index]
-            if self.surf_mode:
-                if self.webengine_available:
-                    self.web_view.setUrl(QUrl(url))
-                else:
-                    self.load_html_as_text(url)
-                self.current_url = url
-                self.url_edit.setText(url)
-            else:
-                self.load_directory(url)
-            self.update_navigation_buttons()
+            self.show_history_page()
 
     def go_forward(self):
+        self.record_current_page()
         if self.history_index < len(self.history) - 1:
             self.history_index += 1
-            url = self.history[self.history_index]
-            if self.surf_mode:
-                if self.webengine_available:
-                    self.web_view.setUrl(QUrl(url))
-                else:
-                    self.load_html_as_text(url)
-                self.current_url = url
-                self.url_edit.setText(url)
+            self.show_history_page()
+
+    def show_history_page(self):
+        url = self.history[self.history_index]
+        if self.surf_mode:
+            if self.webengine_available:
+                self.web_view.setUrl(QUrl(url))
+            else:
+                self.load_html_as_text(url)
+            self.current_url = url
+            self.url_edit.setText(url)
+        else:
+            state = self.page_cache.get(self.history_index, url)
+            if state is not None:
+                self.restore_page_state(state)
             else:
                 self.load_directory(url)
-            self.update_navigation_buttons()
+        self.update_navigation_buttons()
 
     def go_up(self):
         if self.current_url != self.base_url:
@@ -2293,21 +8532,15 @@ class WebCrawler(QMainWindow):
             else:
                 self.load_html_as_text(self.current_url)
         else:
+            archive = split_archive_url(self.current_url)
+            if archive:
+                # Read the archive's index again
+                REMOTE_ARCHIVES.discard(archive[0])
             self.load_directory(self.current_url)
 
-    # Event handlers for different views
-    def item_double_clicked(self, item):
-        data = item.data(Qt.ItemDataRole.UserRole)
-        self.handle_item_action(data)
-
-    def list_item_double_clicked(self, item):
-        """Handle double-click in list view"""
-        data = item.data(Qt.ItemDataRole.UserRole)
-        self.handle_item_action(data)
-    
-    def icon_item_double_clicked(self, item):
-        """Handle double-click in icon view"""
-        data = item.data(Qt.ItemDataRole.UserRole)
+    # Event handlers for the file views
+    def item_double_clicked(self, index):
+        data = index.data(Qt.ItemDataRole.UserRole)
         self.handle_item_action(data)
     
     def handle_item_action(self, data):
@@ -2327,8 +8560,14 @@ class WebCrawler(QMainWindow):
                 # In file mode, load as directory listing
                 self.load_directory(new_url)
         elif data and data['type'] == 'file':
+            file_url = urljoin(self.current_url, data['href'])
             # Handle file clicks based on type and mode
-            if self.is_html_file(data['name']):
+            if (not self.surf_mode and remote_archive_type(data['name'])
+                    and not split_archive_url(file_url)):
+                # Browse the archive's members without downloading it
+                self.add_to_history(self.current_url)
+                self.load_directory(file_url + '#/')
+            elif self.is_html_file(data['name']):
                 new_url = urljoin(self.current_url, data['href'])
                 if self.surf_mode:
                     # In surf mode, render HTML in web view
@@ -2350,46 +8589,19 @@ class WebCrawler(QMainWindow):
             self.load_directory(url)
 
     def selection_changed(self):
-        selected_items = self.file_table.selectedItems()
-        if selected_items:
-            # Get the first column item which contains our data
-            row = selected_items[0].row()
-            name_item = self.file_table.item(row, 0)
-            data = name_item.data(Qt.ItemDataRole.UserRole)
-            self.update_info_panel(data)
-        else:
-            self.clear_info_panel()
-
-    def list_selection_changed(self):
-        """Handle selection change in list view"""
-        selected_items = self.file_list.selectedItems()
-        if selected_items:
-            data = selected_items[0].data(Qt.ItemDataRole.UserRole)
-            self.update_info_panel(data)
-        else:
-            self.clear_info_panel()
-    
-    def icon_selection_changed(self):
-        """Handle selection change in icon view"""
-        selected_items = self.icon_view.selectedItems()
+        """Handle selection change in any file view"""
+        selected_items = self.get_selected_items()
         if selected_items:
-            data = selected_items[0].data(Qt.ItemDataRole.UserRole)
-            self.update_info_panel(data)
+            self.update_info_panel(selected_items[0])
         else:
             self.clear_info_panel()
     
     def update_info_panel(self, data):
         """Update the file information panel"""
-        info_text = f"Name: {data['name']}\n"
-        info_text += f"Type: {data['type'].title()}\n"
-        if data['size']:
-            info_text += f"Size: {data['size']}\n"
-        if data['modified']:
-            info_text += f"Modified: {data['modified']}\n"
-        info_text += f"URL: {urljoin(self.current_url, data['href'])}"
-        
-        self.info_text.setPlainText(info_text)
+        self.info_text.setPlainText(self.info_panel_text(data))
         self.download_button.setEnabled(data['type'] == 'file')
+        if self.package_info_pending(data):
+            self.read_package_info(data)
         
         # Handle preview for files
         if data['type'] == 'file':
@@ -2410,6 +8622,60 @@ class WebCrawler(QMainWindow):
             self.hide_image_preview()
             self.clear_text_preview()
     
+    def info_panel_text(self, data):
+        info_text = f"Name: {data['name']}\n"
+        info_text += f"Type: {data['type'].title()}\n"
+        if data.get('exact_size'):
+            info_text += f"Size: {data['size_bytes']:,} bytes (listed as {data['size']})\n"
+        elif data['size']:
+            info_text += f"Size: {data['size']}\n"
+        if data['modified']:
+            info_text += f"Modified: {data['modified']}\n"
+        if data.get('content_type'):
+            info_text += f"Content-Type: {data['content_type']}\n"
+        if data.get('etag'):
+            info_text += f"ETag: {data['etag']}\n"
+        if data.get('last_modified'):
+            info_text += f"Last-Modified: {data['last_modified']}\n"
+        info_text += f"URL: {urljoin(self.current_url, data['href'])}"
+        if data['type'] == 'file' and data['name'].lower().endswith(DEB_EXTENSIONS):
+            package_info = self.package_info_cache.get(data['url'], self.package_validator(data))
+            if package_info is not None:
+                info_text += '\n\n' + format_deb_info(package_info)
+            else:
+                info_text += '\n\nReading package metadata...'
+        return info_text
+    
+    # Debian package metadata from ranged reads
+    def package_validator(self, data):
+        # The listing date rather than an ETag, which HEAD enrichment may add later
+        return data['modified']
+    
+    def package_info_pending(self, data):
+        return (data['type'] == 'file' and data['name'].lower().endswith(DEB_EXTENSIONS)
+                and self.package_info_cache.get(data['url'], self.package_validator(data)) is None)
+    
+    def read_package_info(self, data):
+        url = data['url']
+        if url in self.package_info_threads:
+            return
+        thread = PackageInfoThread(url, self.package_validator(data))
+        thread.info_ready.connect(self.package_info_ready)
+        thread.finished.connect(lambda success, message, url=url: self.package_info_threads.pop(url, None))
+        self.package_info_threads[url] = thread
+        thread.start()
+    
+    def package_info_ready(self, url, validator, info):
+        if validator is not None:
+            self.package_info_cache.put(url, validator, info)
+        # Only redraw if the package is still the one shown
+        selected = self.get_selected_items()
+        if selected and selected[0]['url'] == url:
+            text = self.info_panel_text(selected[0])
+            if validator is None:
+                text = text.replace('Reading package metadata...', format_deb_info(info))
+            self.info_text.setPlainText(text)
+    
     def clear_info_panel(self):
         """Clear the file information panel"""
         self.info_text.clear()
@@ -2460,22 +8726,9 @@ class WebCrawler(QMainWindow):
             self.sort_files()
 
     def download_file(self):
-        # Get selected item from the currently visible view
-        data = None
-        if self.file_table.isVisible():
-            selected_items = self.file_table.selectedItems()
-            if selected_items:
-                row = selected_items[0].row()
-                name_item = self.file_table.item(row, 0)
-                data = name_item.data(Qt.ItemDataRole.UserRole)
-        elif self.file_list.isVisible():
-            selected_items = self.file_list.selectedItems()
-            if selected_items:
-                data = selected_items[0].data(Qt.ItemDataRole.UserRole)
-        elif self.icon_view.isVisible():
-            selected_items = self.icon_view.selectedItems()
-            if selected_items:
-                data = selected_items[0].data(Qt.ItemDataRole.UserRole)
+        # Get the first selected item
+        selected_items = self.get_selected_items()
+        data = selected_items[0] if selected_items else None
         
         if not data or data['type'] != 'file':
             return
@@ -2499,7 +8752,7 @@ class WebCrawler(QMainWindow):
         self.progress_bar.setValue(0)
         self.status_bar.showMessage(f'Downloading {os.path.basename(filepath)}...')
         
-        self.download_thread = DownloadThread(url, filepath)
+        self.download_thread = DownloadThread(url, filepath, self.settings.get('download_fsync', 'never'))
         self.download_thread.progress.connect(self.update_download_progress)
         self.download_thread.finished.connect(self.download_finished)
         self.download_thread.start()
@@ -2524,6 +8777,27 @@ class WebCrawler(QMainWindow):
     def closeEvent(self, event):
         """Save settings when closing the application"""
         self.save_settings()
+        if self.crawl_thread and self.crawl_thread.isRunning():
+            self.crawl_thread.crawler.stop()
+            self.crawl_thread.wait(5000)
+        if self.content_indexer:
+            self.content_indexer.close()
+        for thread in list(self.tree_fetch_threads.values()) + list(self.listing_fetches):
+            thread.wait(2000)
+        # Background readers must not outlive the window whose slots they call
+        background_readers = list(self.enrich_threads) + list(self.preview_threads) + list(self.page_text_threads)
+        for thread in background_readers:
+            thread.stop()
+        for thread in (background_readers
+                       + list(self.page_revalidate_threads) + list(self.package_info_threads.values())):
+            thread.wait(2000)
+        if self.profiler.running:
+            self.finish_profile()
+        if self.stall_detector:
+            self.stall_detector.stop()
+        self.directory_watcher.stop()
+        if self.http_engine:
+            self.http_engine.stop()
         event.accept()
 
     def keyPressEvent(self, event):
@@ -2551,8 +8825,242 @@ class WebCrawler(QMainWindow):
         else:
             super().keyPressEvent(event)
 
+STARTUP_IMPORTS_DONE = time.perf_counter()
+
+def parse_arguments(argv):
+    """Parse our own options, leaving the rest for Qt"""
+    parser = argparse.ArgumentParser(description='WebCrawler - Apache File Index Browser')
+    parser.add_argument('--startup-report', action='store_true',
+                        default=bool(os.environ.get('WEBCRAWLER_STARTUP_REPORT')),
+                        help='print import, UI, first paint and first listing times')
+    parser.add_argument('--record-performance', action='store_true',
+                        help='record timing spans for this session (see Tools > Performance)')
+    parser.add_argument('--profile', choices=['session', 'load_directory', 'populate_file_views'],
+                        help='profile the whole session or the first call of the given method')
+    parser.add_argument('--profile-mode', choices=RuntimeProfiler.MODES,
+                        help='cprofile writes .pstats, sampling writes .speedscope.json')
+    parser.add_argument('--profile-dir', help='directory for profiles and the stall log')
+    parser.add_argument('--stall-threshold', type=int, metavar='MS',
+                        help='log the GUI thread stack whenever the event loop blocks longer than MS')
+
+    metrics_group = parser.add_argument_group('metrics')
+    metrics_group.add_argument('--metrics-port', type=int, metavar='PORT',
+                               help='serve /metrics (OpenMetrics) and /metrics.json on 127.0.0.1:PORT')
+    metrics_group.add_argument('--metrics-dump', metavar='FILE', help='write metrics as JSON to FILE periodically')
+    metrics_group.add_argument('--metrics-interval', type=float, default=10, metavar='SECONDS',
+                               help='seconds between JSON metric dumps (default 10)')
+
+    headless_group = parser.add_argument_group('headless mode')
+    headless_group.add_argument('--headless', metavar='URL', help='crawl URL without a GUI and exit')
+    headless_group.add_argument('--max-depth', type=int, help='directory levels to crawl below URL')
+    headless_group.add_argument('--download-to', metavar='DIR', help='mirror the crawled files into DIR')
+    headless_group.add_argument('--include', action='append', metavar='PATTERN',
+                                help='only download file names matching this glob (repeatable)')
+    headless_group.add_argument('--select', metavar='RULE',
+                                help="only download files matching a selection rule, e.g. '*.deb newer:30d size<50M'")
+    headless_group.add_argument('--catalog', metavar='FILE',
+                                help='write every crawled entry to FILE (.db, .jsonl or .parquet)')
+    headless_group.add_argument('--catalog-format', choices=['sqlite', 'jsonl', 'parquet'],
+                                help='catalog format when FILE has another extension')
+    headless_group.add_argument('--snapshot-dir', metavar='DIR',
+                                help='save a snapshot of the crawled tree under DIR, for --diff')
+    headless_group.add_argument('--checkpoint', metavar='FILE',
+                                help='log crawl progress to FILE; an interrupted crawl resumes from it, '
+                                     'a finished one is recrawled skipping directories that answer 304')
+    headless_group.add_argument('--restart-crawl', action='store_true',
+                                help='start over even if the checkpoint holds an interrupted crawl')
+    headless_group.add_argument('--checkpoint-interval', type=float, default=5, metavar='SECONDS',
+                                help='seconds between checkpoint flushes to disk (default 5)')
+    headless_group.add_argument('--visited', choices=sorted(VISITED_SET_TYPES), default='exact',
+                                help='visited set: exact URLs, 64-bit hashes or a fixed-size Bloom filter')
+    headless_group.add_argument('--retries', type=int, default=2, help='retries for failed requests (default 2)')
+    headless_group.add_argument('--engine', choices=['threads', 'asyncio'], default='threads',
+                                help='asyncio fetches concurrently through httpx (HTTP/2 with h2 installed)')
+    headless_group.add_argument('--concurrency', type=int, default=16,
+                                help='concurrent listing fetches with --engine asyncio (default 16)')
+    headless_group.add_argument('--download-concurrency', type=int, default=4,
+                                help='concurrent downloads with --engine asyncio (default 4)')
+    headless_group.add_argument('--extract', action='store_true',
+                                help='with --download-to, extract .tar.gz/.tar.xz/.gz/.xz/.bz2 files while downloading')
+    headless_group.add_argument('--fsync', choices=list(FSYNC_POLICIES), default='never',
+                                help='when downloaded files are synced to disk (default never)')
+
+    diff_group = parser.add_argument_group('snapshot diff')
+    diff_group.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'),
+                            help='compare two .snap.gz snapshots without a GUI and exit')
+    diff_group.add_argument('--diff-output', metavar='FILE',
+                            help='write the differences to FILE (.csv or .jsonl) instead of stdout')
+    return parser.parse_known_args(argv[1:])
+
+def start_metrics_exporters(args):
+    """Start the metrics endpoint and JSON dumps requested on the command line"""
+    exporters = []
+    if args.metrics_port is not None:
+        server = MetricsServer(metrics, args.metrics_port).start()
+        print(f"Serving metrics at http://127.0.0.1:{server.port}/metrics")
+        exporters.append(server)
+    if args.metrics_dump:
+        exporters.append(MetricsDumper(metrics, args.metrics_dump, args.metrics_interval).start())
+    return exporters
+
+def run_headless(args):
+    """Crawl (and optionally mirror) a tree without a GUI; returns the exit status"""
+    url = args.headless if args.headless.endswith('/') else args.headless + '/'
+    engine = None
+    if args.engine == 'asyncio':
+        if not HTTPX_AVAILABLE:
+            print("The asyncio engine needs httpx (pip install httpx, plus h2 for HTTP/2)")
+            return 2
+        engine = AsyncHttpEngine().start()
+    try:
+        return run_headless_crawl(args, url, engine)
+    finally:
+        if engine:
+            engine.stop()
+
+def run_headless_crawl(args, url, engine):
+    rule = None
+    if args.select:
+        try:
+            rule = SelectionRule(args.select)
+        except ValueError as e:
+            print(f"Invalid selection rule: {e}")
+            return 2
+    checkpoint = None
+    if args.checkpoint:
+        catalog_format = args.catalog and (args.catalog_format or CatalogWriter.format_for_path(args.catalog))
+        # Snapshots and JSON Lines or Parquet catalogs start empty, so they need every listing
+        try:
+            checkpoint = CrawlCheckpoint(args.checkpoint, args.checkpoint_interval,
+                                         revalidate=catalog_format in (None, 'sqlite') and not args.snapshot_dir)
+        except OSError as e:
+            print(f"Cannot read checkpoint: {e}")
+            return 2
+        if checkpoint.resumable and not args.restart_crawl and args.snapshot_dir:
+            print("A snapshot needs a complete crawl; add --restart-crawl to start over")
+            return 2
+        if checkpoint.resumable and not args.restart_crawl:
+            print(f"Resuming crawl with {len(checkpoint.pending)} directories left")
+            if args.download_to:
+                print("Only files in the directories crawled from here on will be downloaded")
+    resuming = checkpoint is not None and checkpoint.resumable and not args.restart_crawl
+    crawler = DirectoryCrawler(url, create_session(retries=args.retries), args.max_depth,
+                               engine=engine, concurrency=args.concurrency, checkpoint=checkpoint,
+                               visited=VISITED_SET_TYPES[args.visited](), resume=not args.restart_crawl)
+    collector = None
+    if args.download_to:
+        collector = DownloadCollector(url, args.include, rule)
+        crawler.add_sink(collector)
+    catalog = None
+    if args.catalog:
+        try:
+            catalog = CatalogWriter(args.catalog, url, args.catalog_format, append=resuming)
+        except (ValueError, OSError, sqlite3.Error) as e:
+            print(f"Cannot write catalog: {e}")
+            return 2
+        crawler.add_sink(catalog)
+    snapshot = None
+    if args.snapshot_dir:
+        try:
+            snapshot = SnapshotWriter(SnapshotStore(args.snapshot_dir).new_path(url), url)
+        except OSError as e:
+            print(f"Cannot create snapshot: {e}")
+            return 2
+        crawler.add_sink(snapshot)
+
+    def progress(directories, queued, current_url):
+        print(f"[{directories} crawled, {queued} queued] {current_url}")
+
+    try:
+        crawler.crawl(progress)
+    except ValueError as e:
+        # A checkpoint left by a crawl of another URL
+        print(e)
+        if snapshot:
+            discard_partial_snapshot(crawler, snapshot, success=False)
+        return 2
+    for failed_url, error in crawler.errors:
+        print(f"Error crawling {failed_url}: {error}")
+    print(f"Crawled {crawler.directories_crawled} directories ({crawler.unchanged} unchanged, "
+          f"{len(crawler.errors)} failed)")
+    if catalog:
+        print(f"Wrote {catalog.written} entries to {catalog.filepath}")
+    if snapshot:
+        reason = discard_partial_snapshot(crawler, snapshot)
+        if reason:
+            print(f"Snapshot {snapshot.filepath} discarded, {reason}")
+        else:
+            print(f"Snapshot {snapshot.filepath}: {snapshot.written} entries saved")
+    if collector is None:
+        return 1 if crawler.errors else 0
+
+    print(f"Downloading {len(collector.items)} files ({collector.total_size / 1024 / 1024:.1f} MB listed)")
+    result = {}
+    manager = MultiDownloadManager(collector.items, args.download_to, engine=engine,
+                                   concurrency=args.download_concurrency, fsync_policy=args.fsync,
+                                   extract=args.extract)
+    manager.finished.connect(lambda success, message: result.update(success=success, message=message))
+    # No event loop here, so run the manager in this thread
+    manager.run()
+    # Hashes of the compressed streams, in sha256sum format
+    for url, digest in manager.digests.items():
+        print(f"{digest}  {url}")
+    print(result.get('message', ''))
+    return 0 if result.get('success') and not crawler.errors else 1
+
+def run_diff(args):
+    """Compare two snapshots from the command line; returns the exit status"""
+    old_path, new_path = args.diff
+    try:
+        if args.diff_output:
+            counts = export_diff(old_path, new_path, args.diff_output)
+        else:
+            counts = {'added': 0, 'removed': 0, 'changed': 0}
+            _, old_rows = read_snapshot(old_path)
+            _, new_rows = read_snapshot(new_path)
+            markers = {'added': '+', 'removed': '-', 'changed': '~'}
+            for change, path, old_row, new_row in diff_snapshots(old_rows, new_rows):
+                counts[change] += 1
+                print(f"{markers[change]} {path}")
+    except (OSError, EOFError, ValueError) as e:
+        print(f"Cannot compare snapshots: {e}")
+        return 2
+    print(f"{counts['added']} added, {counts['changed']} changed, {counts['removed']} removed",
+          file=sys.stdout if args.diff_output else sys.stderr)
+    return 0
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    args, qt_args = parse_arguments(sys.argv)
+    if args.diff:
+        sys.exit(run_diff(args))
+    exporters = start_metrics_exporters(args)
+    if args.headless:
+        status = run_headless(args)
+        for exporter in exporters:
+            exporter.stop()
+        sys.exit(status)
+    
+    # WebEngine is imported after the QApplication exists, which requires shared GL contexts
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.record_performance:
+        perf_recorder.enabled = True
     browser = WebCrawler()
+    browser.startup_report = args.startup_report
+    # Profiling options apply to this session only
+    if args.profile_dir:
+        browser.profiler.output_dir = args.profile_dir
+    if args.profile_mode:
+        browser.profiler.mode = args.profile_mode
+        browser.profile_mode_actions[args.profile_mode].setChecked(True)
+    if args.profile == 'session':
+        browser.profiler.start('session')
+    elif args.profile:
+        browser.profiler.arm(args.profile)
+    if args.stall_threshold:
+        browser.set_stall_detection(True, args.stall_threshold, persist=False)
     browser.show()
-    sys.exit(app.exec())
+    status = app.exec()
+    for exporter in exporters:
+        exporter.stop()
+    sys.exit(status)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Local stand-in for an Apache/nginx autoindex mirror
+
+Serves a synthetic directory tree generated on the fly, so benchmarks can
+run without touching the real mirror:
+
+    python3 benchmarks/autoindex_server.py --port 8000 --entries 5000 --depth 2
+
+Every directory holds `subdirs` subdirectories (until `depth` is reached)
+and `entries` files. Latency is added before each response and bandwidth
+is shaped per connection.
+"""
+
+import argparse
+import hashlib
+import socket
+import subprocess
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlparse
+
+FILE_EXTENSIONS = ['iso', 'deb', 'tar.gz', 'txt', 'img', 'conf', 'xz', 'sh']
+
+# Fixed timestamp so listings and validators are stable between runs
+BASE_TIMESTAMP = 1700000000
+
+class SyntheticTree:
+    """Deterministic directory tree described by a few numbers"""
+
+    def __init__(self, entries=100, subdirs=3, depth=2, file_size=64 * 1024):
+        self.entries = entries
+        self.subdirs = subdirs
+        self.depth = depth
+        self.file_size = file_size
+
+    def resolve(self, path):
+        """Return ('dir', parts) or ('file', parts, index) for a URL path, or None"""
+        parts = [part for part in path.split('/') if part]
+        dir_parts = parts if path.endswith('/') or not parts else parts[:-1]
+        if len(dir_parts) > self.depth:
+            return None
+        for part in dir_parts:
+            if not part.startswith('dir_') or not part[4:].isdigit() or int(part[4:]) >= self.subdirs:
+                return None
+        if path.endswith('/') or not parts:
+            return ('dir', dir_parts)
+
+        name = parts[-1]
+        digits = name[5:11]
+        if not name.startswith('file_') or not digits.isdigit():
+            return None
+        index = int(digits)
+        if index >= self.entries or name != self.file_name(index):
+            return None
+        return ('file', dir_parts, index)
+
+    def file_name(self, index):
+        ext = FILE_EXTENSIONS[index % len(FILE_EXTENSIONS)]
+        return f"file_{index:06d}.{ext}"
+
+    def file_size_for(self, index):
+        # Vary sizes a little so sorting by size is meaningful
+        return self.file_size + (index % 7) * 1024
+
+    def mtime_for(self, index):
+        return BASE_TIMESTAMP + index * 3600
+
+    def listing_entries(self, dir_parts):
+        """Yield (name, is_dir, size, mtime) for a directory"""
+        if len(dir_parts) < self.depth:
+            for index in range(self.subdirs):
+                yield f"dir_{index}", True, 0, BASE_TIMESTAMP
+        for index in range(self.entries):
+            yield self.file_name(index), False, self.file_size_for(index), self.mtime_for(index)
+
+    def file_chunk(self, index, offset, length):
+        """Deterministic file content, generated without holding the whole file"""
+        pattern = hashlib.sha256(str(index).encode()).digest() * 128
+        start = offset % len(pattern)
+        data = (pattern * (length // len(pattern) + 2))[start:start + length]
+        return data
+
+def human_size(size):
+    for unit in ['', 'K', 'M', 'G']:
+        if size < 1024 or unit == 'G':
+            return f"{size:.0f}{unit}" if unit == '' else f"{size:.1f}{unit}"
+        size /= 1024.0
+
+def render_apache(path, entries):
+    rows = ['<tr><th valign="top"><img src="/icons/blank.gif" alt="[ICO]"></th><th><a href="?C=N;O=D">Name</a></th>'
+            '<th><a href="?C=M;O=A">Last modified</a></th><th><a href="?C=S;O=A">Size</a></th>'
+            '<th><a href="?C=D;O=A">Description</a></th></tr>',
+            '<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td>'
+            f'<td><a href="{quote(path.rstrip("/").rsplit("/", 1)[0] + "/")}">Parent Directory</a></td>'
+            '<td>&nbsp;</td><td align="right">  - </td><td>&nbsp;</td></tr>']
+    for name, is_dir, size, mtime in entries:
+        href = quote(name) + ('/' if is_dir else '')
+        label = '[DIR]' if is_dir else '[   ]'
+        modified = time.strftime('%Y-%m-%d %H:%M', time.gmtime(mtime))
+        size_text = '  - ' if is_dir else human_size(size)
+        rows.append(f'<tr><td valign="top"><img src="/icons/folder.gif" alt="{label}"></td>'
+                    f'<td><a href="{href}">{name}{"/" if is_dir else ""}</a></td>'
+                    f'<td align="right">{modified}  </td><td align="right">{size_text}</td><td>&nbsp;</td></tr>')
+    return ('<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN">\n<html>\n<head>\n'
+            f'<title>Index of {path}</title>\n</head>\n<body>\n<h1>Index of {path}</h1>\n'
+            '<table>\n' + '\n'.join(rows) + '\n</table>\n</body></html>\n')
+
+def render_nginx(path, entries):
+    lines = ['<a href="../">../</a>']
+    for name, is_dir, size, mtime in entries:
+        href = quote(name) + ('/' if is_dir else '')
+        modified = time.strftime('%d-%b-%Y %H:%M', time.gmtime(mtime))
+        size_text = '-' if is_dir else str(size)
+        display = name + ('/' if is_dir else '')
+        lines.append(f'<a href="{href}">{display}</a>{" " * max(1, 51 - len(display))}{modified}{size_text:>20}')
+    return (f'<html>\n<head><title>Index of {path}</title></head>\n<body>\n<h1>Index of {path}</h1><hr><pre>'
+            + '\n'.join(lines) + '\n</pre><hr></body>\n</html>\n')
+
+class AutoindexHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Like Apache and nginx on keep-alive connections; otherwise the separate
+        # header and body writes hit Nagle plus delayed ACKs (~40 ms per request)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        config = self.server.config
+        self.server.count_request()
+        if config['latency'] > 0:
+            time.sleep(config['latency'])
+
+        path = unquote(urlparse(self.path).path)
+        resolved = config['tree'].resolve(path)
+        if resolved is None:
+            self.send_error(404)
+            return
+
+        if resolved[0] == 'dir':
+            entries = list(config['tree'].listing_entries(resolved[1]))
+            render = render_nginx if config['style'] == 'nginx' else render_apache
+            body = render(path, entries).encode('utf-8')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html;charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            if send_body:
+                self.write_shaped(body)
+            return
+
+        index = resolved[2]
+        tree = config['tree']
+        size = tree.file_size_for(index)
+        mtime = tree.mtime_for(index)
+        etag = f'"{index:x}-{size:x}"'
+        last_modified = formatdate(mtime, usegmt=True)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        if send_body:
+            offset = 0
+            while offset < size:
+                length = min(65536, size - offset)
+                self.write_shaped(tree.file_chunk(index, offset, length))
+                offset += length
+
+    def write_shaped(self, data):
+        """Write data, sleeping as needed to respect the bandwidth limit"""
+        bandwidth = self.server.config['bandwidth']
+        if bandwidth <= 0:
+            self.wfile.write(data)
+            return
+        chunk_size = max(1024, bandwidth // 20)
+        view = memoryview(data)
+        for start in range(0, len(view), chunk_size):
+            chunk = view[start:start + chunk_size]
+            started = time.monotonic()
+            self.wfile.write(chunk)
+            delay = len(chunk) / bandwidth - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+class QueueingHTTPServer(ThreadingHTTPServer):
+    # Room for many simultaneous connects when benchmarking concurrency
+    request_queue_size = 512
+
+class AutoindexServer:
+    """Run the stand-in server on a background thread
+
+        with AutoindexServer(entries=1000) as server:
+            requests.get(server.url)
+    """
+
+    def __init__(self, entries=100, subdirs=3, depth=2, file_size=64 * 1024,
+                 latency=0.0, bandwidth=0, style='apache', host='127.0.0.1', port=0):
+        self.httpd = QueueingHTTPServer((host, port), AutoindexHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = {
+            'tree': SyntheticTree(entries, subdirs, depth, file_size),
+            'latency': latency,
+            'bandwidth': bandwidth,
+            'style': style,
+        }
+        self.httpd.request_count = 0
+        self.httpd.count_lock = threading.Lock()
+
+        def count_request():
+            with self.httpd.count_lock:
+                self.httpd.request_count += 1
+        self.httpd.count_request = count_request
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def tree(self):
+        return self.httpd.config['tree']
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class AutoindexServerProcess:
+    """Run the stand-in server in a child process
+
+    Keeps the server's threads off the benchmark's GIL, which matters when
+    the client side is a single event loop thread.
+    """
+
+    def __init__(self, entries=100, subdirs=3, depth=2, file_size=64 * 1024,
+                 latency=0.0, bandwidth=0, style='apache', host='127.0.0.1'):
+        self.tree = SyntheticTree(entries, subdirs, depth, file_size)
+        self.host = host
+        with socket.socket() as probe:
+            probe.bind((host, 0))
+            self.port = probe.getsockname()[1]
+        self.command = [sys.executable, __file__, '--host', host, '--port', str(self.port),
+                        '--entries', str(entries), '--subdirs', str(subdirs), '--depth', str(depth),
+                        '--file-size', str(file_size), '--latency', str(latency),
+                        '--bandwidth', str(bandwidth), '--style', style]
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, text=True)
+        # The banner is printed once the socket is listening
+        self.process.stdout.readline()
+        return self
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+        self.process.stdout.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a synthetic autoindex tree')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--entries', type=int, default=100, help='files per directory')
+    parser.add_argument('--subdirs', type=int, default=3, help='subdirectories per directory')
+    parser.add_argument('--depth', type=int, default=2, help='directory levels below the root')
+    parser.add_argument('--file-size', type=int, default=64 * 1024, help='approximate file size in bytes')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second per connection (0 = unlimited)')
+    parser.add_argument('--style', choices=['apache', 'nginx'], default='apache')
+    args = parser.parse_args()
+
+    server = AutoindexServer(args.entries, args.subdirs, args.depth, args.file_size,
+                             args.latency, args.bandwidth, args.style, args.host, args.port)
+    print(f"Serving synthetic index at {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""Benchmarks for listing, view, search and download paths of Webcrawler.py
+
+Runs against the local stand-in server in autoindex_server.py and prints
+the results as JSON, so runs can be compared over time:
+
+    python3 benchmarks/run_benchmarks.py --entries 1000,10000 --output results.json
+
+Qt runs on the offscreen platform unless QT_QPA_PLATFORM is already set.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import requests
+from PyQt6.QtWidgets import QApplication
+
+# Keep the application's own messages out of the JSON on stdout
+with contextlib.redirect_stdout(sys.stderr):
+    import Webcrawler
+from autoindex_server import AutoindexServer, AutoindexServerProcess
+
+SEARCH_QUERIES = {
+    'Substring': ['f', 'fi', 'file_0', 'file_000', 'file_0001'],
+    'Fuzzy': ['f', 'f1', 'f12', 'f12t', 'f12tx'],
+    'Regex': [r'\.iso$', r'file_0+1\d*\.(deb|xz)$', r'^file_\d{6}\.tar\.gz$'],
+}
+
+def measure(func, repeat):
+    """Run func repeat times and summarize the wall clock times in milliseconds"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.mean(times), 3),
+        'max_ms': round(max(times), 3),
+        'runs': repeat,
+    }, result
+
+def bench_parse(entries, repeat, latency):
+    """Time parse_directory_listing on Apache and nginx pages"""
+    results = []
+    for style in ['apache', 'nginx']:
+        with AutoindexServer(entries=entries, subdirs=3, depth=1, latency=latency, style=style) as server:
+            fetch_stats, response = measure(lambda: requests.get(server.url, timeout=30), repeat)
+            content = response.content
+            parse_stats, items = measure(lambda: Webcrawler.parse_directory_listing(content, server.url), repeat)
+        results.append({'name': 'fetch_listing', 'style': style, 'entries': entries,
+                        'bytes': len(content), **fetch_stats})
+        results.append({'name': 'parse_listing', 'style': style, 'entries': entries,
+                        'items': len(items), **parse_stats})
+    return results
+
+def bench_views(window, app, entries, repeat, latency):
+    """Time load_directory end to end, view population and filtering"""
+    results = []
+    with AutoindexServer(entries=entries, subdirs=3, depth=1, latency=latency) as server:
+        window.base_url = server.url
+
+        def load():
+            window.load_directory(server.url)
+            # The listing is fetched in the background; wait until it is shown
+            while window.listing_fetches:
+                app.processEvents()
+                time.sleep(0.001)
+            app.processEvents()
+        load_stats, _ = measure(load, repeat)
+        results.append({'name': 'load_directory', 'entries': entries, **load_stats})
+
+    items = list(window.current_items)
+
+    def populate():
+        window.current_items = list(items)
+        window.populate_file_views()
+        app.processEvents()
+    for view_mode in ['Details', 'List', 'Icons']:
+        window.view_combo.setCurrentText(view_mode)
+        app.processEvents()
+        populate_stats, _ = measure(populate, repeat)
+        results.append({'name': 'populate_file_views', 'entries': entries,
+                        'view_mode': view_mode, **populate_stats})
+
+    matcher = Webcrawler.FileNameMatcher()
+    matcher.set_names([item['name'] for item in items])
+    for mode, queries in SEARCH_QUERIES.items():
+        # Each run types the queries one keystroke at a time, as the live filter sees them
+        def type_queries():
+            matcher.reset()
+            return [len(matcher.match(query, mode)) for query in queries]
+        stats, counts = measure(type_queries, repeat)
+        stats['per_query_ms'] = round(stats['median_ms'] / len(queries), 3)
+        results.append({'name': 'search_match', 'mode': mode, 'entries': entries,
+                        'matches': counts, **stats})
+
+    # Filtering through the proxy model includes the view updates
+    window.search_filter_check.setChecked(True)
+    window.search_mode_combo.setCurrentText('Substring')
+
+    def filter_views():
+        window.name_matcher.reset()
+        for query in SEARCH_QUERIES['Substring']:
+            window.apply_search_filter(query)
+            app.processEvents()
+        window.clear_search_filter()
+        app.processEvents()
+    stats, _ = measure(filter_views, repeat)
+    results.append({'name': 'search_filter_views', 'entries': entries, **stats})
+    window.search_filter_check.setChecked(False)
+    return results
+
+def bench_download(app, size, repeat, bandwidth):
+    """Time DownloadThread and MultiDownloadManager against one large file"""
+    results = []
+    with AutoindexServer(entries=4, subdirs=0, depth=0, file_size=size, bandwidth=bandwidth) as server, \
+            tempfile.TemporaryDirectory() as download_dir:
+        name = server.tree.file_name(0)
+        url = server.url + name
+        total_size = server.tree.file_size_for(0)
+        outcome = {}
+
+        def single():
+            thread = Webcrawler.DownloadThread(url, os.path.join(download_dir, name))
+            thread.finished.connect(lambda success, message: outcome.update(success=success, message=message))
+            # Run in the calling thread so only the download itself is timed
+            thread.run()
+            if not outcome.get('success'):
+                raise RuntimeError(outcome.get('message'))
+        stats, _ = measure(single, repeat)
+        stats['mb_per_s'] = round(total_size / 1024 / 1024 / (stats['median_ms'] / 1000), 2)
+        results.append({'name': 'download_thread', 'bytes': total_size, 'bandwidth_limit': bandwidth, **stats})
+
+        names = [server.tree.file_name(index) for index in range(4)]
+        multi_bytes = sum(server.tree.file_size_for(index) for index in range(4))
+
+        def multi():
+            manager = Webcrawler.MultiDownloadManager([(server.url + n, n) for n in names], download_dir)
+            manager.finished.connect(lambda success, message: outcome.update(success=success, message=message))
+            manager.run()
+            if not outcome.get('success'):
+                raise RuntimeError(outcome.get('message'))
+        stats, _ = measure(multi, repeat)
+        stats['mb_per_s'] = round(multi_bytes / 1024 / 1024 / (stats['median_ms'] / 1000), 2)
+        results.append({'name': 'multi_download', 'files': len(names), 'bytes': multi_bytes,
+                        'bandwidth_limit': bandwidth, **stats})
+    return results
+
+def bench_write_path(size, repeat):
+    """CPU per GB and allocations of the old iter_content loop and download_to_file"""
+    # Imported here so the other groups run without tracemalloc loaded
+    import tracemalloc
+
+    def iter_content_to_file(url, filepath, counter):
+        # The loop DownloadThread and MultiDownloadManager used before download_to_file
+        response = requests.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+        with open(filepath, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                counter['writes'] += 1
+                counter['fresh_buffers'] += 1
+                f.write(chunk)
+        return os.path.getsize(filepath)
+
+    def readinto_to_file(url, filepath, counter):
+        buffers = set()
+
+        def progress(downloaded, total_size):
+            counter['writes'] += 1
+        # Note each distinct buffer handed to the writer
+        write = Webcrawler.DownloadFile.write
+
+        def tracking_write(self, data):
+            buffers.add(id(data.obj) if isinstance(data, memoryview) else id(data))
+            return write(self, data)
+        Webcrawler.DownloadFile.write = tracking_write
+        try:
+            written = Webcrawler.download_to_file(url, filepath, progress)
+        finally:
+            Webcrawler.DownloadFile.write = write
+        counter['fresh_buffers'] += len(buffers)
+        return written
+
+    results = []
+    # Out of process, so the server's CPU time is not counted against the client
+    with AutoindexServerProcess(entries=1, subdirs=0, depth=0, file_size=size) as server, \
+            tempfile.TemporaryDirectory() as download_dir:
+        url = server.url + server.tree.file_name(0)
+        filepath = os.path.join(download_dir, server.tree.file_name(0))
+        for name, download in [('iter_content', iter_content_to_file), ('readinto', readinto_to_file)]:
+            walls, cpus = [], []
+            for _ in range(repeat):
+                counter = {'writes': 0, 'fresh_buffers': 0}
+                wall_started, cpu_started = time.perf_counter(), time.process_time()
+                received = download(url, filepath, counter)
+                walls.append(time.perf_counter() - wall_started)
+                cpus.append(time.process_time() - cpu_started)
+            # A separate traced run, as tracemalloc slows every allocation down
+            tracemalloc.start()
+            download(url, filepath, {'writes': 0, 'fresh_buffers': 0})
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            gigabytes = received / 1024 / 1024 / 1024
+            results.append({'name': 'download_write_path', 'path': name, 'bytes': received,
+                            'median_ms': round(statistics.median(walls) * 1000, 3),
+                            'mb_per_s': round(received / 1024 / 1024 / statistics.median(walls), 2),
+                            'cpu_s_per_gb': round(statistics.median(cpus) / gigabytes, 3),
+                            'writes': counter['writes'], 'payload_buffers': counter['fresh_buffers'],
+                            'traced_peak_kb': round(peak / 1024, 1), 'runs': repeat})
+    return results
+
+def bench_text_view(app, size, repeat):
+    """Loading, scrolling and searching a large text in QPlainTextEdit and LargeTextView"""
+    from PyQt6.QtWidgets import QPlainTextEdit
+
+    line = '{:08d} GET /FILES/debian/pool/main/file_{:06d}.deb 200 ERROR retrying\tmirror\n'
+    text = ''.join(line.format(number, number % 999983) for number in range(size // len(line.format(0, 0))))
+    results = []
+    for name, view_class in [('QPlainTextEdit', QPlainTextEdit), ('LargeTextView', Webcrawler.LargeTextView)]:
+        view = view_class()
+        view.resize(1000, 700)
+        view.show()
+        app.processEvents()
+
+        def load():
+            view.setPlainText(text)
+            app.processEvents()
+        load_stats, _ = measure(load, repeat)
+        results.append({'name': 'text_view_load', 'view': name, 'chars': len(text), **load_stats})
+
+        scrollbar = view.verticalScrollBar()
+        jumps = 50
+
+        def scroll():
+            # Jumps spread over the whole document, each painted before the next
+            for step in range(jumps):
+                scrollbar.setValue(scrollbar.maximum() * step // (jumps - 1))
+                view.viewport().repaint()
+        scroll_stats, _ = measure(scroll, repeat)
+        scroll_stats['per_jump_ms'] = round(scroll_stats['median_ms'] / jumps, 3)
+        results.append({'name': 'text_view_scroll', 'view': name, 'chars': len(text), **scroll_stats})
+        view.close()
+        view.deleteLater()
+        app.processEvents()
+
+    view = Webcrawler.LargeTextView()
+    view.resize(1000, 700)
+    view.show()
+    view.setPlainText(text)
+    engine = Webcrawler.TextSearchEngine()
+
+    def search():
+        engine.set_text(view.toPlainText())
+        matches = engine.find_all('error')
+        view.set_highlights(matches)
+        view.show_range(*matches[len(matches) // 2])
+        view.viewport().repaint()
+        return len(matches)
+    search_stats, count = measure(search, repeat)
+    results.append({'name': 'text_view_search', 'view': 'LargeTextView', 'chars': len(text),
+                    'matches': count, **search_stats})
+    view.close()
+    return results
+
+def bench_engines(levels, total_requests, latency, file_size):
+    """Requests per second with the thread model and the asyncio engine"""
+    # Imported here so the other groups run without these modules loaded
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    # Out of process, so server threads don't compete with the client for the GIL
+    with AutoindexServerProcess(entries=256, subdirs=0, depth=0, file_size=file_size, latency=latency) as server:
+        urls = [server.url + server.tree.file_name(index % 256) for index in range(total_requests)]
+
+        def fetch_blocking(url):
+            # What ListingFetchThread and the preview loaders do: one blocking requests.get
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            return len(response.content)
+
+        for concurrency in levels:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                received = sum(pool.map(fetch_blocking, urls))
+            elapsed = time.perf_counter() - started
+            results.append({'name': 'http_engine', 'engine': 'threads', 'concurrency': concurrency,
+                            'requests': total_requests, 'bytes': received, 'elapsed_ms': round(elapsed * 1000, 3),
+                            'requests_per_s': round(total_requests / elapsed, 1),
+                            'mb_per_s': round(received / 1024 / 1024 / elapsed, 2)})
+
+        if not Webcrawler.HTTPX_AVAILABLE:
+            results.append({'name': 'http_engine', 'engine': 'asyncio', 'skipped': 'httpx is not installed'})
+            return results
+
+        for concurrency in levels:
+            # Default pool size, as the application uses it
+            engine = Webcrawler.AsyncHttpEngine().start()
+
+            async def fetch_all():
+                semaphore = asyncio.Semaphore(concurrency)
+                versions = set()
+
+                async def fetch_one(url):
+                    async with semaphore:
+                        response = await engine.fetch(url, kind='download')
+                        response.raise_for_status()
+                        versions.add(response.http_version)
+                        return len(response.content)
+                sizes = await asyncio.gather(*(fetch_one(url) for url in urls))
+                return sum(sizes), sorted(versions)
+
+            started = time.perf_counter()
+            received, versions = engine.submit(fetch_all()).result()
+            elapsed = time.perf_counter() - started
+            engine.stop()
+            results.append({'name': 'http_engine', 'engine': 'asyncio', 'http_versions': versions,
+                            'concurrency': concurrency, 'requests': total_requests, 'bytes': received,
+                            'elapsed_ms': round(elapsed * 1000, 3),
+                            'requests_per_s': round(total_requests / elapsed, 1),
+                            'mb_per_s': round(received / 1024 / 1024 / elapsed, 2)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Run WebCrawler benchmarks against a local stand-in server')
+    parser.add_argument('--entries', default='1000,10000', help='comma separated entry counts per listing')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every listing response')
+    parser.add_argument('--download-size', type=int, default=32 * 1024 * 1024, help='bytes per downloaded file')
+    parser.add_argument('--bandwidth', type=int, default=0, help='download bandwidth limit in bytes per second')
+    parser.add_argument('--concurrency', default='1,16,128',
+                        help='comma separated concurrency levels for the HTTP engine comparison')
+    parser.add_argument('--engine-requests', type=int, default=512, help='requests per concurrency level')
+    parser.add_argument('--engine-latency', type=float, default=0.02,
+                        help='seconds of server latency per request in the HTTP engine comparison')
+    parser.add_argument('--write-size', type=int, default=256 * 1024 * 1024,
+                        help='bytes of the file used to compare download write paths')
+    parser.add_argument('--text-size', type=int, default=32 * 1024 * 1024,
+                        help='characters of the text used to compare text views')
+    parser.add_argument('--only', choices=['parse', 'views', 'download', 'write', 'engines', 'textview'],
+                        action='append',
+                        help='run only the given group (repeatable)')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    groups = args.only or ['parse', 'views', 'download', 'write', 'engines', 'textview']
+    entry_counts = [int(value) for value in args.entries.split(',') if value]
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = None
+    results = []
+    # The window reads and writes its settings here, never the user's own
+    config_dir = tempfile.TemporaryDirectory()
+    with contextlib.redirect_stdout(sys.stderr):
+        for entries in entry_counts:
+            if 'parse' in groups:
+                results.extend(bench_parse(entries, args.repeat, args.latency))
+            if 'views' in groups:
+                if window is None:
+                    # Default settings, so results do not depend on the user's configuration
+                    window = Webcrawler.WebCrawler(config_dir=config_dir.name)
+                    # Never fetch the configured start page during a benchmark
+                    window.start_page_pending = False
+                    window.show()
+                    app.processEvents()
+                results.extend(bench_views(window, app, entries, args.repeat, args.latency))
+        if 'download' in groups:
+            results.extend(bench_download(app, args.download_size, args.repeat, args.bandwidth))
+        if 'write' in groups:
+            results.extend(bench_write_path(args.write_size, args.repeat))
+        if 'engines' in groups:
+            levels = [int(value) for value in args.concurrency.split(',') if value]
+            results.extend(bench_engines(levels, args.engine_requests, args.engine_latency, 16 * 1024))
+        if 'textview' in groups:
+            results.extend(bench_text_view(app, args.text_size, args.repeat))
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt_platform': os.environ.get('QT_QPA_PLATFORM'),
+        'config': vars(args),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if window is not None:
+        window.close()
+    config_dir.cleanup()
+
+if __name__ == '__main__':
+    main()